@@ -2,10 +2,13 @@ import os
 from PyQt6.QtWidgets import QApplication
 from src import ui_main_window
 
-os.environ["QT_ENABLE_HIGHDPI_SCALING"] = "0"
-app = QApplication([])
+# Worker processes generating triggers in parallel import this module, so the editor only starts
+# when it is run.
+if __name__ == "__main__":
+    os.environ["QT_ENABLE_HIGHDPI_SCALING"] = "0"
+    app = QApplication([])
 
-main_window = ui_main_window.MainWindow()
-main_window.showMaximized()
+    main_window = ui_main_window.MainWindow()
+    main_window.showMaximized()
 
-app.exec()
\ No newline at end of file
+    app.exec()
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""Times Obstacle.delete_audio on obstacles of increasing size.
+
+Run from the repository root with:
+    python -m benchmarks.delete_audio
+
+The audio table has one row for every 10 explosions, so the largest obstacle has 100k explosions
+and 10k audio rows. Half of the audio rows reference explosions which have been deleted. If the
+clean-up is linear, the time per explosion stays roughly constant as the obstacle grows.
+"""
+import time
+import numpy as np
+from src.obstacle import Obstacle
+
+def build_obstacle(num_explosions: int, num_counts: int, rng: np.random.Generator) -> Obstacle:
+    """Returns an obstacle with random explosions and audio rows."""
+    ob = Obstacle()
+    ob.explosion_table.extend({
+        "Count": rng.integers(1, num_counts + 1, num_explosions),
+        "Player": rng.integers(0, 9, num_explosions),
+        "Explosion": rng.integers(0, 400, num_explosions),
+        "Location": rng.integers(1, 256, num_explosions),
+        "x": 16.0*rng.integers(0, 8, num_explosions),
+        "y": 16.0*rng.integers(0, 8, num_explosions)
+    })
+
+    # Half of the audio rows match an explosion and the other half reference an unused ID.
+    num_audio = num_explosions // 10
+    rows = rng.choice(ob.explosion_table.rows(), num_audio)
+    explosions = ob.explosion_table.column("Explosion")[rows].copy()
+    explosions[::2] = 1000
+    ob.audio_table.extend({
+        "Count": ob.explosion_table.column("Count")[rows],
+        "Explosion": explosions,
+        "DC Unit": rng.integers(0, 200, num_audio)
+    })
+    return ob
+
+def main() -> None:
+    """Prints the time taken by delete_audio for each obstacle size."""
+    rng = np.random.default_rng(0)
+    print("{:>12} {:>12} {:>12} {:>16}".format("explosions", "audio rows", "time (ms)", "ns / explosion"))
+    for num_explosions in [12500, 25000, 50000, 100000]:
+        ob = build_obstacle(num_explosions, 200, rng)
+        num_audio = len(ob.audio_table)
+        start = time.perf_counter()
+        ob.delete_audio()
+        elapsed = time.perf_counter() - start
+        assert len(ob.audio_table) == num_audio // 2
+        print("{:>12} {:>12} {:>12.2f} {:>16.1f}".format(num_explosions,
+                                                          num_audio,
+                                                          1000*elapsed,
+                                                          1e9*elapsed / num_explosions))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Times trig_gen.obstacle_triggers with an increasing number of worker processes.
+
+Run from the repository root with:
+    python -m benchmarks.parallel_triggers
+
+The obstacle has 2000 counts with 100 explosions each over 64 locations. The output of every run
+is checked against serial generation. If the counts are generated independently, the speedup
+grows close to linearly with the number of workers, up to the number of CPUs.
+"""
+import json
+import os
+import time
+import numpy as np
+from src import read_write
+from src import sc_data
+from src import trig_gen
+from src.graphics import Location
+from src.obstacle import Obstacle
+
+def build_obstacle(num_counts: int, num_locations: int, rng: np.random.Generator) -> tuple:
+    """Returns an obstacle with random explosions and its locations."""
+    ob = Obstacle()
+    locations = [Location(1 + i % 3, 1 + i % 2, ob.add_location(), ob.location_order)
+                 for i in range(num_locations)]
+    for i, loc in enumerate(locations):
+        loc.setPos(64*(i % 8), 64*(i // 8))
+    ob.count_id(num_counts)
+    num_explosions = 100*num_counts
+    explosions = np.array(list(sc_data.events_with("Explosion Image")))
+    ob.explosion_table.extend({
+        "Count": ob.counts.ids_of(rng.integers(1, num_counts + 1, num_explosions)),
+        "Player": rng.integers(0, 8, num_explosions),
+        "Explosion": rng.choice(explosions, num_explosions),
+        "Location": ob.location_order.ids_of(rng.integers(1, num_locations + 1, num_explosions)),
+        "x": 16.0*rng.integers(0, 4, num_explosions),
+        "y": 16.0*rng.integers(0, 3, num_explosions)
+    })
+    return ob, locations
+
+def trigger_arguments(ob: Obstacle, locations: list[Location]) -> tuple:
+    """Returns the arguments of obstacle_triggers with the options of the settings file."""
+    with open(read_write.get_path("Settings"), 'r') as file:
+        options = json.load(file)
+    death_count_options = {"Player": options["DC player"],
+                           "Ob": options["Obstacle DC unit"],
+                           "Count": options["Count DC unit"],
+                           "Delay": options["Delay DC unit"]}
+    comment_options = {key: options[key] for key in ["Add comments",
+                                                     "Obstacle text",
+                                                     "Count text",
+                                                     "Part text",
+                                                     "Delineator",
+                                                     "Audio text"]}
+    return (locations,
+            ob,
+            1,
+            death_count_options,
+            options["Trigger player"],
+            options["Death type"],
+            options["Player unit"],
+            options["Force name"],
+            comment_options)
+
+def main() -> None:
+    """Prints the time taken to generate the triggers for each number of workers."""
+    ob, locations = build_obstacle(2000, 64, np.random.default_rng(0))
+    arguments = trigger_arguments(ob, locations)
+    start = time.perf_counter()
+    serial = trig_gen.obstacle_triggers(*arguments)
+    serial_time = time.perf_counter() - start
+    print("{:>10} {:>12} {:>10}".format("workers", "time (s)", "speedup"))
+    print("{:>10} {:>12.2f} {:>10.2f}".format("serial", serial_time, 1))
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        triggers = trig_gen.obstacle_triggers(*arguments, parallel=True, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert triggers == serial
+        print("{:>10} {:>12.2f} {:>10.2f}".format(workers, elapsed, serial_time / elapsed))
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import numpy as np
+from src.safety import SafetyMap
+
+# The statistics of each cell computed by cell_coverage.
+metrics = ["Hits", "Minimum gap", "Median gap"]
+
+# The colors of the heat scale from cold to hot as (red, green, blue).
+heat_scale = np.array([[0, 0, 255],
+                       [0, 255, 255],
+                       [0, 255, 0],
+                       [255, 255, 0],
+                       [255, 0, 0]])
+
+def cell_coverage(grid: SafetyMap) -> dict[str, np.ndarray]:
+    """Returns statistics of the explosions hitting each cell of a grid, as rows x columns arrays.
+
+    "Hits" is the number of counts on which explosions hit a cell. "Minimum gap" and "Median gap"
+    are the minimum and median number of frames between consecutive hits, the reaction window of
+    a runner in the cell, where the last hit of a cycle is followed by the first hit of the next.
+    Gaps are NaN in cells which are never hit.
+    """
+    shape = (grid.rows, grid.columns)
+    timing = grid.ob.timing
+    starts = timing.starts()
+    hit = np.unpackbits(grid.kills.view(np.uint8), axis=-1, bitorder="little")
+    row, column, count = np.nonzero(hit[:, :, :grid.columns].transpose(1, 2, 0))
+    cell = row*grid.columns + column
+    hits = np.bincount(cell, minlength=grid.rows*grid.columns)
+    result = {"Hits": hits.reshape(shape),
+              "Minimum gap": np.full(shape, np.nan),
+              "Median gap": np.full(shape, np.nan)}
+    if not len(cell):
+        return result
+
+    # The hits are ordered by cell and then by count, so the hits of a cell form a block. The gap
+    # after the last hit of a block wraps around to the first hit of the next cycle.
+    frames = starts[count]
+    first = np.flatnonzero(np.r_[True, cell[1:] != cell[:-1]])
+    last = np.r_[first[1:], len(cell)] - 1
+    following = np.roll(frames, -1)
+    following[last] = frames[first] + timing.cycle_length()
+    gaps = following - frames
+    cells = cell[first]
+    result["Minimum gap"].flat[cells] = np.minimum.reduceat(gaps, first)
+
+    # Sorting the gaps within each block puts the median in the middle of the block.
+    gaps = gaps[np.lexsort([gaps, cell])]
+    size = last - first + 1
+    result["Median gap"].flat[cells] = (gaps[first + (size - 1) // 2] + gaps[first + size // 2]) / 2
+    return result
+
+def heat_colors(values: np.ndarray, hot_when_low: bool=False, alpha: int=128) -> np.ndarray:
+    """Returns the colors of a heat map of an array of values as 32-bit ARGB values, where the
+    largest values are hottest, or the smallest if hot_when_low is true. NaN and zero values are
+    transparent.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    shown = np.isfinite(values) & (values != 0)
+    heat = np.zeros(values.shape)
+    if shown.any():
+        low, high = values[shown].min(), values[shown].max()
+        heat[shown] = (values[shown] - low) / (high - low) if high > low else 1
+        if hot_when_low and high > low:
+            heat[shown] = 1 - heat[shown]
+    stops = np.linspace(0, 1, len(heat_scale))
+    red, green, blue = (np.interp(heat, stops, heat_scale[:, i]).astype(np.uint32)
+                        for i in range(3))
+    colors = np.uint32(alpha) << 24 | red << 16 | green << 8 | blue
+    return np.where(shown, colors, 0).astype(np.uint32)
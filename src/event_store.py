@@ -0,0 +1,985 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import MutableSequence
+import struct
+import sys
+import numpy as np
+
+class HashIndex:
+    """A hash index mapping the values of a tuple of columns to the ids of the rows holding them.
+
+    Keys are hashed to 64-bit integers, and the bulk of the index is a pair of NumPy arrays of
+    hashes and row ids sorted by hash, costing 12 bytes per row. Rows added since the arrays were
+    built are kept in a small dict until it outgrows a fraction of the arrays, at which point the
+    arrays are rebuilt. Entries of deleted or modified rows are left in place and filtered out on
+    lookup by checking the candidate rows against the table, which also resolves hash collisions.
+    """
+    offset = 14695981039346656037
+    prime = 1099511628211
+    mask = 2**64 - 1
+    min_pending = 1024
+
+    def __init__(self, names: list[str]):
+        self.names = names
+        self.hashes = np.zeros(0, dtype=np.uint64)
+        self.ids = np.zeros(0, dtype=np.uint32)
+        self.pending = {}
+        self.num_pending = 0
+        self.num_stale = 0
+
+    @classmethod
+    def hash_columns(cls, columns: list[np.ndarray]) -> np.ndarray:
+        """Returns the hashes of the rows formed by a list of equally long column arrays."""
+        hashes = np.full(len(columns[0]), cls.offset, dtype=np.uint64)
+        for values in columns:
+            if values.dtype.kind == "f":
+                # Adding zero turns -0.0 into 0.0, which it compares equal to.
+                values = values + values.dtype.type(0)
+                values = values.view(np.uint32 if values.dtype.itemsize == 4 else np.uint64)
+            hashes ^= values.astype(np.uint64)
+            hashes *= np.uint64(cls.prime)
+        return hashes
+
+    def hash_rows(self, table: "EventTable", rows: np.ndarray) -> np.ndarray:
+        """Returns the hashes of the keys of the input rows of table."""
+        return self.hash_columns([table.columns[name][rows] for name in self.names])
+
+    def hash_key(self, table: "EventTable", key: tuple) -> int:
+        """Returns the hash of a key, which equals the hash of the rows of table holding it."""
+        h = self.offset
+        for name, value in zip(self.names, key):
+            dtype = table.columns[name].dtype
+            if dtype.kind == "f":
+                formats = ("<f", "<I") if dtype.itemsize == 4 else ("<d", "<Q")
+                value = struct.unpack(formats[1], struct.pack(formats[0], value + 0.0))[0]
+            h = ((h ^ (int(value) & self.mask)) * self.prime) & self.mask
+        return h
+
+    def build(self, table: "EventTable") -> None:
+        """Rebuilds the sorted arrays from the live rows of table."""
+        rows = table.rows()
+        hashes = self.hash_rows(table, rows)
+        order = np.argsort(hashes, kind="stable")
+        self.hashes = hashes[order]
+        self.ids = rows[order].astype(np.uint32)
+        self.pending.clear()
+        self.num_pending = 0
+        self.num_stale = 0
+
+    def add(self, table: "EventTable", rows: np.ndarray) -> None:
+        """Adds the input rows of table to the index."""
+        if self.num_pending + len(rows) > max(self.min_pending, len(self.ids) // 32):
+            self.build(table)
+            return
+        if len(rows) == 1:
+            row = int(rows[0])
+            key = tuple(table.columns[name].item(row) for name in self.names)
+            self.pending.setdefault(self.hash_key(table, key), []).append(row)
+        else:
+            for h, row in zip(self.hash_rows(table, rows).tolist(), rows.tolist()):
+                self.pending.setdefault(h, []).append(row)
+        self.num_pending += len(rows)
+
+    def remove(self, table: "EventTable", rows: np.ndarray) -> None:
+        """Removes the input rows of table from the index."""
+        # The entries are filtered out on lookup and dropped when the arrays are next rebuilt.
+        self.num_stale += len(rows)
+
+    def get(self, table: "EventTable", key: tuple) -> np.ndarray:
+        """Returns the ids of the live rows of table with the input key in insertion order."""
+        if self.num_stale > max(self.min_pending, len(self.ids)):
+            self.build(table)
+        h = self.hash_key(table, key)
+        candidates = list(self.pending.get(h, ()))
+        i = int(self.hashes.searchsorted(np.uint64(h)))
+        while i < len(self.hashes) and self.hashes[i] == h:
+            candidates.append(int(self.ids[i]))
+            i += 1
+        if not candidates:
+            return np.zeros(0, dtype=np.int64)
+        rows = np.unique(np.array(candidates, dtype=np.int64))
+        mask = table.live[rows]
+        for name, value in zip(self.names, key):
+            mask &= table.columns[name][rows] == value
+        return rows[mask]
+
+    def has(self, table: "EventTable", key: tuple) -> bool:
+        """Checks if any live row of table has the input key."""
+        return len(self.get(table, key)) > 0
+
+    def memory_usage(self) -> int:
+        """Returns the approximate number of bytes used by the index."""
+        pending = sum(sys.getsizeof(rows) for rows in self.pending.values())
+        return self.hashes.nbytes + self.ids.nbytes + sys.getsizeof(self.pending) + pending
+
+    def clear(self) -> None:
+        """Removes all rows from the index."""
+        self.hashes = np.zeros(0, dtype=np.uint64)
+        self.ids = np.zeros(0, dtype=np.uint32)
+        self.pending.clear()
+        self.num_pending = 0
+        self.num_stale = 0
+
+class GroupIndex:
+    """An index mapping each value of a column with few distinct values, such as counts or
+    locations, to the ids of the rows holding it. Row ids are kept in sorted arrays of 4-byte
+    integers.
+    """
+
+    def __init__(self, name: str):
+        self.names = [name]
+        self.buckets = {}
+
+    def groups(self, table: "EventTable", rows: np.ndarray) -> list[tuple]:
+        """Returns the input rows of table grouped by value as (value, sorted rows) pairs."""
+        values = table.columns[self.names[0]][rows]
+        order = np.lexsort((rows, values))
+        values, rows = values[order], rows[order]
+        starts = np.flatnonzero(np.diff(values, prepend=values[:1] + 1))
+        return list(zip(values[starts].tolist(), np.split(rows, starts[1:])))
+
+    def add(self, table: "EventTable", rows: np.ndarray) -> None:
+        """Adds the input rows of table to the index."""
+        if len(rows) == 1:
+            groups = [(table.columns[self.names[0]].item(int(rows[0])), rows)]
+        else:
+            groups = self.groups(table, rows)
+        for value, group in groups:
+            bucket = self.buckets.setdefault(value, array("I"))
+            # New rows are usually appended after all existing ones, otherwise the bucket is merged.
+            if not bucket or bucket[-1] < group[0]:
+                bucket.frombytes(group.astype(np.uint32).tobytes())
+            else:
+                ids = np.union1d(np.frombuffer(bucket, dtype=np.uint32), group.astype(np.uint32))
+                self.buckets[value] = array("I", ids.tobytes())
+
+    def remove(self, table: "EventTable", rows: np.ndarray) -> None:
+        """Removes the input rows of table from the index."""
+        for value, group in self.groups(table, rows):
+            ids = np.frombuffer(self.buckets[value], dtype=np.uint32)
+            ids = np.delete(ids, ids.searchsorted(group.astype(np.uint32)))
+            if len(ids):
+                self.buckets[value] = array("I", ids.tobytes())
+            else:
+                del self.buckets[value]
+
+    def get(self, table: "EventTable", key: tuple) -> np.ndarray:
+        """Returns the ids of the rows with the input key in insertion order."""
+        bucket = self.buckets.get(key[0])
+        if bucket is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.frombuffer(bucket, dtype=np.uint32).astype(np.int64)
+
+    def has(self, table: "EventTable", key: tuple) -> bool:
+        """Checks if any row has the input key."""
+        return key[0] in self.buckets
+
+    def memory_usage(self) -> int:
+        """Returns the approximate number of bytes used by the index."""
+        return sys.getsizeof(self.buckets) + sum(sys.getsizeof(bucket)
+                                                 for bucket in self.buckets.values())
+
+    def clear(self) -> None:
+        """Removes all rows from the index."""
+        self.buckets.clear()
+
+class StableOrder:
+    """An ordered list of items referred to by stable IDs, such as the counts or locations of an
+    obstacle, mapping the position of each item to its ID and back.
+
+    Events refer to items by ID, so inserting or deleting an item only changes the order, not the
+    events. IDs start at 1 and are never reused, so 0 never refers to an item.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.next_id = 1
+        
+        # positions[ID] is the position of the item with that ID, or 0 if it was deleted.
+        self.positions = [0]
+
+        # If set, insertions and deletions are recorded in this src.history.History.
+        self.history = None
+        
+        # Observers are called with the ID of an item and the kind of change, "Order" when it's
+        # inserted or deleted.
+        self.observers = []
+
+    def __len__(self) -> int:
+        """Returns the number of items."""
+        return len(self.ids)
+
+    def record(self, undo: tuple, redo: tuple, key: tuple=None) -> None:
+        """Records an operation in the history, if there is one."""
+        if self.history is not None:
+            self.history.record(undo, redo, key)
+            
+    def add_observer(self, callback) -> None:
+        """Registers a callback which is called with an item's ID and the kind of change whenever
+        the item changes.
+        """
+        self.observers.append(callback)
+        
+    def notify(self, ID: int, kind: str) -> None:
+        """Calls the observers after the item with the input ID changed."""
+        for callback in self.observers:
+            callback(ID, kind)
+
+    def place(self, i: int, ID: int=0) -> int:
+        """Inserts an item before index i without recording it and returns its ID."""
+        if not ID:
+            ID = self.next_id
+            self.next_id += 1
+            self.positions.append(0)
+        if i >= len(self.ids):
+            self.ids.append(ID)
+            self.positions[ID] = len(self.ids)
+        else:
+            self.ids.insert(i, ID)
+            self.reindex()
+        self.notify(ID, "Order")
+        return ID
+
+    def take(self, i: int) -> int:
+        """Deletes the item at index i without recording it and returns its ID."""
+        ID = self.ids.pop(i)
+        if i == len(self.ids):
+            self.positions[ID] = 0
+        else:
+            self.reindex()
+        self.notify(ID, "Order")
+        return ID
+
+    def add(self, i: int, ID: int=0) -> int:
+        """Inserts a new item before index i and returns its ID. Passing the ID of a deleted item
+        restores that item instead.
+        """
+        ID = self.place(i, ID)
+        self.record((self.discard, ID), (self.add, i, ID))
+        return ID
+
+    def remove_at(self, i: int) -> int:
+        """Deletes the item at index i and returns its ID."""
+        i = range(len(self.ids))[i]
+        ID = self.take(i)
+        self.record((self.add, i, ID), (self.discard, ID))
+        return ID
+
+    def discard(self, ID: int) -> None:
+        """Deletes the item with the input ID."""
+        self.remove_at(self.positions[ID] - 1)
+
+    def clear(self, restart: bool=False) -> None:
+        """Deletes all items. If restart is true, IDs are numbered from 1 again, which is only
+        valid once no events refer to the deleted items.
+        """
+        self.ids.clear()
+        if restart:
+            self.next_id = 1
+        self.reindex()
+
+    def reindex(self) -> None:
+        """Recomputes the position of every item."""
+        self.positions = [0]*self.next_id
+        for position, ID in enumerate(self.ids, 1):
+            self.positions[ID] = position
+
+    def id(self, position: int) -> int:
+        """Returns the ID of the item at the input position, or 0 if there is no such item."""
+        if 1 <= position <= len(self.ids):
+            return self.ids[int(position) - 1]
+        return 0
+
+    def position(self, ID: int) -> int:
+        """Returns the position of the item with the input ID, or 0 if there is no such item."""
+        return self.positions[ID]
+
+    def ids_of(self, positions: np.ndarray) -> np.ndarray:
+        """Returns the IDs of the items at an array of positions."""
+        return np.asarray(self.ids, dtype=np.int64)[np.asarray(positions, dtype=np.int64) - 1]
+
+    def positions_of(self, IDs: np.ndarray) -> np.ndarray:
+        """Returns the positions of the items with an array of IDs."""
+        return np.asarray(self.positions, dtype=np.int64)[np.asarray(IDs, dtype=np.int64)]
+
+    def snapshot(self) -> tuple:
+        """Returns a copy of the order which can be passed to restore."""
+        return list(self.ids), self.next_id
+
+    def restore(self, state: tuple) -> None:
+        """Restores the order from a snapshot."""
+        ids, self.next_id = state
+        self.ids = list(ids)
+        self.reindex()
+
+class CountOrder(StableOrder, MutableSequence):
+    """The ordered list of the counts of an obstacle and the delay following each count.
+
+    Indexing the order by position, as with a list, reads and writes delays.
+    """
+
+    def __init__(self, delays: list[int]):
+        super().__init__()
+        self.delays = {}
+        self.extend(delays)
+
+    def __getitem__(self, i: int | slice) -> int | list[int]:
+        """Returns the delay following the count at index i."""
+        if isinstance(i, slice):
+            return [self.delays[ID] for ID in self.ids[i]]
+        return self.delays[self.ids[i]]
+
+    def __setitem__(self, i: int, delay: int) -> None:
+        """Sets the delay following the count at index i."""
+        self.set_delay(self.ids[i], delay)
+
+    def __delitem__(self, i: int) -> None:
+        """Deletes the count at index i."""
+        self.remove_at(i)
+
+    def set_delay(self, ID: int, delay: int) -> None:
+        """Sets the delay following the count with the input ID."""
+        self.record((self.set_delay, ID, self.delays[ID]),
+                    (self.set_delay, ID, delay),
+                    ("Delay", ID))
+        self.delays[ID] = delay
+        self.notify(ID, "Delay")
+
+    def insert(self, i: int, delay: int, ID: int=0) -> int:
+        """Inserts a new count followed by the input delay before index i and returns its ID.
+        Passing the ID of a deleted count restores that count instead.
+        """
+        ID = self.place(i, ID)
+        self.delays[ID] = delay
+        self.record((self.discard, ID), (self.insert, i, delay, ID))
+        return ID
+
+    def remove_at(self, i: int) -> int:
+        """Deletes the count at index i and returns its ID. As with a list, remove(delay) instead
+        deletes the first count followed by the input delay.
+        """
+        i = range(len(self.ids))[i]
+        ID = self.ids[i]
+        self.record((self.insert, i, self.delays[ID], ID), (self.discard, ID))
+        self.take(i)
+        del self.delays[ID]
+        return ID
+
+    def clear(self, restart: bool=False) -> None:
+        """Deletes all counts, restarting IDs from 1 if restart is true."""
+        super().clear(restart)
+        self.delays.clear()
+
+    def snapshot(self) -> tuple:
+        """Returns a copy of the order which can be passed to restore."""
+        return super().snapshot(), dict(self.delays)
+
+    def restore(self, state: tuple) -> None:
+        """Restores the order from a snapshot."""
+        order, delays = state
+        super().restore(order)
+        self.delays = dict(delays)
+
+class TimelineIndex:
+    """An index mapping each slot, a tuple of column values, to the sorted list of counts on which
+    rows with that slot occur. Counts are treated as a cyclic timeline.
+
+    If condition is given as a (column, value) pair, only rows satisfying it are indexed. If key is
+    given, the stored counts are IDs and are ordered by the positions key maps them to. Queries
+    always take and compare positions.
+    """
+
+    def __init__(self,
+                 slot_names: list[str],
+                 count_name: str,
+                 condition: tuple=None,
+                 key=None):
+        self.slot_names = slot_names
+        self.count_name = count_name
+        self.condition = condition
+        self.key = key
+        self.names = slot_names + [count_name]
+        self.timelines = {}
+
+    def entries(self, table: "EventTable", rows: np.ndarray) -> list[tuple]:
+        """Returns the (slot, count) pairs of the input rows of table."""
+        if self.condition:
+            name, value = self.condition
+            rows = rows[table.columns[name][rows] == value]
+        slots = zip(*(table.columns[name][rows].tolist() for name in self.slot_names))
+        return list(zip(slots, table.columns[self.count_name][rows].tolist()))
+
+    def add(self, table: "EventTable", rows: np.ndarray) -> None:
+        """Adds the input rows of table to the index."""
+        for slot, count in self.entries(table, rows):
+            insort(self.timelines.setdefault(slot, []), count, key=self.key)
+
+    def remove(self, table: "EventTable", rows: np.ndarray) -> None:
+        """Removes the input rows of table from the index."""
+        for slot, count in self.entries(table, rows):
+            counts = self.timelines[slot]
+            counts.pop(bisect_left(counts, self.position(count), key=self.key))
+            if not counts:
+                del self.timelines[slot]
+
+    def latest(self, slot: tuple, count: int) -> int:
+        """Returns the most recent count at or before the input count on which the slot occurs,
+        wrapping around to the last count. Returns 0 if the slot never occurs.
+        """
+        counts = self.timelines.get(slot)
+        if not counts:
+            return 0
+        i = bisect_right(counts, count, key=self.key)
+        return counts[i - 1] if i else counts[-1]
+
+    def following(self, slot: tuple, count: int) -> int:
+        """Returns the first count after the input count on which the slot occurs, wrapping
+        around to the first count. Returns 0 if no such count other than the input count exists.
+        """
+        counts = self.timelines.get(slot)
+        if not counts:
+            return 0
+        i = bisect_right(counts, count, key=self.key)
+        if i < len(counts):
+            return counts[i]
+        return counts[0] if self.position(counts[0]) < count else 0
+
+    def position(self, count: int) -> int:
+        """Returns the position of a stored count on the timeline."""
+        return self.key(count) if self.key else count
+
+    def slots(self) -> list[tuple]:
+        """Returns all indexed slots."""
+        return list(self.timelines)
+
+    def memory_usage(self) -> int:
+        """Returns the approximate number of bytes used by the index."""
+        return sys.getsizeof(self.timelines) + sum(sys.getsizeof(slot) + sys.getsizeof(counts)
+                                                   for slot, counts in self.timelines.items())
+
+    def clear(self) -> None:
+        """Removes all rows from the index."""
+        self.timelines.clear()
+
+class TallyIndex:
+    """An index counting the live rows holding each key, a tuple of integer column values, such as
+    the explosion types present on each count. Observers are called with a key and whether it's
+    present whenever its tally goes from zero to one or from one to zero.
+    """
+
+    def __init__(self, names: list[str]):
+        self.names = names
+        self.tallies = {}
+        self.observers = []
+
+    def add_observer(self, callback) -> None:
+        """Registers a callback which is called with a key and a boolean which is true if the key
+        was added and false if it was removed.
+        """
+        self.observers.append(callback)
+
+    def notify(self, key: tuple, present: bool) -> None:
+        """Calls the observers with a key which was added or removed."""
+        for callback in self.observers:
+            callback(key, present)
+
+    def groups(self, table: "EventTable", rows: np.ndarray) -> list[tuple]:
+        """Returns the keys of the input rows of table as (key, number of rows) pairs."""
+        if len(rows) == 1:
+            row = int(rows[0])
+            return [(tuple(table.columns[name].item(row) for name in self.names), 1)]
+        keys = np.stack([table.columns[name][rows].astype(np.int64) for name in self.names], axis=1)
+        keys, tallies = np.unique(keys, axis=0, return_counts=True)
+        return list(zip(map(tuple, keys.tolist()), tallies.tolist()))
+
+    def add(self, table: "EventTable", rows: np.ndarray) -> None:
+        """Adds the input rows of table to the index."""
+        if not len(rows):
+            return
+        for key, tally in self.groups(table, rows):
+            previous = self.tallies.get(key, 0)
+            self.tallies[key] = previous + tally
+            if not previous:
+                self.notify(key, True)
+
+    def remove(self, table: "EventTable", rows: np.ndarray) -> None:
+        """Removes the input rows of table from the index."""
+        if not len(rows):
+            return
+        for key, tally in self.groups(table, rows):
+            remaining = self.tallies[key] - tally
+            if remaining:
+                self.tallies[key] = remaining
+            else:
+                del self.tallies[key]
+                self.notify(key, False)
+
+    def rebuild(self, table: "EventTable", rows: np.ndarray) -> None:
+        """Recounts the index from the input rows of table, notifying observers only of keys whose
+        presence changed.
+        """
+        previous, self.tallies = self.tallies, {}
+        if len(rows):
+            self.tallies = dict(self.groups(table, rows))
+        for key in previous.keys() - self.tallies.keys():
+            self.notify(key, False)
+        for key in self.tallies.keys() - previous.keys():
+            self.notify(key, True)
+
+    def get(self, table: "EventTable", key: tuple) -> int:
+        """Returns the number of rows with the input key."""
+        return self.tallies.get(key, 0)
+
+    def has(self, table: "EventTable", key: tuple) -> bool:
+        """Checks if any row has the input key."""
+        return key in self.tallies
+
+    def keys(self) -> list[tuple]:
+        """Returns the keys held by at least one row."""
+        return list(self.tallies)
+
+    def memory_usage(self) -> int:
+        """Returns the approximate number of bytes used by the index."""
+        return sys.getsizeof(self.tallies) + sum(sys.getsizeof(key) for key in self.tallies)
+
+    def clear(self) -> None:
+        """Removes all rows from the index."""
+        tallies, self.tallies = self.tallies, {}
+        for key in tallies:
+            self.notify(key, False)
+
+class EventTable:
+    """A table of obstacle events stored as typed NumPy column arrays.
+
+    Rows are written into preallocated arrays whose capacity doubles whenever it runs out, so
+    appending a row is amortized O(1). Deleted rows are flagged in a live-row mask instead of being
+    removed, and the arrays are compacted once dead rows outnumber live ones.
+    
+    The schema fixes the dtype of every column. Integer values which don't fit their column are
+    rejected, and float values are rounded to the column's precision, including in lookup keys.
+    """
+    initial_capacity = 64
+
+    def __init__(self, schema: dict[str, type]):
+        self.schema = schema
+        self.names = list(schema)
+        self.columns = {name: np.zeros(self.initial_capacity, dtype=dtype)
+                        for name, dtype in schema.items()}
+        self.live = np.zeros(self.initial_capacity, dtype=bool)
+        
+        # The range of values which fit each integer column.
+        self.bounds = {name: (np.iinfo(dtype).min, np.iinfo(dtype).max)
+                       for name, dtype in schema.items() if np.dtype(dtype).kind in "iu"}
+
+        # size is the number of rows written so far, including deleted rows.
+        self.size = 0
+        self.num_live = 0
+        self.frame = None
+        self.indexes = {}
+        
+        # Codecs translate the stored values of a column to and from the values seen by legacy
+        # callers and save files, such as count IDs to count positions.
+        self.codecs = {}
+        
+        # While a transaction is open, the journal records how to undo deletes and column updates.
+        # Appended rows are undone by truncating the table back to the size it had at the start.
+        self.savepoint = None
+        self.journal = []
+
+        # If set, mutations are recorded in this src.history.History by the values of the rows they
+        # change, since row ids change on compaction.
+        self.history = None
+        
+        # Observers are called with the table and the ids of the rows just written or about to be
+        # deleted. Rolling back a transaction doesn't call them again, since the rows it restores
+        # were reported when they were mutated.
+        self.observers = []
+
+    def __len__(self) -> int:
+        """Returns the number of live rows."""
+        return self.num_live
+
+    def recording(self) -> bool:
+        """Checks if mutations are currently recorded in the history."""
+        return self.history is not None and self.history.recording
+
+    def capacity(self) -> int:
+        """Returns the number of rows which fit in the arrays without growing them."""
+        return len(self.live)
+
+    def modified(self) -> None:
+        """Invalidates data derived from the table after a mutation."""
+        self.frame = None
+
+    def begin(self) -> None:
+        """Opens a transaction which can be committed or rolled back."""
+        self.savepoint = self.size
+        self.journal.clear()
+
+    def commit(self) -> None:
+        """Closes the current transaction and compacts the table if it was deferred."""
+        self.savepoint = None
+        self.journal.clear()
+        if self.needs_compaction():
+            self.compact()
+
+    def rollback(self) -> None:
+        """Undoes all mutations made since the current transaction was opened."""
+        for entry in reversed(self.journal):
+            if entry[0] == "set":
+                _, rows, name, values = entry
+                self.columns[name][rows] = values
+            else:
+                self.live[entry[1]] = True
+        self.live[self.savepoint:self.size] = False
+        self.size = self.savepoint
+        self.num_live = int(self.live[:self.size].sum())
+        self.savepoint = None
+        self.journal.clear()
+        self.reindex()
+        self.modified()
+
+    def add_observer(self, callback) -> None:
+        """Registers a callback which is called with the table and an array of row ids whenever
+        those rows are added, deleted or modified.
+        """
+        self.observers.append(callback)
+        
+    def notify(self, rows: np.ndarray) -> None:
+        """Calls the observers with the ids of mutated rows."""
+        for callback in self.observers:
+            callback(self, rows)
+
+    def add_codec(self, name: str, decode, encode) -> None:
+        """Sets the functions translating arrays of stored values of a column to and from the
+        values exposed by to_frame, serialize and load.
+        """
+        self.codecs[name] = (decode, encode)
+
+    def decoded(self, name: str, rows: np.ndarray) -> np.ndarray:
+        """Returns the values of a column at the input rows as exposed to legacy callers."""
+        values = self.columns[name][rows]
+        if name in self.codecs:
+            values = self.codecs[name][0](values)
+        return values
+
+    def add_index(self, key: str, names: list[str]) -> None:
+        """Creates a hash index over the input columns, which is kept up to date on mutation."""
+        self.attach_index(key, HashIndex(names))
+        
+    def attach_index(self,
+                     key: str,
+                     index: HashIndex | GroupIndex | TimelineIndex | TallyIndex) -> None:
+        """Populates the input index from the live rows and keeps it up to date on mutation."""
+        index.add(self, self.rows())
+        self.indexes[key] = index
+
+    def lookup(self, key: str, values: tuple) -> np.ndarray:
+        """Returns the ids of the live rows whose indexed columns equal values."""
+        index = self.indexes[key]
+        return index.get(self, self.normalize(index.names, values))
+
+    def tally(self, key: str, values: tuple) -> int:
+        """Returns the number of live rows whose columns indexed by a tally index equal values."""
+        index = self.indexes[key]
+        return index.get(self, self.normalize(index.names, values))
+
+    def exists(self, key: str, values: tuple) -> bool:
+        """Checks if a live row whose indexed columns equal values exists."""
+        index = self.indexes[key]
+        return index.has(self, self.normalize(index.names, values))
+
+    def normalize(self, names: list[str], values: tuple) -> tuple:
+        """Rounds the values of float columns in a key to the precision they are stored with, so
+        that the key matches the keys of the stored rows.
+        """
+        return tuple(self.columns[name].dtype.type(value).item()
+                     if self.columns[name].dtype.kind == "f" else value
+                     for name, value in zip(names, values))
+
+    def check(self, name: str, values) -> None:
+        """Raises a ValueError if any of the input values don't fit in an integer column."""
+        if name not in self.bounds:
+            return
+        low, high = self.bounds[name]
+        values = np.asarray(values)
+        if values.size and (values.min() < low or values.max() > high):
+            raise ValueError("{} values must be between {} and {}".format(name, low, high))
+
+    def grow(self, minimum: int) -> None:
+        """Doubles the capacity of the arrays until at least minimum rows fit."""
+        capacity = max(self.capacity(), self.initial_capacity)
+        while capacity < minimum:
+            capacity *= 2
+        for name, array in self.columns.items():
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self.columns[name] = grown
+        live = np.zeros(capacity, dtype=bool)
+        live[:self.size] = self.live[:self.size]
+        self.live = live
+
+    def append(self, row: list) -> int:
+        """Appends a row whose values are ordered as in the schema and returns its row id."""
+        if self.size == self.capacity():
+            self.grow(self.size + 1)
+        i = self.size
+        for name, value in zip(self.names, row):
+            if name in self.bounds:
+                low, high = self.bounds[name]
+                if not low <= value <= high:
+                    raise ValueError("{} values must be between {} and {}".format(name, low, high))
+            self.columns[name][i] = value
+        self.live[i] = True
+        self.size += 1
+        self.num_live += 1
+        rows = np.array([i])
+        for index in self.indexes.values():
+            index.add(self, rows)
+        self.notify(rows)
+        if self.recording():
+            records = self.records(rows)
+            self.history.record((self.delete_records, records), (self.insert_records, records))
+        self.modified()
+        return i
+
+    def extend(self, columns: dict[str, np.ndarray]) -> np.ndarray:
+        """Appends a block of rows given as one array per column and returns their row ids."""
+        num_rows = len(next(iter(columns.values()))) if columns else 0
+        for name in self.names:
+            self.check(name, columns[name])
+        if self.size + num_rows > self.capacity():
+            self.grow(self.size + num_rows)
+        rows = np.arange(self.size, self.size + num_rows)
+        for name in self.names:
+            self.columns[name][rows] = columns[name]
+        self.live[rows] = True
+        self.size += num_rows
+        self.num_live += num_rows
+        for index in self.indexes.values():
+            index.add(self, rows)
+        if num_rows:
+            self.notify(rows)
+        if self.recording() and num_rows:
+            records = self.records(rows)
+            self.history.record((self.delete_records, records), (self.insert_records, records))
+        self.modified()
+        return rows
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns the written part of a column, including the values of deleted rows."""
+        return self.columns[name][:self.size]
+
+    def rows(self) -> np.ndarray:
+        """Returns the ids of all live rows in insertion order."""
+        return np.flatnonzero(self.live[:self.size])
+
+    def mask(self, values: dict) -> np.ndarray:
+        """Returns a boolean mask of the live rows whose columns equal the input values."""
+        mask = self.live[:self.size].copy()
+        for name, value in values.items():
+            mask &= self.column(name) == value
+        return mask
+
+    def match(self, values: dict) -> np.ndarray:
+        """Returns the ids of the live rows whose columns equal the input values."""
+        return np.flatnonzero(self.mask(values))
+
+    def contains(self, values: dict) -> bool:
+        """Checks if a live row whose columns equal the input values exists."""
+        return bool(self.mask(values).any())
+
+    def row(self, i: int) -> dict:
+        """Returns the values of row i keyed by column name."""
+        return {name: self.columns[name][i].item() for name in self.names}
+
+    def set(self, rows: np.ndarray, name: str, values) -> None:
+        """Sets the values of a column at the input rows."""
+        rows = np.asarray(rows, dtype=np.int64)
+        live_rows = rows[self.live[rows]]
+        indexes = [index for index in self.indexes.values() if name in index.names]
+        for index in indexes:
+            index.remove(self, live_rows)
+        self.check(name, values)
+        if self.savepoint is not None:
+            self.journal.append(("set", rows, name, self.columns[name][rows].copy()))
+        before = self.records(live_rows) if self.recording() else None
+        if len(live_rows):
+            self.notify(live_rows)
+        self.columns[name][rows] = values
+        for index in indexes:
+            index.add(self, live_rows)
+        if len(live_rows):
+            self.notify(live_rows)
+        if before is not None and len(live_rows):
+            after = self.records(live_rows)
+            self.history.record((self.replace_records, after, before),
+                                (self.replace_records, before, after))
+        self.modified()
+
+    def delete(self, rows: np.ndarray) -> None:
+        """Deletes the input rows."""
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        rows = rows[self.live[rows]]
+        if not len(rows):
+            return
+        for index in self.indexes.values():
+            index.remove(self, rows)
+        self.notify(rows)
+        if self.savepoint is not None:
+            self.journal.append(("delete", rows))
+        if self.recording():
+            records = self.records(rows)
+            self.history.record((self.insert_records, records), (self.delete_records, records))
+        self.live[rows] = False
+        self.num_live -= len(rows)
+        self.modified()
+        
+        # Row ids must stay stable during a transaction, so compaction waits for the commit.
+        if self.savepoint is None and self.needs_compaction():
+            self.compact()
+            
+    def needs_compaction(self) -> bool:
+        """Checks if deleted rows outnumber live rows in a table large enough to compact."""
+        return self.size > self.initial_capacity and self.num_live < self.size // 2
+
+    def compact(self) -> None:
+        """Moves the live rows to the front of the arrays, discarding deleted rows."""
+        rows = self.rows()
+        for name, array in self.columns.items():
+            array[:len(rows)] = array[rows]
+        self.live[:] = False
+        self.live[:len(rows)] = True
+        self.size = len(rows)
+        
+        # Row ids change when compacting, so the indexes are rebuilt.
+        self.reindex()
+        self.modified()
+
+    def reindex(self) -> None:
+        """Rebuilds the indexes from the live rows."""
+        rows = self.rows()
+        for index in self.indexes.values():
+            # Tally indexes are recounted in place, so their observers only see real changes.
+            if isinstance(index, TallyIndex):
+                index.rebuild(self, rows)
+            else:
+                index.clear()
+                index.add(self, rows)
+
+    def clear(self) -> None:
+        """Deletes all rows."""
+        if self.savepoint is not None or self.recording():
+            self.delete(self.rows())
+            return
+        if self.num_live:
+            self.notify(self.rows())
+        self.live[:] = False
+        self.size = 0
+        self.num_live = 0
+        for index in self.indexes.values():
+            index.clear()
+        self.modified()
+
+    def records(self, rows: np.ndarray) -> np.ndarray:
+        """Returns a copy of the input rows as a structured array with one field per column."""
+        dtype = [(name, self.columns[name].dtype) for name in self.names]
+        records = np.zeros(len(rows), dtype=dtype)
+        for name in self.names:
+            records[name] = self.columns[name][rows]
+        return records
+
+    def insert_records(self, records: np.ndarray) -> np.ndarray:
+        """Appends rows given as a structured array returned by records and returns their ids."""
+        return self.extend({name: records[name] for name in self.names})
+
+    def find_records(self, records: np.ndarray) -> np.ndarray:
+        """Returns the ids of live rows equal to the input records, which are given as a structured
+        array returned by records. Equal records are matched to different rows. The id of a record
+        without a matching row is -1.
+        """
+        # Records usually come from a few counts or locations, so if the table has a group index,
+        # only the rows of the groups the records belong to are searched.
+        group = next((index for index in self.indexes.values() if isinstance(index, GroupIndex)),
+                     None)
+        if group is None:
+            candidates = self.rows()
+        else:
+            values = np.unique(records[group.names[0]]).tolist()
+            candidates = np.concatenate([np.zeros(0, dtype=np.int64)]
+                                        + [group.get(self, (value,)) for value in values])
+        found = np.full(len(records), -1, dtype=np.int64)
+        if not len(candidates) or not len(records):
+            return found
+
+        # Both sides are sorted by hash, and the k-th of a run of equal records is matched to the
+        # k-th row with the same hash.
+        hashes = HashIndex.hash_columns([self.columns[name][candidates] for name in self.names])
+        order = np.argsort(hashes, kind="stable")
+        hashes = hashes[order]
+        targets = HashIndex.hash_columns([records[name] for name in self.names])
+        target_order = np.argsort(targets, kind="stable")
+        targets = targets[target_order]
+        rank = np.arange(len(targets)) - targets.searchsorted(targets)
+        positions = hashes.searchsorted(targets) + rank
+        matched = positions < len(hashes)
+        matched[matched] = hashes[positions[matched]] == targets[matched]
+        found[target_order[matched]] = candidates[order[positions[matched]]]
+
+        # Rows matched by a colliding hash are rejected by comparing their values.
+        rows = np.flatnonzero(found >= 0)
+        found[rows[self.records(found[rows]) != records[rows]]] = -1
+        return found
+
+    def delete_records(self, records: np.ndarray) -> None:
+        """Deletes live rows equal to the input records, one row per record."""
+        rows = self.find_records(records)
+        self.delete(rows[rows >= 0])
+
+    def replace_records(self, old: np.ndarray, new: np.ndarray) -> None:
+        """Overwrites the live rows equal to the records in old with the records in new."""
+        rows = self.find_records(old)
+        found = rows >= 0
+        for name in self.names:
+            changed = found & (old[name] != new[name])
+            if changed.any():
+                self.set(rows[changed], name, new[name][changed])
+
+    def memory_usage(self) -> dict[str, int]:
+        """Returns the number of bytes used by the column arrays, including unused capacity, and
+        the approximate number of bytes used by the indexes and the cached data frame.
+        """
+        columns = sum(array.nbytes for array in self.columns.values()) + self.live.nbytes
+        indexes = sum(index.memory_usage() for index in self.indexes.values())
+        frame = int(self.frame.memory_usage(deep=True).sum()) if self.frame is not None else 0
+        return {"Columns": columns, "Indexes": indexes, "Frame": frame}
+
+    def to_frame(self) -> "pandas.DataFrame":
+        """Returns the live rows as a pandas data frame."""
+        # The frame is cached until the next mutation, since legacy callers read it repeatedly.
+        if self.frame is None:
+            self.frame = self.frame_of(self.rows())
+        return self.frame
+
+    def frame_of(self, rows: np.ndarray) -> "pandas.DataFrame":
+        """Returns the input rows as a pandas data frame, indexed from 0."""
+        # pandas is only needed by callers which ask for data frames, so it is imported here.
+        import pandas as pd
+        return pd.DataFrame({name: self.decoded(name, rows) for name in self.names},
+                            columns=self.names)
+
+    def serialize(self) -> dict:
+        """Serializes the live rows in the same layout as DataFrame.to_dict(orient='index')."""
+        rows = self.rows()
+        values = {name: self.decoded(name, rows).tolist() for name in self.names}
+        return {i: {name: values[name][i] for name in self.names} for i in range(len(rows))}
+
+    def load(self, data: dict) -> None:
+        """Replaces the table contents with serialized rows."""
+        self.clear()
+        # Values are checked against the schema by extend, after translating them with the codecs.
+        records = list(data.values())
+        columns = {name: np.array([record[name] for record in records]) for name in self.names}
+        for name, (decode, encode) in self.codecs.items():
+            columns[name] = encode(columns[name])
+        self.extend(columns)
@@ -1,4 +1,5 @@
 import os
+import numpy as np
 from PyQt6.QtWidgets import (QWidget,
                              QGraphicsItem,
                              QGraphicsItemGroup,
@@ -6,14 +7,17 @@ from PyQt6.QtWidgets import (QWidget,
                              QGraphicsPixmapItem,
                              QStyleOptionGraphicsItem)
 from PyQt6.QtGui import (QColor,
+                         QImage,
                          QPixmap,
                          QPainter,
                          QPen)
-from PyQt6.QtCore import (QPointF,
+from PyQt6.QtCore import (Qt,
+                          QPointF,
                           QRectF,
                           QVariant)
 from src import sc_data
 from src import read_write
+from src.event_store import StableOrder
 
 class Grid(QGraphicsItem):
     """A graphics item consisting of grid lines."""
@@ -110,6 +114,34 @@ class BrushHighlight(QGraphicsItemGroup):
                 self.addToGroup(rect)
                 rect.setPos(32*j*self.width, 32*i*self.height)
 
+class Heatmap(QGraphicsItem):
+    """A graphics item drawing one colored square per cell of a grid over the scene."""
+
+    def __init__(self, colors: np.ndarray, x: float, y: float, cell_size: float):
+        super().__init__()
+        
+        # The colors are 32-bit ARGB values, one per cell. They are converted to an image once,
+        # which is scaled up to the size of the cells when drawn.
+        rows, columns = colors.shape
+        colors = np.ascontiguousarray(colors, dtype=np.uint32)
+        self.image = QImage(colors.tobytes(), columns, rows, 4*columns,
+                            QImage.Format.Format_ARGB32).copy()
+        self.rect = QRectF(0, 0, columns*cell_size, rows*cell_size)
+        self.setPos(x, y)
+        self.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
+        
+    def boundingRect(self) -> QRectF:
+        """Returns the bounding rectangle of the grid."""
+        return self.rect
+        
+    def paint(self,
+              painter: QPainter,
+              option: QStyleOptionGraphicsItem,
+              widget: QWidget=None) -> None:
+        """Draws the cached image with sharp cell edges."""
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, False)
+        painter.drawImage(self.rect, self.image)
+
 class TerrainTile(QGraphicsPixmapItem):
     """A graphics item depicting a terrain tile image and storing the tile index."""
 
@@ -143,16 +175,33 @@ class Location(QGraphicsItem):
         """Sets the location numbering convention to index."""
         Location.convention = index
 
-    def __init__(self, width: float, height: float, num: int, ID: int):
+    def __init__(self, width: float, height: float, handle: int, order: StableOrder):
         super().__init__()
 
         self.width, self.height = width, height
-        self.num = num
-        self.ID = ID + Location.ID_offset
-        self.name = self.format_name(0)
+        
+        # The number of the location is its position in the location order shared with the
+        # obstacle, so deleting a location renumbers the later locations without touching them.
+        self.handle = handle
+        self.order = order
         self.color = QColor()
         self.color.setRgba(Location.interior_color_highlight.rgba())
         
+    @property
+    def num(self) -> int:
+        """Returns the number of the location, or 0 if it has been deleted."""
+        return self.order.position(self.handle)
+        
+    @property
+    def ID(self) -> int:
+        """Returns the ID of the location."""
+        return self.num + Location.ID_offset
+        
+    @property
+    def name(self) -> str:
+        """Returns the name of the location."""
+        return self.format_name(len(str(len(self.order))) - len(str(self.num)))
+
     def boundingRect(self):
         """Returns the bounding rectangle of the location."""
         return QRectF(0, 0, 32*self.width, 32*self.height)
@@ -232,11 +281,8 @@ class Location(QGraphicsItem):
             
         return prefix + suffix
     
-    def update_data(self, num_locs: int) -> None:
-        """Updates the location's name and ID."""
-        num_zeros = len(str(num_locs)) - len(str(self.num))
-        self.name = self.format_name(num_zeros)
-        self.ID = self.num + self.ID_offset
+    def update_data(self) -> None:
+        """Redraws the location after its name or ID changes."""
         self.update()
         
     def set_color(self, color: QColor) -> None:
@@ -268,7 +314,7 @@ class EventImage(QGraphicsPixmapItem):
 
     def __init__(self,
                  event_type: str,
-                 count: int,
+                 count_id: int,
                  ID: int,
                  pixmap:
                  QPixmap,
@@ -278,7 +324,9 @@ class EventImage(QGraphicsPixmapItem):
         
         self.event_type = event_type
         self.ID = ID
-        self.count = count
+        
+        # Images refer to counts by stable ID, so they are unaffected by count insertion/deletion.
+        self.count_id = count_id
         self.width, self.height = pixmap.width(), pixmap.height()
         self.teleport_cell = teleport_cell
         self.teleport_player = teleport_player
@@ -0,0 +1,176 @@
+from collections import deque
+from contextlib import contextmanager
+
+class Edit:
+    """A named group of recorded operations which is undone and redone as a single step.
+
+    Each operation is recorded as a pair of (function, *args) tuples, the first undoing and the
+    second redoing it, so an edit takes space proportional to the data it changed. Operations
+    recorded with the same key are merged, keeping the first undo and the last redo, so that
+    repeatedly changing one terrain tile or delay during an edit is stored once.
+    """
+
+    def __init__(self, name: str, key: tuple=None):
+        self.name = name
+        self.key = key
+        self.operations = []
+        self.keys = {}
+
+    def __len__(self) -> int:
+        """Returns the number of recorded operations."""
+        return len(self.operations)
+
+    def add(self, undo: tuple, redo: tuple, key: tuple=None) -> None:
+        """Records an operation given the functions and arguments which undo and redo it."""
+        if key is not None:
+            if key in self.keys:
+                self.operations[self.keys[key]][1] = redo
+                return
+            self.keys[key] = len(self.operations)
+        self.operations.append([undo, redo, key])
+
+    def merge(self, other: "Edit") -> None:
+        """Appends the operations of a later edit to this edit."""
+        for undo, redo, key in other.operations:
+            self.add(undo, redo, key)
+
+    def truncate(self, size: int) -> None:
+        """Discards the operations recorded after the first size operations."""
+        del self.operations[size:]
+        self.keys = {key: i for key, i in self.keys.items() if i < size}
+
+    def undo(self) -> None:
+        """Undoes the operations in reverse order."""
+        for (function, *args), redo, key in reversed(self.operations):
+            function(*args)
+
+    def redo(self) -> None:
+        """Redoes the operations in order."""
+        for undo, (function, *args), key in self.operations:
+            function(*args)
+
+class History:
+    """An undo/redo history of edits.
+
+    An edit is opened with begin and closed with end, or with the edit context manager. Edits nest,
+    so an entire mouse stroke can be recorded as one edit while the functions it calls open edits
+    of their own. While an edit is open, mutations record their inverses with record. Mutations made
+    outside of an edit, such as loading a file, are not recorded.
+
+    Only the most recent limit edits are kept. Consecutive edits with the same key are merged, so
+    scrolling through values of a spin box is undone in one step.
+    """
+
+    def __init__(self, limit: int=100):
+        self.undo_stack = deque(maxlen=limit)
+        self.redo_stack = []
+        self.current = None
+        self.depth = 0
+        self.suspended = False
+
+        # Whether the next edit may be merged into the edit on top of the undo stack, which is not
+        # the case after an undo or redo.
+        self.mergeable = False
+
+    @property
+    def recording(self) -> bool:
+        """Checks if mutations are currently being recorded."""
+        return self.current is not None and not self.suspended
+
+    def begin(self, name: str, key: tuple=None) -> None:
+        """Opens an edit, or nests an edit inside the open edit."""
+        self.depth += 1
+        if self.depth == 1:
+            self.current = Edit(name, key)
+
+    def end(self) -> None:
+        """Closes an edit. Once the outermost edit is closed, it's pushed onto the undo stack."""
+        self.depth -= 1
+        if self.depth:
+            return
+        edit, self.current = self.current, None
+        if not len(edit):
+            return
+        self.redo_stack.clear()
+        top = self.undo_stack[-1] if self.undo_stack else None
+        if self.mergeable and edit.key is not None and top is not None and top.key == edit.key:
+            top.merge(edit)
+            return
+        self.undo_stack.append(edit)
+        self.mergeable = True
+
+    @contextmanager
+    def edit(self, name: str, key: tuple=None):
+        """Records the mutations made inside the block as one edit, used as "with history.edit():".
+        """
+        self.begin(name, key)
+        try:
+            yield self
+        finally:
+            self.end()
+
+    @contextmanager
+    def paused(self):
+        """Suspends recording inside the block, used for mutations which are recorded separately."""
+        suspended = self.suspended
+        self.suspended = True
+        try:
+            yield self
+        finally:
+            self.suspended = suspended
+
+    def record(self, undo: tuple, redo: tuple, key: tuple=None) -> None:
+        """Records an operation in the open edit, given as (function, *args) tuples which undo and
+        redo it. Operations with the same key are merged. Does nothing if no edit is open.
+        """
+        if self.current is not None and not self.suspended:
+            self.current.add(undo, redo, key)
+
+    def mark(self) -> int:
+        """Returns the number of operations recorded in the open edit, to be passed to discard."""
+        return len(self.current) if self.current is not None else 0
+
+    def discard(self, mark: int) -> None:
+        """Discards the operations recorded in the open edit since mark was taken."""
+        if self.current is not None:
+            self.current.truncate(mark)
+
+    def undo_name(self) -> str:
+        """Returns the name of the edit to undo, or an empty string if there is none."""
+        return self.undo_stack[-1].name if self.undo_stack else ""
+
+    def redo_name(self) -> str:
+        """Returns the name of the edit to redo, or an empty string if there is none."""
+        return self.redo_stack[-1].name if self.redo_stack else ""
+
+    def undo(self) -> bool:
+        """Undoes the most recent edit. Returns false if there is nothing to undo or an edit is
+        open.
+        """
+        if self.depth or not self.undo_stack:
+            return False
+        edit = self.undo_stack.pop()
+        with self.paused():
+            edit.undo()
+        self.redo_stack.append(edit)
+        self.mergeable = False
+        return True
+
+    def redo(self) -> bool:
+        """Redoes the most recently undone edit. Returns false if there is nothing to redo or an
+        edit is open.
+        """
+        if self.depth or not self.redo_stack:
+            return False
+        edit = self.redo_stack.pop()
+        with self.paused():
+            edit.redo()
+        self.undo_stack.append(edit)
+        self.mergeable = False
+        return True
+
+    def clear(self) -> None:
+        """Forgets all edits."""
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.mergeable = False
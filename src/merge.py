@@ -0,0 +1,562 @@
+"""Compares and merges saved obstacles.
+
+Designers working on parts of one obstacle in parallel each save their own file. Merging takes the
+save they started from and the saves of two designers and writes a save holding the edits of both.
+Run from the repository root with:
+    python -m src.merge Save/Obs/base.json Save/Obs/ours.json Save/Obs/theirs.json -o merged.json
+or list the differences between two saves with:
+    python -m src.merge Save/Obs/base.json Save/Obs/edited.json
+
+Inserting or deleting counts and locations renumbers the ones after them, so counts and locations
+are matched between saves by content and given stable keys, and events refer to locations by key.
+The events of each count are hashed as rows, so a count is compared with its match in one pass over
+its rows.
+"""
+import argparse
+from bisect import bisect_left
+from collections import Counter
+import json
+from operator import itemgetter
+import sys
+from src.validate import schemas
+
+# The kinds of rows of a count. Teleport table rows are the teleports shown in the editor, which
+# are what the editor places when it loads a save.
+kinds = list(schemas) + ["Teleport tables"]
+
+# Rows of these kinds placed in the same slot, given by these columns, replace each other, so both
+# designers placing different rows in a slot is a conflict.
+slot_columns = {"Walls": ["Location", "x", "y"], "Audio": ["Explosion"]}
+
+# The parts of a save which are merged as a whole, and the columns of events which are locations.
+structured = ["Terrain", "Locations", "Location layers", "Teleport tables", "Obstacle"]
+location_names = ["Location", "Location from", "Location to"]
+
+# Parts held by more items of a gap than this, such as an explosion placed on every count, say
+# little about which items match and are skipped when pairing the items of a gap.
+popular = 64
+
+def load_save(path: str) -> dict:
+    """Returns the data of a save file."""
+    with open(path, 'r') as file:
+        return json.load(file)
+
+def convert_delay(delay: int, use_frames: bool, to_frames: bool) -> int:
+    """Converts a delay between frames and waits, as the delay box does."""
+    if use_frames == to_frames:
+        return delay
+    return 1 + delay // 42 if to_frames else 42*(delay - 1)
+
+def longest_increasing(pairs: list[tuple]) -> list[tuple]:
+    """Returns a longest subsequence of pairs sorted by first item whose second items increase."""
+    tails, tail_pairs, previous = [], [], []
+    for pair in pairs:
+        k = bisect_left(tails, pair[1])
+        if k == len(tails):
+            tails.append(pair[1])
+            tail_pairs.append(len(previous))
+        else:
+            tails[k] = pair[1]
+            tail_pairs[k] = len(previous)
+        previous.append((pair, tail_pairs[k - 1] if k else -1))
+    result = []
+    k = tail_pairs[-1] if tail_pairs else -1
+    while k >= 0:
+        pair, k = previous[k]
+        result.append(pair)
+    return result[::-1]
+
+def pair_gap(alo: int, ahi: int, blo: int, bhi: int, parts: tuple[list, list]) -> list[tuple]:
+    """Returns pairs of items of a gap, in increasing order of both, which share parts.
+
+    parts holds the collections of hashable parts of the items of both sequences. Each item of the
+    first is paired with the item of the second sharing the most parts with it, the one nearest to
+    the same relative position on a tie, and the longest increasing run of these pairs is kept.
+    Items between kept pairs are paired by position. Parts held by more than popular items of the
+    gap are skipped, so a gap with r parts takes O(r*popular + m log m) time rather than O(m*n).
+    """
+    base_parts, side_parts = parts
+    holders = {}
+    for j in range(blo, bhi):
+        for part in side_parts[j]:
+            holders.setdefault(part, []).append(j)
+    best = []
+    for i in range(alo, ahi):
+        shared = Counter()
+        for part in base_parts[i]:
+            items = holders.get(part, ())
+            if len(items) <= popular:
+                shared.update(items)
+        if shared:
+            position = blo + (i - alo)*(bhi - blo) / (ahi - alo)
+            best.append((i, max(shared, key=lambda j: (shared[j], -abs(j - position)))))
+    pairs = []
+    for i, j in longest_increasing(best) + [(ahi, bhi)]:
+        pairs.extend((alo + k, blo + k) for k in range(min(i - alo, j - blo)))
+        if i < ahi:
+            pairs.append((i, j))
+        alo, blo = i + 1, j + 1
+    return pairs
+
+def align(base: list, side: list, parts: tuple[list, list]=None) -> list[tuple]:
+    """Returns the pairs (i, j) of matched items of two sequences of signatures, in increasing
+    order of both.
+
+    Items with equal signatures at the ends of a gap are matched first, then the longest increasing
+    run of signatures which occur once on each side splits the gap, as in patience diff. Items of a
+    gap without such signatures are edited items, insertions or deletions. They are matched by the
+    parts they share, as in pair_gap, if the parts of the items are given, and by position
+    otherwise.
+    """
+    pairs = []
+    gaps = [(0, len(base), 0, len(side))]
+    while gaps:
+        alo, ahi, blo, bhi = gaps.pop()
+        while alo < ahi and blo < bhi and base[alo] == side[blo]:
+            pairs.append((alo, blo))
+            alo, blo = alo + 1, blo + 1
+        while alo < ahi and blo < bhi and base[ahi - 1] == side[bhi - 1]:
+            ahi, bhi = ahi - 1, bhi - 1
+            pairs.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+
+        base_counts = Counter(base[alo:ahi])
+        side_counts = Counter(side[blo:bhi])
+        unique = {side[j]: j for j in range(blo, bhi) if side_counts[side[j]] == 1}
+        anchors = longest_increasing([(i, unique[base[i]]) for i in range(alo, ahi)
+                                      if base_counts[base[i]] == 1 and base[i] in unique])
+        if not anchors and parts is not None:
+            pairs.extend(pair_gap(alo, ahi, blo, bhi, parts))
+            continue
+        if not anchors:
+            pairs.extend((alo + k, blo + k) for k in range(min(ahi - alo, bhi - blo)))
+            continue
+        for i, j in anchors:
+            pairs.append((i, j))
+            gaps.append((alo, i, blo, j))
+            alo, blo = i + 1, j + 1
+        gaps.append((alo, ahi, blo, bhi))
+    pairs.sort()
+    return pairs
+
+def stable_keys(base: list, side: list, parts: tuple[list, list]=None) -> list[tuple]:
+    """Returns a key for each item of a side from the signatures of the items of both sides.
+
+    Items matched to the base item at index i have the key ("Base", i). Other items are new, and
+    the kth new item with a signature has the key ("New", signature, k), so an item added by both
+    designers has the same key on both sides.
+    """
+    keys = [None]*len(side)
+    for i, j in align(base, side, parts):
+        keys[j] = ("Base", i)
+    seen = Counter()
+    for j, signature in enumerate(side):
+        if keys[j] is None:
+            keys[j] = ("New", signature, seen[signature])
+            seen[signature] += 1
+    return keys
+
+def location_signatures(data: dict) -> list[tuple]:
+    """Returns the geometry of each location of a save."""
+    return [(loc["x"], loc["y"], loc["width"], loc["height"]) for loc in data["Locations"]]
+
+def count_rows(data: dict, location_keys: list, use_frames: bool) -> tuple[list, list]:
+    """Returns the delay and rows of each count of a save, with delays in frames if use_frames is
+    true and waits otherwise, and the (count index, kind, row) triples of its events in save order.
+
+    The rows of a count are a Counter of (kind, row) pairs, where a row is a tuple of the event's
+    values other than its count, and locations are given by key.
+    """
+    obstacle = data["Obstacle"]
+    rows = [[] for delay in obstacle["Delays"]]
+    events = []
+    for kind, schema in schemas.items():
+        columns = [name for name in schema if name != "Count"]
+        values = itemgetter(*columns)
+        locations = [k for k, name in enumerate(columns) if name in location_names]
+        for event in obstacle[kind].values():
+            row = values(event)
+            if locations:
+                row = list(row)
+                for k in locations:
+                    row[k] = location_keys[row[k] - 1]
+                row = tuple(row)
+            rows[event["Count"] - 1].append((kind, row))
+            events.append((event["Count"] - 1, kind, row))
+    for count, table in data.get("Teleport tables", {}).items():
+        for row in table:
+            # Rows without teleports are blank rows of the table.
+            if not any(row):
+                continue
+            row = tuple(end and (end["player"], end["img"], location_keys[end["loc"] - 1])
+                        for end in row)
+            rows[int(count)].append(("Teleport tables", row))
+    counts = [{"Delay": convert_delay(delay, obstacle["Use frames"], use_frames),
+               "Rows": Counter(count_rows)}
+              for delay, count_rows in zip(obstacle["Delays"], rows)]
+    return counts, events
+
+def count_signatures(counts: list[dict]) -> list[int]:
+    """Returns a hash of the delay and rows of each count, which doesn't depend on row order."""
+    return [hash((count["Delay"], frozenset(count["Rows"].items()))) for count in counts]
+
+def count_parts(counts: list[dict]) -> list[list]:
+    """Returns the rows of each count followed by a hash of all of them, which matches counts whose
+    rows are the same even if each row is placed on many counts.
+    """
+    return [list(count["Rows"]) + [hash(frozenset(count["Rows"].items()))] for count in counts]
+
+def read_sides(saves: list[dict], use_frames: bool) -> list[dict]:
+    """Matches the counts and locations of saves to those of the first save, which is the base.
+
+    Returns for each save its "Locations" and "Counts", which map stable keys to location data and
+    to count rows, in the order of the save, and its "Events" as (count key, kind, row) triples in
+    save order.
+    """
+    base_signatures = location_signatures(saves[0])
+    location_keys = [stable_keys(base_signatures, location_signatures(data)) for data in saves]
+    counts = [count_rows(data, keys, use_frames) for data, keys in zip(saves, location_keys)]
+    base_rows = counts[0][0]
+    base_counts = count_signatures(base_rows)
+    base_parts = count_parts(base_rows)
+    sides = []
+    for data, keys, (rows, events) in zip(saves, location_keys, counts):
+        # Edited counts are matched by the rows they share, and the remaining counts of a gap by
+        # position, since counts are more often edited than replaced.
+        parts = (base_parts, count_parts(rows))
+        count_keys = stable_keys(base_counts, count_signatures(rows), parts)
+        sides.append({"Locations": dict(zip(keys, data["Locations"])),
+                      "Counts": dict(zip(count_keys, rows)),
+                      "Events": [(count_keys[i], kind, row) for i, kind, row in events]})
+    return sides
+
+def slot(kind: str, row: tuple) -> tuple:
+    """Returns the slot of a row of a kind with slots."""
+    columns = [name for name in schemas[kind] if name != "Count"]
+    return tuple(row[columns.index(name)] for name in slot_columns[kind])
+
+def merge_rows(base: Counter, ours: Counter, theirs: Counter, prefer_ours: bool) -> tuple:
+    """Merges the rows of a count edited on both sides.
+
+    Returns the merged rows and the (kind, slot) pairs in which the sides placed different rows,
+    where the rows of the preferred side are kept.
+    """
+    # Most counts are only edited on one side, if at all.
+    if ours == base:
+        return theirs, []
+    if theirs == base:
+        return ours, []
+    merged = Counter()
+    for row in (base | ours | theirs):
+        number = ours[row] + theirs[row] - base[row]
+        if number > 0:
+            merged[row] = number
+
+    # Slots in which both sides added different rows conflict.
+    added = [ours - base, theirs - base]
+    slots = [{}, {}]
+    for side, rows in zip(slots, added):
+        for (kind, row) in rows:
+            if kind in slot_columns:
+                side.setdefault((kind, slot(kind, row)), set()).add(row)
+    conflicts = [key for key in slots[0] if key in slots[1] and slots[0][key] != slots[1][key]]
+    dropped = added[1] if prefer_ours else added[0]
+    for (kind, row), number in dropped.items():
+        if kind in slot_columns and (kind, slot(kind, row)) in conflicts:
+            merged[(kind, row)] -= number
+    return +merged, conflicts
+
+def merged_order(base: list, ours: list, theirs: list, keep) -> list:
+    """Returns the keys of the merged sequence of base keys and side keys.
+
+    Keys inserted by a side follow the base key before them on that side. Base keys are kept if
+    keep returns true for them.
+    """
+    base_keys = set(base)
+    inserted = [{}, {}]
+    for after, side in zip(inserted, [ours, theirs]):
+        anchor = None
+        for key in side:
+            if key in base_keys:
+                anchor = key
+            else:
+                after.setdefault(anchor, []).append(key)
+    order, seen = [], set()
+    for anchor in [None] + base:
+        if anchor is not None and keep(anchor):
+            order.append(anchor)
+        for key in inserted[0].get(anchor, []) + inserted[1].get(anchor, []):
+            if key not in seen:
+                seen.add(key)
+                order.append(key)
+    return order
+
+def conflict(description: str, count=None, location=None, resolution: str="") -> dict:
+    """Returns a conflict, with its count and location given by key until they are numbered."""
+    return {"Conflict": description, "Count": count, "Location": location, "Resolution": resolution}
+
+def pick(base, ours, theirs, prefer_ours: bool) -> tuple:
+    """Merges a value edited on two sides. Returns the merged value and whether it conflicts."""
+    if ours == theirs or theirs == base:
+        return ours, False
+    if ours == base:
+        return theirs, False
+    return (ours if prefer_ours else theirs), True
+
+def merge(base: dict, ours: dict, theirs: dict, prefer: str="ours") -> tuple[dict, list[dict]]:
+    """Merges the edits of two saves of an obstacle made from a base save.
+
+    Returns the merged save and its conflicts. Where both sides made different edits the preferred
+    side's edit is kept. Each conflict holds a description of the "Conflict", the "Count" and
+    "Location" in the merged save at which it occurs, where 0 means none, and the "Resolution".
+    """
+    prefer_ours = prefer == "ours"
+    conflicts = []
+
+    # Delays are compared in the merged timing type.
+    use_frames, timing_conflict = pick(base["Obstacle"]["Use frames"],
+                                       ours["Obstacle"]["Use frames"],
+                                       theirs["Obstacle"]["Use frames"],
+                                       prefer_ours)
+    if timing_conflict:
+        conflicts.append(conflict("Timing type", resolution=prefer))
+    sides = read_sides([base, ours, theirs], use_frames)
+    base_counts, our_counts, their_counts = (side["Counts"] for side in sides)
+
+    # A count deleted on one side is kept only if the other side edited it and is preferred.
+    def keep_count(key: tuple) -> bool:
+        if key in our_counts and key in their_counts:
+            return True
+        kept = our_counts.get(key) or their_counts.get(key)
+        if kept is None or kept == base_counts[key]:
+            return False
+        conflicts.append(conflict("Count deleted and edited", count=key, resolution=prefer))
+        return (key in our_counts) == prefer_ours
+
+    count_order = merged_order(list(base_counts), list(our_counts), list(their_counts), keep_count)
+    counts = {}
+    for key in count_order:
+        if key in our_counts and key in their_counts and key in base_counts:
+            delay, delay_conflict = pick(base_counts[key]["Delay"],
+                                         our_counts[key]["Delay"],
+                                         their_counts[key]["Delay"],
+                                         prefer_ours)
+            if delay_conflict:
+                conflicts.append(conflict("Delay", count=key, resolution=prefer))
+            rows, slots = merge_rows(base_counts[key]["Rows"],
+                                     our_counts[key]["Rows"],
+                                     their_counts[key]["Rows"],
+                                     prefer_ours)
+            for kind, (location, *_) in slots:
+                description = "Wall" if kind == "Walls" else "Audio"
+                location = location if kind == "Walls" else None
+                conflicts.append(conflict(description, key, location, prefer))
+            counts[key] = {"Delay": delay, "Rows": rows}
+        else:
+            options = [our_counts.get(key), their_counts.get(key)]
+            counts[key] = options[0 if prefer_ours else 1] or options[0] or options[1]
+
+    # Locations are kept while merged rows use them, even if a side deleted them.
+    base_locations, our_locations, their_locations = (side["Locations"] for side in sides)
+    used = set()
+    for count in counts.values():
+        for kind, row in count["Rows"]:
+            for value in (row if kind != "Teleport tables" else [end and end[2] for end in row]):
+                if isinstance(value, tuple):
+                    used.add(value)
+    def keep_location(key: tuple) -> bool:
+        if key in our_locations and key in their_locations:
+            return True
+        if key in used:
+            conflicts.append(conflict("Location deleted but used", location=key, resolution="kept"))
+            return True
+        return False
+
+    location_order = merged_order(list(base_locations),
+                                  list(our_locations),
+                                  list(their_locations),
+                                  keep_location)
+    locations = []
+    for key in location_order:
+        if key in base_locations:
+            geometry, moved = pick(base_locations[key],
+                                   our_locations.get(key, base_locations[key]),
+                                   their_locations.get(key, base_locations[key]),
+                                   prefer_ours)
+            if moved:
+                conflicts.append(conflict("Location geometry", location=key, resolution=prefer))
+        else:
+            options = [our_locations.get(key), their_locations.get(key)]
+            geometry = options[0 if prefer_ours else 1] or options[0] or options[1]
+        locations.append(geometry)
+
+    # The merged save is written in the layout of MainWindow.save_to_path, with keys numbered.
+    count_positions = {key: position for position, key in enumerate(count_order, 1)}
+    location_positions = {key: position for position, key in enumerate(location_order, 1)}
+    merged = {}
+    for key in list(ours) + [key for key in theirs if key not in ours]:
+        if key in structured:
+            continue
+        value, setting_conflict = pick(base.get(key), ours.get(key), theirs.get(key), prefer_ours)
+        if setting_conflict:
+            conflicts.append(conflict("Setting {}".format(key), resolution=prefer))
+        merged[key] = value
+    merged["Terrain"] = merge_terrain(base, ours, theirs, prefer_ours, conflicts)
+    merged["Locations"] = locations
+    layers = [(ours, list(our_locations)), (theirs, list(their_locations))]
+    if not prefer_ours:
+        layers.reverse()
+    merged["Location layers"] = merge_layers(*layers, location_positions)
+    merged["Teleport tables"] = {}
+    obstacle = {"Use frames": use_frames, "Delays": []}
+    for position, key in enumerate(count_order, 1):
+        obstacle["Delays"].append(counts[key]["Delay"])
+        merged["Teleport tables"][str(position - 1)] = [
+            [end and {"player": end[0], "img": end[1], "loc": location_positions[end[2]]}
+             for end in row]
+            for (kind, row) in counts[key]["Rows"].elements() if kind == "Teleport tables"]
+
+    # The editor replays events in save order, which decides for instance which placement a wall
+    # removal removes, so the events of the base are written in their order followed by the
+    # events added by each side.
+    remaining = {key: Counter(count["Rows"]) for key, count in counts.items()}
+    obstacle.update({kind: {} for kind in schemas})
+    for side in sides:
+        for key, kind, row in side["Events"]:
+            rows = remaining.get(key)
+            if rows is None or not rows[(kind, row)]:
+                continue
+            rows[(kind, row)] -= 1
+            names = [name for name in schemas[kind] if name != "Count"]
+            event = {"Count": count_positions[key]}
+            event.update((name, location_positions[value] if name in location_names else value)
+                         for name, value in zip(names, row))
+            obstacle[kind][str(len(obstacle[kind]))] = event
+    merged["Obstacle"] = obstacle
+
+    for found in conflicts:
+        found["Count"] = count_positions.get(found["Count"], 0)
+        found["Location"] = location_positions.get(found["Location"], 0)
+    return merged, conflicts
+
+def merge_terrain(base: dict, ours: dict, theirs: dict, prefer_ours: bool, conflicts: list) -> dict:
+    """Merges the terrain of two saves cell by cell."""
+    cells = []
+    for data in [base, ours, theirs]:
+        cells.append({(i, j): tile for i, column in data.get("Terrain", {}).items()
+                      for j, tile in column.items()})
+    terrain = {}
+    for cell in cells[0].keys() | cells[1].keys() | cells[2].keys():
+        tile, tile_conflict = pick(*(side.get(cell) for side in cells), prefer_ours)
+        if tile_conflict:
+            conflicts.append(conflict("Terrain {}, {}".format(*cell),
+                                      resolution="ours" if prefer_ours else "theirs"))
+        if tile is not None:
+            terrain.setdefault(cell[0], {})[cell[1]] = tile
+    return terrain
+
+def merge_layers(preferred: tuple, other: tuple, positions: dict) -> dict:
+    """Returns the location layers of the preferred save with merged location numbers. Merged
+    locations in no layer are added to the layer holding them in the other save, or to the first.
+
+    Each save is given with the keys of its locations, and positions maps keys to merged numbers.
+    """
+    (data, keys), (other_data, other_keys) = preferred, other
+    layers = {}
+    placed = set()
+    for index, layer in data.get("Location layers", {}).items():
+        locs = [positions[keys[num - 1]] for num in layer["locs"] if keys[num - 1] in positions]
+        layers[index] = dict(layer, locs=locs)
+        placed.update(locs)
+    for index, layer in other_data.get("Location layers", {}).items():
+        target = layers.get(index) or next(iter(layers.values()), None)
+        if target is None:
+            target = layers[index] = dict(layer, locs=[])
+        for num in layer["locs"]:
+            position = positions.get(other_keys[num - 1])
+            if position is not None and position not in placed:
+                target["locs"].append(position)
+                placed.add(position)
+    return layers
+
+def diff(base: dict, side: dict) -> list[dict]:
+    """Returns the differences between a save and an edited save.
+
+    Each difference holds the "Change", one of "Inserted", "Deleted" or "Edited", the "Kind" of
+    data changed, the "Count" and "Location" at which it occurs, numbered as in the edited save
+    except for deleted items, where 0 means none, and the "Number" of rows changed.
+    """
+    use_frames = side["Obstacle"]["Use frames"]
+    (base_locations, base_counts), (side_locations, side_counts) = (
+        (data["Locations"], data["Counts"]) for data in read_sides([base, side], use_frames))
+    changes = []
+    def change(kind: str, count: int=0, location: int=0, number: int=1, how: str="Edited"):
+        changes.append({"Change": how, "Kind": kind, "Count": count, "Location": location,
+                        "Number": number})
+
+    for position, key in enumerate(base_locations, 1):
+        if key not in side_locations:
+            change("Location", location=position, how="Deleted")
+    for position, (key, geometry) in enumerate(side_locations.items(), 1):
+        if key not in base_locations:
+            change("Location", location=position, how="Inserted")
+        elif geometry != base_locations[key]:
+            change("Location", location=position)
+
+    for position, key in enumerate(base_counts, 1):
+        if key not in side_counts:
+            change("Count", count=position, how="Deleted")
+    for position, (key, count) in enumerate(side_counts.items(), 1):
+        if key not in base_counts:
+            change("Count", count=position, how="Inserted")
+            continue
+        if count["Delay"] != base_counts[key]["Delay"]:
+            change("Delay", count=position)
+        rows, base_rows = count["Rows"], base_counts[key]["Rows"]
+        for how, changed in [("Inserted", rows - base_rows), ("Deleted", base_rows - rows)]:
+            numbers = Counter()
+            for (kind, row), number in changed.items():
+                numbers[kind] += number
+            for kind in kinds:
+                if numbers[kind]:
+                    change(kind, count=position, number=numbers[kind], how=how)
+    return changes
+
+def describe(item: dict) -> str:
+    """Returns a line describing a difference or a conflict."""
+    place = "Count {}, location {}".format(item["Count"], item["Location"])
+    if "Conflict" in item:
+        return "{}: {} conflict, kept {}".format(place, item["Conflict"].lower(), item["Resolution"])
+    return "{}: {} {} {}".format(place, item["Change"].lower(), item["Number"], item["Kind"])
+
+def main(argv: list[str]=None) -> int:
+    """Lists the differences between two saves or merges three, and returns 1 if a merge had
+    conflicts.
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.merge",
+                                     description="Compares or merges saved obstacles.")
+    parser.add_argument("paths", nargs="+", help="the base save and one or two edited saves")
+    parser.add_argument("-o", "--output", help="the path of the merged save")
+    parser.add_argument("--prefer", choices=["ours", "theirs"], default="ours",
+                        help="the save whose edits are kept in conflicts")
+    args = parser.parse_args(argv)
+    if len(args.paths) not in (2, 3):
+        parser.error("expected two or three saves")
+    saves = [load_save(path) for path in args.paths]
+    if len(saves) == 2:
+        for change in diff(*saves):
+            print(describe(change))
+        return 0
+
+    merged, conflicts = merge(*saves, prefer=args.prefer)
+    for found in conflicts:
+        print(describe(found))
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(json.dumps(merged, indent=4))
+    print("{} conflict{}".format(len(conflicts), "" if len(conflicts) == 1 else "s"))
+    return int(bool(conflicts))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,121 +1,441 @@
-import pandas as pd
+from contextlib import contextmanager
+import numpy as np
 from PyQt6.QtCore import QPointF
 from src import read_write
 from src import sc_data
+from src.event_store import (CountOrder, EventTable, GroupIndex, HashIndex, StableOrder,
+                             TallyIndex, TimelineIndex)
+from src.history import History
+from src.query import EventQuery
+from src.timing import CountTiming
 
 class Obstacle:
     """A storage class for obstacle data."""
+    # Compact column types. Counts and locations are stored as the stable IDs of the count and
+    # location orders, and event types such as explosions, units and images are indexes into
+    # sc_data.events. Coordinates relative to a location are stored in single precision.
+    explosion_schema = {"Count": np.uint32,
+                        "Player": np.uint8,
+                        "Explosion": np.uint16,
+                        "Location": np.uint16,
+                        "x": np.float32,
+                        "y": np.float32}
+    wall_schema = {"Count": np.uint32,
+                   "Player": np.uint8,
+                   "Unit": np.uint16,
+                   "Add/Remove": np.uint8,
+                   "Location": np.uint16,
+                   "x": np.float32,
+                   "y": np.float32}
+    teleport_schema = {"Count": np.uint32,
+                       "Player from": np.uint8,
+                       "Player to": np.uint8,
+                       "Image from": np.uint16,
+                       "Image to": np.uint16,
+                       "Location from": np.uint16,
+                       "Location to": np.uint16}
+    audio_schema = {"Count": np.uint32,
+                    "Explosion": np.uint16,
+                    "DC Unit": np.uint16}
+    
+    # The kinds of data reported by changes_since.
+    change_kinds = ["Explosions", "Walls", "Teleports", "Audio", "Delays", "Counts", "Locations"]
     
     def __init__(self):
         super().__init__()
         
-        # We store obstacle data in pandas data frames with numerical values.
-        # self.explosions = pd.DataFrame(
-            # {"Count": pd.Series(dtype='int'),
-             # "Player": pd.Series(dtype='int'),
-             # "Explosion": pd.Series(dtype='int'),
-             # "Location": pd.Series(dtype='int'),
-             # "x": pd.Series(dtype='int'),
-             # "y": pd.Series(dtype='int')}
-        # )
-        self.explosions = pd.DataFrame(columns=["Count",
-                                                "Player",
-                                                "Explosion",
-                                                "Location",
-                                                "x",
-                                                "y"])
-        self.walls = pd.DataFrame(columns=["Count",
-                                           "Player",
-                                           "Unit",
-                                           "Add/Remove",
-                                           "Location",
-                                           "x",
-                                           "y"])
-        self.teleports = pd.DataFrame(columns=["Count",
-                                               "Player from",
-                                               "Player to",
-                                               "Image from",
-                                               "Image to",
-                                               "Location from",
-                                               "Location to"])
-        self.audio = pd.DataFrame(columns=["Count",
-                                           "Explosion",
-                                           "DC Unit"])
+        # Events refer to counts by stable IDs. The count order maps positions to IDs and holds the
+        # delay following each count, so inserting or deleting a count doesn't touch any events.
         self.use_frames = read_write.read_setting("Use frames")
-        self.delays = [int(self.use_frames)]
+        self.counts = CountOrder([int(self.use_frames)])
+        
+        # Likewise, events refer to locations by stable handles. The location numbers shown in the
+        # editor, and the location IDs derived from them, are positions in the location order.
+        self.location_order = StableOrder()
+        
+        # We store obstacle data in typed column tables. The pandas data frames exposed by the
+        # explosions, walls, teleports and audio properties are read-only views of these tables,
+        # in which count IDs and location handles are translated back to positions.
+        self.explosion_table = EventTable(self.explosion_schema)
+        self.wall_table = EventTable(self.wall_schema)
+        self.teleport_table = EventTable(self.teleport_schema)
+        self.audio_table = EventTable(self.audio_schema)
+        for table in self.tables():
+            table.add_codec("Count", self.counts.positions_of, self.counts.ids_of)
+            table.attach_index("Count", GroupIndex("Count"))
+        for table, name in self.location_columns():
+            table.add_codec(name, self.location_order.positions_of, self.location_order.ids_of)
+            table.attach_index(name, GroupIndex(name))
+        
+        # Point lookups are answered by hash indexes on (count, location, x, y).
+        self.explosion_table.add_index("Position", ["Count", "Location", "x", "y"])
+        self.wall_table.add_index("Position", ["Count", "Location", "x", "y"])
+        
+        # The audio of an explosion type on a count is kept while explosions of that type remain.
+        self.audio_table.add_index("Explosion", ["Count", "Explosion"])
+        
+        # The explosion types present in the obstacle and on each count are reference counted, so
+        # the audio mapping can be updated exactly when a type appears or disappears.
+        self.explosion_table.attach_index("Types", TallyIndex(["Explosion"]))
+        self.explosion_table.attach_index("Count types", TallyIndex(["Count", "Explosion"]))
+        
+        # Wall lifetimes are answered by binary search over the counts on which events occur at
+        # each (location, x, y) wall slot, sorted by position.
+        self.wall_table.attach_index("Events", TimelineIndex(["Location", "x", "y"],
+                                                             "Count",
+                                                             key=self.counts.position))
+        self.wall_table.attach_index("Placements", TimelineIndex(["Location", "x", "y"],
+                                                                 "Count",
+                                                                 ("Add/Remove", 2),
+                                                                 self.counts.position))
+        
+        # Callbacks run after the obstacle is modified. Inside a batch, follow-up work such as
+        # audio clean-up and notifying listeners is deferred until the batch is committed.
+        self.listeners = []
+        self.batch_depth = 0
+        self.stale_audio = False
+        self.pending_change = False
+        
+        # Mutations of the tables and orders made during an edit are recorded for undo and redo.
+        self.history = History(read_write.read_setting("Undo limit"))
+        self.counts.history = self.history
+        self.location_order.history = self.history
+        for table in self.tables():
+            table.history = self.history
+            
+        # A change feed for consumers which update incrementally. Every mutation increments the
+        # version and stamps the kind of data and the counts and locations it touched with it.
+        self.version = 0
+        self.cleared_version = 0
+        self.kind_versions = {}
+        self.count_versions = {}
+        self.location_versions = {}
+        self.table_kinds = {self.explosion_table: "Explosions",
+                            self.wall_table: "Walls",
+                            self.teleport_table: "Teleports",
+                            self.audio_table: "Audio"}
+        self.location_names = {table: [] for table in self.tables()}
+        for table, name in self.location_columns():
+            self.location_names[table].append(name)
+        for table in self.tables():
+            table.add_observer(self.table_changed)
+        self.counts.add_observer(self.count_changed)
+        self.location_order.add_observer(self.location_changed)
+        
+        # The frame on which each count fires, kept up to date as delays and counts change.
+        self.timing = CountTiming(self.counts, self.use_frames)
+        
+    @property
+    def delays(self) -> CountOrder:
+        """Returns the delays following each count, which are indexed by position as a list."""
+        return self.counts
+        
+    @property
+    def explosions(self) -> "pandas.DataFrame":
+        """Returns the explosion events as a data frame."""
+        return self.explosion_table.to_frame()
+        
+    @property
+    def walls(self) -> "pandas.DataFrame":
+        """Returns the wall events as a data frame."""
+        return self.wall_table.to_frame()
+        
+    @property
+    def teleports(self) -> "pandas.DataFrame":
+        """Returns the teleport events as a data frame."""
+        return self.teleport_table.to_frame()
+        
+    @property
+    def audio(self) -> "pandas.DataFrame":
+        """Returns the audio events as a data frame."""
+        return self.audio_table.to_frame()
     
+    def events(self, kind: str) -> EventQuery:
+        """Returns a lazy query over the events of a kind, "Explosions", "Walls", "Teleports" or
+        "Audio". The kind is case-insensitive and may be singular.
+        """
+        for table, name in self.table_kinds.items():
+            if kind.lower() in (name.lower(), name.lower().rstrip("s")):
+                return EventQuery(self, table)
+        raise KeyError(kind)
+        
+    @contextmanager
+    def batch(self):
+        """Groups mutations into a transaction, used as "with ob.batch():".
+        
+        Audio clean-up, table compaction and listener callbacks run once when the batch is
+        committed. If an exception is raised inside the batch, all of its mutations are rolled back.
+        Nested batches are merged into the outermost one.
+        """
+        if self.batch_depth:
+            self.batch_depth += 1
+            try:
+                yield self
+            finally:
+                self.batch_depth -= 1
+            return
+        
+        self.batch_depth = 1
+        counts = self.counts.snapshot()
+        locations = self.location_order.snapshot()
+        mark = self.history.mark()
+        for table in self.tables():
+            table.begin()
+        try:
+            yield self
+        except BaseException:
+            # The orders are restored first, since the indexes are rebuilt from handles and the wall
+            # timelines are sorted by position.
+            self.counts.restore(counts)
+            self.location_order.restore(locations)
+            self.timing.invalidate()
+            for table in self.tables():
+                table.rollback()
+            self.history.discard(mark)
+            self.stale_audio = False
+            self.pending_change = False
+            raise
+        finally:
+            self.batch_depth = 0
+            
+        if self.stale_audio:
+            self.stale_audio = False
+            self.delete_audio()
+        for table in self.tables():
+            table.commit()
+        if self.pending_change:
+            self.changed()
+            
+    def add_listener(self, callback) -> None:
+        """Registers a callback which is called without arguments after the obstacle changes."""
+        self.listeners.append(callback)
+        
+    def changed(self) -> None:
+        """Notifies listeners that the obstacle changed, or defers it until the batch commits."""
+        if self.batch_depth:
+            self.pending_change = True
+            return
+        self.pending_change = False
+        for callback in self.listeners:
+            callback()
+            
+    def stamp(self, kind: str, counts: list[int]=(), locations: list[int]=()) -> None:
+        """Stamps a kind of data and the counts and locations with the input IDs and handles with a
+        new version.
+        """
+        self.version += 1
+        self.kind_versions[kind] = self.version
+        for ID in counts:
+            self.count_versions[ID] = self.version
+        for handle in locations:
+            self.location_versions[handle] = self.version
+            
+    def table_changed(self, table: EventTable, rows: np.ndarray) -> None:
+        """Stamps the counts and locations of mutated event rows."""
+        # Single rows, which most edits touch, are read without NumPy's overhead.
+        names = self.location_names[table]
+        if len(rows) == 1:
+            row = int(rows[0])
+            counts = [table.columns["Count"].item(row)]
+            locations = [table.columns[name].item(row) for name in names]
+        else:
+            counts = np.unique(table.columns["Count"][rows]).tolist()
+            locations = set()
+            for name in names:
+                locations.update(np.unique(table.columns[name][rows]).tolist())
+        self.stamp(self.table_kinds[table], counts, locations)
+        
+    def count_changed(self, ID: int, kind: str) -> None:
+        """Stamps a count which was inserted, deleted or had its delay changed."""
+        self.stamp("Counts" if kind == "Order" else "Delays", [ID])
+        
+    def location_changed(self, handle: int, kind: str) -> None:
+        """Stamps a location which was inserted or deleted."""
+        self.stamp("Locations", locations=[handle])
+        
+    def changes_since(self, version: int) -> dict:
+        """Returns what changed after the input version, for consumers which update incrementally.
+        
+        The result holds the current "Version", to pass on the next call, the "Kinds" of data which
+        changed, the IDs of the "Counts" and the handles of the "Locations" touched by the changes,
+        including deleted ones. Events are reported as "Explosions", "Walls", "Teleports" and
+        "Audio". Inserting or deleting counts or locations is reported as "Counts" or "Locations",
+        since it changes the positions of all later ones.
+        """
+        # Resetting the obstacle renumbers IDs from 1, so everything is reported as changed.
+        if version < self.cleared_version:
+            return {"Version": self.version,
+                    "Kinds": set(self.change_kinds),
+                    "Counts": set(self.counts.ids),
+                    "Locations": set(self.location_order.ids)}
+        locations = {handle for handle, v in self.location_versions.items() if v > version}
+        return {"Version": self.version,
+                "Kinds": {kind for kind, v in self.kind_versions.items() if v > version},
+                "Counts": {ID for ID, v in self.count_versions.items() if v > version},
+                "Locations": locations}
+            
+    def clean_audio(self, pairs: set[tuple]) -> None:
+        """Deletes the audio events of the input (count ID, explosion) pairs for which no explosion
+        remains, or defers a full clean-up until the batch commits.
+        """
+        if self.batch_depth:
+            self.stale_audio = True
+            return
+        for pair in pairs:
+            if not self.explosion_table.exists("Count types", pair):
+                self.audio_table.delete(self.audio_table.lookup("Explosion", pair))
+                
+    def delete_explosion_rows(self, rows: list[int]) -> None:
+        """Deletes the input explosion rows along with audio events left without explosions."""
+        counts = self.explosion_table.column("Count")[rows].tolist()
+        explosions = self.explosion_table.column("Explosion")[rows].tolist()
+        self.explosion_table.delete(rows)
+        self.clean_audio(set(zip(counts, explosions)))
+            
     def set_timing_type(self, use_frames: bool) -> None:
         """Sets the timing type to frames if use_frames is true or waits otherwise."""
+        # The delays are converted to the new unit, so recorded delay changes no longer apply.
+        if use_frames != self.use_frames:
+            self.history.clear()
+            self.stamp("Delays", self.counts.ids)
         self.use_frames = use_frames
+        self.timing.set_timing_type(use_frames)
+        
+    def count_id(self, count: int) -> int:
+        """Returns the ID of the count at the input position.
+        
+        If the obstacle has fewer counts, counts followed by the last delay are added.
+        """
+        while len(self.counts) < count:
+            self.counts.append(self.counts[-1])
+        return self.counts.id(count)
         
     def delete_count(self, count: int) -> None:
-        """Deletes the input count from the obstacle and shifts the later counts down."""
-        self.explosions.drop(self.explosions[self.explosions["Count"] == count].index,
-                             inplace=True)
-        self.walls.drop(self.walls[self.walls["Count"] == count].index,
-                        inplace=True)
-        self.teleports.drop(self.teleports[self.teleports["Count"] == count].index,
-                            inplace=True)
-        self.audio.drop(self.audio[self.audio["Count"] == count].index,
-                        inplace=True)
-        self.shift_counts(count + 1, -1)
+        """Deletes the events and delay of the input count. Later counts move down a position."""
+        ID = self.counts.id(count)
+        for table in self.tables():
+            table.delete(table.lookup("Count", (ID,)))
+            
+        # An obstacle always has at least one count, so the last count is emptied instead.
+        if len(self.counts) > 1:
+            del self.counts[count - 1]
+            self.positions_changed()
+        self.changed()
         
     def insert_count(self, count: int) -> None:
-        """Inserts a new count at the input position and shifts later counts up."""
-        self.shift_counts(count, 1)
-
-    def shift_counts(self, lower: int, shift: int) -> None:
-        """Shifts all counts which are >= lower by shift."""
-        # Needed for count deletion and insertion.
-        self.explosions.loc[self.explosions["Count"] >= lower, "Count"] += shift
-        self.walls.loc[self.walls["Count"] >= lower, "Count"] += shift
-        self.teleports.loc[self.teleports["Count"] >= lower, "Count"] += shift
-        self.audio.loc[self.audio["Count"] >= lower, "Count"] += shift
-        
-        self.explosions.reset_index(drop=True, inplace=True)
-        self.walls.reset_index(drop=True, inplace=True)
-        self.teleports.reset_index(drop=True, inplace=True)
-        self.audio.reset_index(drop=True, inplace=True)
+        """Inserts an empty count at the input position, followed by the same delay as the count
+        previously there. Later counts move up a position.
+        """
+        self.count_id(count)
+        self.counts.insert(count - 1, self.counts[count - 1])
+        self.positions_changed()
+        self.changed()
+        
+    def paste_counts(self,
+                     first: int,
+                     last: int,
+                     position: int,
+                     repeats: int=1,
+                     offset: tuple=(0, 0)) -> list[int]:
+        """Inserts copies of counts first through last, along with their delays and events, before
+        the count at the input position, which may be one past the last count. The copies are
+        repeated the input number of times, and the positions of the explosions and walls of the
+        k-th repeat are shifted by k times offset. Returns the IDs of the new counts in order.
+        """
+        source = np.array([self.counts.id(count) for count in range(first, last + 1)])
+        delays = self.counts[first - 1:last]
+        
+        # The events are read before the new counts shift the positions of later counts.
+        records = [(table, table.records(self.event_rows(table, range(first, last + 1))))
+                   for table in self.tables()]
+        with self.batch():
+            IDs = np.array([self.counts.insert(position - 1 + i, delays[i % len(source)])
+                            for i in range(repeats*len(source))])
+            
+            # The rows of all repeats are built as one block per table and appended at once.
+            order = np.argsort(source)
+            for table, block in records:
+                if not len(block):
+                    continue
+                sources = order[np.searchsorted(source, block["Count"], sorter=order)]
+                copies = np.tile(block, repeats)
+                repeat = np.repeat(np.arange(repeats), len(block))
+                copies["Count"] = IDs[repeat*len(source) + np.tile(sources, repeats)]
+                if "x" in table.schema:
+                    copies["x"] += repeat*offset[0]
+                    copies["y"] += repeat*offset[1]
+                table.insert_records(copies)
+            self.positions_changed()
+            self.changed()
+        return IDs.tolist()
+        
+    def positions_changed(self) -> None:
+        """Invalidates the data frames, whose counts and locations are positions, after the count
+        or location order changes.
+        """
+        for table in self.tables():
+            table.modified()
+        
+    def tables(self) -> list[EventTable]:
+        """Returns the event tables of the obstacle."""
+        return [self.explosion_table, self.wall_table, self.teleport_table, self.audio_table]
+        
+    def location_columns(self) -> list[tuple]:
+        """Returns the (table, column) pairs which hold location handles."""
+        return [(self.explosion_table, "Location"),
+                (self.wall_table, "Location"),
+                (self.teleport_table, "Location from"),
+                (self.teleport_table, "Location to")]
+        
+    def add_location(self) -> int:
+        """Adds a location after the existing locations and returns its handle."""
+        return self.location_order.add(len(self.location_order))
+        
+    def location_id(self, loc: int) -> int:
+        """Returns the handle of the location with the input number.
+        
+        If the obstacle has fewer locations, locations are added.
+        """
+        while len(self.location_order) < loc:
+            self.add_location()
+        return self.location_order.id(loc)
         
     def delete_location(self, loc: int) -> None:
-        """Deletes all obstacle events occuring at location number loc."""
-        self.explosions.drop(
-            self.explosions[self.explosions["Location"] == loc].index,
-            inplace=True
-        )
-        self.walls.drop(
-            self.walls[self.walls["Location"] == loc].index,
-            inplace=True
-        )
-        self.teleports.drop(
-            self.teleports[(self.teleports["Location from"] == loc)
-            | (self.teleports["Location to"] == loc)].index,
-            inplace=True
-        ) 
-        self.explosions.reset_index(drop=True, inplace=True)
-        self.walls.reset_index(drop=True, inplace=True)
-        self.teleports.reset_index(drop=True, inplace=True)
-        self.delete_audio()
-        self.shift_locations_down(loc)
-        
-    def shift_locations_down(self, lower: int) -> None:
-        """Shifts all locations of number > lower down by 1."""
-        # Needed for location deletion.
-        self.explosions.loc[self.explosions["Location"] > lower, "Location"] -= 1
-        self.walls.loc[self.walls["Location"] > lower, "Location"] -= 1
-        self.teleports.loc[self.teleports["Location from"] > lower, "Location from"] -= 1
-        self.teleports.loc[self.teleports["Location to"] > lower, "Location to"] -= 1
+        """Deletes location number loc and all obstacle events occuring at it. Later locations move
+        down a number.
+        """
+        handle = self.location_order.id(loc)
+        self.delete_explosion_rows(self.explosion_table.lookup("Location", (handle,)))
+        self.wall_table.delete(self.wall_table.lookup("Location", (handle,)))
+        self.teleport_table.delete(np.union1d(self.teleport_table.lookup("Location from", (handle,)),
+                                              self.teleport_table.lookup("Location to", (handle,))))
+        if handle:
+            self.location_order.remove_at(loc - 1)
+            self.positions_changed()
+        self.changed()
         
     def find_explosion(self, explosion: int) -> None:
         """Checks if the input explosion is present in the ob."""
         # Used to modify the audio mapping menus.
-        return (self.explosions["Explosion"] == explosion).any()
+        return self.explosion_table.exists("Types", (explosion,))
+        
+    def explosion_types(self) -> set[int]:
+        """Returns the set of explosion types present in the obstacle."""
+        return {explosion for explosion, in self.explosion_table.indexes["Types"].keys()}
+        
+    def add_explosion_observer(self, callback) -> None:
+        """Registers a callback which is called with an explosion type and a boolean whenever the
+        first explosion of that type is added to the obstacle (true) or the last one is deleted
+        (false).
+        """
+        self.explosion_table.indexes["Types"].add_observer(
+            lambda key, present: callback(key[0], present)
+        )
         
     def find_explosion_in_count(self, count: int, explosion: int) -> None:
         """Checks if the input explosion is present in the ob during the input count."""
         # Used to modify the audio mapping menus.
-        return ((self.explosions["Count"] == count)
-                & (self.explosions["Explosion"] == explosion)).any()
+        return self.explosion_table.exists("Count types", (self.counts.id(count), explosion))
 
     def find_explosion_at(self, count: int, explosion: int, loc: int, pos: QPointF) -> bool:
         """Checks for the existence of an explosion.
@@ -125,11 +445,14 @@ class Obstacle:
         (x, y) is the position of the explosion relative to the location.
         """
         # Used to ensure identical explosions aren't placed at the same point.
-        return ((self.explosions["Count"] == count)
-                & (self.explosions["Explosion"] == explosion)
-                & (self.explosions["Location"] == loc)
-                & (self.explosions["x"] == pos.x())
-                & (self.explosions["y"] == pos.y())).any()
+        return bool(self.explosions_at(count, explosion, loc, pos.x(), pos.y()))
+        
+    def explosions_at(self, count: int, explosion: int, loc: int, x: float, y: float) -> list[int]:
+        """Returns the row ids of the explosions of the input type at a position on a count."""
+        key = (self.counts.id(count), self.location_order.id(loc), x, y)
+        rows = self.explosion_table.lookup("Position", key)
+        IDs = self.explosion_table.column("Explosion")
+        return [row for row in rows if IDs[row] == explosion]
         
     def add_explosion(self,
                       count: int,
@@ -145,18 +468,58 @@ class Obstacle:
         player is the player owning the explosion unit.
         (x, y) are the coordinates of the explosion relative to the location.
         """
-        self.explosions.loc[len(self.explosions)] = [count, player, explosion, loc, x, y]
-        
+        row = [self.count_id(count), player, explosion, self.location_id(loc), x, y]
+        self.explosion_table.append(row)
+        self.changed()
+
+    def add_pattern(self,
+                    pattern: dict[str, np.ndarray],
+                    first: int,
+                    last: int,
+                    player: int,
+                    explosions: list[int],
+                    loc: int,
+                    origin: tuple=(16, 16),
+                    cell_size: float=32) -> np.ndarray:
+        """Adds the explosions of a pattern from src.patterns and returns their row ids.
+
+        Step k of the pattern occurs on count first + k, wrapping around to first after last, and
+        counts up to last are added if the obstacle has fewer. Each cell holds one explosion of
+        every type in explosions, owned by player. The cell in column c and row r is placed at
+        origin + cell_size*(c, r) relative to location number loc.
+        """
+        positions = first + pattern["Step"] % (last - first + 1)
+        self.count_id(last)
+        size = len(positions)
+        schema = self.explosion_schema
+        columns = {"Count": np.tile(self.counts.ids_of(positions), len(explosions)),
+                   "Player": np.full(size*len(explosions), player),
+                   "Explosion": np.repeat(np.asarray(explosions, dtype=np.int64), size),
+                   "Location": np.full(size*len(explosions), self.location_id(loc)),
+                   "x": np.tile(origin[0] + cell_size*pattern["Column"], len(explosions)),
+                   "y": np.tile(origin[1] + cell_size*pattern["Row"], len(explosions))}
+        for name, values in columns.items():
+            self.explosion_table.check(name, values)
+            columns[name] = values.astype(schema[name])
+
+        # As when placing explosions by hand, an explosion is skipped if an identical one is
+        # already on its count at the same point of the location, or earlier in the pattern.
+        names = ["Count", "Explosion", "x", "y"]
+        keys = HashIndex.hash_columns([columns[name] for name in names])
+        rows = self.event_rows(self.explosion_table, np.unique(positions).tolist(), [loc])
+        existing = HashIndex.hash_columns([self.explosion_table.column(name)[rows]
+                                           for name in names])
+        keep = np.zeros(len(keys), dtype=bool)
+        keep[np.unique(keys, return_index=True)[1]] = True
+        keep &= ~np.isin(keys, existing)
+        rows = self.explosion_table.extend({name: values[keep] for name, values in columns.items()})
+        self.changed()
+        return rows
+
     def delete_explosion(self, count: int, explosion: int, loc: int, x: int, y: int) -> None:
         """Deletes an explosion at the input Location and coordinates occuring at the input count."""
-        self.explosions.drop(self.explosions[(self.explosions["Count"] == count)
-                              & (self.explosions["Explosion"] == explosion)
-                              & (self.explosions["Location"] == loc)
-                              & (self.explosions["x"] == x)
-                              & (self.explosions["y"] == y)].index,
-                              inplace=True)
-        self.explosions.reset_index(drop=True, inplace=True)
-        self.delete_audio()
+        self.delete_explosion_rows(self.explosions_at(count, explosion, loc, x, y))
+        self.changed()
         
     def search_wall(self, count: int, loc: int, pos: QPointF) -> list[int]:
         """Checks for a wall event. If a wall event is found, returns two integers, the first of
@@ -168,16 +531,12 @@ class Obstacle:
         pos is the position of the wall event being searched for relative to the location.
         """
         # Used to prevent overlapping wall placements / removals.
-        num_counts = len(self.delays)
-        for i in range(num_counts):
-            prev_count = (count - i - 1) % num_counts + 1
-            walls = self.walls[(self.walls["Count"] == prev_count)
-                               & (self.walls["Location"] == loc)
-                               & (self.walls["x"] == pos.x())
-                               & (self.walls["y"] == pos.y())].reset_index(drop=True)
-            if not walls.empty:
-                return [walls.iloc[0]["Add/Remove"], walls.iloc[0]["Count"]]
-        return [-1, -1]
+        slot = self.wall_slot(loc, pos.x(), pos.y())
+        prev_id = self.wall_table.indexes["Events"].latest(slot, count)
+        if not prev_id:
+            return [-1, -1]
+        row = self.wall_table.lookup("Position", (prev_id,) + slot)[0]
+        return [self.wall_table.column("Add/Remove")[row].item(), self.counts.position(prev_id)]
         
     def find_wall(self, count: int, loc: int, pos: QPointF) -> int:
         """Returns the most recent prior count on which a wall was placed.
@@ -188,16 +547,38 @@ class Obstacle:
         pos is the position of the wall event being searched for relative to the location.
         """
         # Used to properly display wall images.
-        num_counts = len(self.delays)
-        for i in range(num_counts):
-            prev_count = (count - i - 1) % num_counts + 1
-            if ((self.walls["Count"] == prev_count)
-                & (self.walls["Location"] == loc)
-                & (self.walls["Add/Remove"] == 2)
-                & (self.walls["x"] == pos.x())
-                & (self.walls["y"] == pos.y())).any():
-                return prev_count
-        return 0
+        slot = self.wall_slot(loc, pos.x(), pos.y())
+        place_id = self.wall_table.indexes["Placements"].latest(slot, count)
+        return self.counts.position(place_id)
+        
+    def wall_slot(self, loc: int, x: float, y: float) -> tuple:
+        """Returns the key of the wall slot at (x, y) relative to location number loc."""
+        return self.wall_table.normalize(["Location", "x", "y"], (self.location_order.id(loc), x, y))
+        
+    def wall_states(self, count: int) -> list[tuple]:
+        """Returns the state of every wall slot at the input count.
+        
+        Each state is a tuple (loc, x, y, add_remove, place_count), where add_remove is the type of
+        the most recent wall event at or before count and place_count is the count on which the
+        wall was last placed. States are ordered from the most to the least recent event.
+        """
+        # Used to display wall images.
+        events = self.wall_table.indexes["Events"]
+        placements = self.wall_table.indexes["Placements"]
+        add_remove = self.wall_table.column("Add/Remove")
+        num_counts = len(self.counts)
+        states = []
+        for slot in events.slots():
+            prev_id = events.latest(slot, count)
+            prev_count = self.counts.position(prev_id)
+            row = self.wall_table.lookup("Position", (prev_id,) + slot)[0]
+            place_count = self.counts.position(placements.latest(slot, prev_count))
+            loc = self.location_order.position(slot[0])
+            states.append(((count - prev_count) % num_counts,
+                           row,
+                           (loc,) + slot[1:] + (add_remove[row].item(), place_count)))
+        states.sort()
+        return [state for distance, row, state in states]
         
     def place_wall(self, count: int, player: int, unit: int, loc: int, x: float, y: float) -> None:
         """Places a wall.
@@ -208,7 +589,8 @@ class Obstacle:
         player is the player owning the wall unit.
         (x, y) are the coordinates of the wall.
         """
-        self.walls.loc[len(self.walls)] = [count, player, unit, 2, loc, x, y]
+        self.wall_table.append([self.count_id(count), player, unit, 2, self.location_id(loc), x, y])
+        self.changed()
     
     def remove_wall(self,
                     count: int,
@@ -226,7 +608,9 @@ class Obstacle:
         player is the player owning the wall unit.
         (x, y) are the coordinates of the wall.
         """
-        self.walls.loc[len(self.walls)] = [count, 9, unit, removal_type, loc, x, y]
+        handle = self.location_id(loc)
+        self.wall_table.append([self.count_id(count), 9, unit, removal_type, handle, x, y])
+        self.changed()
         
     def delete_wall(self, count: int, loc: int, x: float, y: float) -> None:
         """Deletes a wall.
@@ -237,26 +621,14 @@ class Obstacle:
         (x, y) are the coordinates of the wall.
         """
         # Deletes the wall placement event.
-        self.walls.drop(self.walls[(self.walls["Count"] == count)
-                        & (self.walls["Location"] == loc)
-                        & (self.walls["x"] == x)
-                        & (self.walls["y"] == y)].index, inplace=True)
+        slot = self.wall_slot(loc, x, y)
+        self.wall_table.delete(self.wall_table.lookup("Position", (self.counts.id(count),) + slot))
         
         # If the wall was removed, we also need to delete the wall removal event.
-        num_counts = len(self.delays)
-        for i in range(1, num_counts):
-            later_count = ((count + i) - 1) % num_counts + 1
-            if not ((self.walls["Count"] == later_count)
-                    & (self.walls["Location"] == loc)
-                    & (self.walls["x"] == x)
-                    & (self.walls["y"] == y)).any():
-                continue
-            self.walls.drop(self.walls[(self.walls["Count"] == later_count)
-                            & (self.walls["Location"] == loc)
-                            & (self.walls["x"] == x)
-                            & (self.walls["y"] == y)].index, inplace=True)
-            break
-        self.walls.reset_index(drop=True, inplace=True)
+        later_id = self.wall_table.indexes["Events"].following(slot, count)
+        if later_id:
+            self.wall_table.delete(self.wall_table.lookup("Position", (later_id,) + slot))
+        self.changed()
         
     def add_teleport(self,
                      count: int,
@@ -274,8 +646,15 @@ class Obstacle:
         img_from is the type of decorative explosion used on loc_to.
         player is the player owning the decorative explosion unit.
         """
-        row = [count, player_from, player_to, img_from, img_to, loc_from, loc_to]
-        self.teleports.loc[len(self.explosions)] = row
+        row = [self.count_id(count),
+               player_from,
+               player_to,
+               img_from,
+               img_to,
+               self.location_id(loc_from),
+               self.location_id(loc_to)]
+        self.teleport_table.append(row)
+        self.changed()
                              
     def delete_teleport(self, count: int, loc: int) -> None:
         """Deletes a teleport event.
@@ -283,11 +662,13 @@ class Obstacle:
         count is the count on which the teleport occurs.
         loc is either the start or end location of the teleport.
         """
-        self.teleports.drop(self.teleports[(self.teleports["Count"] == count)
-                                           & (self.teleports["Location from"] == loc)
-                                           & (self.teleports["Location to"] == loc)].index,
-                                           inplace=True)
-        self.teleports.reset_index(drop=True, inplace=True)
+        # A teleport joins two locations, so it's deleted from either end.
+        handle = self.location_order.id(loc)
+        rows = np.union1d(self.teleport_table.lookup("Location from", (handle,)),
+                          self.teleport_table.lookup("Location to", (handle,)))
+        counts = self.teleport_table.column("Count")[rows]
+        self.teleport_table.delete(rows[counts == self.counts.id(count)])
+        self.changed()
         
     def add_audio(self, count: int, explosion: int, dc_unit: int) -> None:
         """Adds an audio event.
@@ -301,62 +682,179 @@ class Obstacle:
             return
             
         # If an identical audio event occurs in the input count, do nothing.
-        if ((self.audio["Count"] == count)
-            & (self.audio["Explosion"] == explosion)
-            & (self.audio["DC Unit"] == dc_unit)).any():
+        ID = self.counts.id(count)
+        rows = self.audio_table.lookup("Explosion", (ID, explosion))
+        if (self.audio_table.column("DC Unit")[rows] == dc_unit).any():
             return
 
-        self.audio.loc[len(self.audio)] = [count, explosion, dc_unit]
+        self.audio_table.append([ID, explosion, dc_unit])
+        self.changed()
         
     def delete_audio(self) -> None:
         """Deletes audio events which correspond to explosions which have been deleted."""
-        self.audio.drop(
-            self.audio[~self.audio.apply(
-                lambda row: self.find_explosion_in_count(row["Count"], row["Explosion"]),
-                axis=1
-                )].index,
-            inplace=True
-        )
-        self.audio.reset_index(drop=True, inplace=True)
+        # Anti-join of the audio rows against the set of (count, explosion) pairs present in the
+        # ob. Pairs are packed into single integers so the membership test is vectorized.
+        explosion_rows = self.explosion_table.rows()
+        audio_rows = self.audio_table.rows()
+        present = self.count_explosion_keys(self.explosion_table, explosion_rows)
+        keys = self.count_explosion_keys(self.audio_table, audio_rows)
+        self.audio_table.delete(audio_rows[~np.isin(keys, present)])
+        self.changed()
+        
+    def count_explosion_keys(self, table: EventTable, rows: np.ndarray) -> np.ndarray:
+        """Packs the count and explosion of the input rows of table into integer keys."""
+        counts = table.column("Count")[rows].astype(np.int64)
+        return (counts << 32) | table.column("Explosion")[rows].astype(np.int64)
         
     def delete_audio_on_count(self, count: int) -> None:
         """Deletes audio events occuring during the input count."""
-        self.audio.drop(self.audio[(self.audio["Count"] == count)].index, inplace=True)
-        self.audio.reset_index(drop=True, inplace=True)
+        self.audio_table.delete(self.audio_table.lookup("Count", (self.counts.id(count),)))
+        self.changed()
             
     def shift_events(self, loc: int, shift: QPointF) -> None:
         """Shifts the positions of all events at loc by shift."""
         # Needed for location resizing.
-        self.explosions.loc[self.explosions["Location"] == loc, "x"] += shift.x()
-        self.explosions.loc[self.explosions["Location"] == loc, "y"] += shift.y()
+        self.transform_events(offset=(shift.x(), shift.y()), locations=[loc])
+        
+    def event_rows(self,
+                   table: EventTable,
+                   counts: list[int]=None,
+                   locations: list[int]=None) -> np.ndarray:
+        """Returns the sorted ids of the live rows of a table occuring during the counts at the
+        input positions and at the locations with the input numbers. None selects all counts or
+        all locations.
+        """
+        if locations is None:
+            rows = table.rows()
+        else:
+            handles = [self.location_order.id(loc) for loc in locations]
+            rows = np.unique(np.concatenate([np.zeros(0, dtype=np.int64)]
+                                            + [table.lookup("Location", (handle,))
+                                               for handle in handles]))
+        if counts is not None:
+            IDs = self.counts.ids_of(np.asarray(list(counts), dtype=np.int64))
+            rows = rows[np.isin(table.column("Count")[rows], IDs)]
+        return rows
+        
+    @staticmethod
+    def map_positions(x, y, matrix: tuple, offset: tuple, center: tuple, target: tuple) -> tuple:
+        """Returns the positions (x, y) relative to the top-left corner of a location with the
+        input center, which may be arrays, mapped by the affine map of transform_events and placed
+        relative to the top-left corner of a location with the target center.
+        """
+        (a, b), (c, d) = matrix
+        x, y = x - center[0], y - center[1]
+        return (a*x + b*y + offset[0] + target[0], c*x + d*y + offset[1] + target[1])
+        
+    def transform_events(self,
+                         matrix: tuple=((1, 0), (0, 1)),
+                         offset: tuple=(0, 0),
+                         counts: list[int]=None,
+                         locations: list[int]=None,
+                         kinds: list[str]=("Explosions", "Walls"),
+                         anchor: int=None,
+                         location_centers: list[tuple]=None) -> None:
+        """Applies an affine map to the positions of the selected events.
+        
+        The position (x, y) of an event relative to the center of its location is mapped to
+        matrix*(x, y) + offset, so a matrix of ((-1, 0), (0, 1)) mirrors events about the vertical
+        axis of their location and ((0, -1), (1, 0)) rotates them a quarter turn. The events of the
+        kinds "Explosions" and "Walls" occuring during the counts at the input positions and at the
+        locations with the input numbers are selected, where None selects all of them. If anchor is
+        given, the events are also moved to the location with that number, keeping their position
+        relative to its center.
+        
+        Positions are stored relative to the top-left corner of a location, so location_centers
+        holds the center of each location in order of number relative to its top-left corner, as
+        returned by Location.center. It may only be omitted if the map is a translation.
+        """
+        if location_centers is None:
+            if not np.array_equal(matrix, np.eye(2)) or anchor is not None:
+                raise ValueError("location_centers is needed unless the map is a translation")
+            location_centers = np.zeros((max(1, len(self.location_order)), 2))
+        centers = np.asarray(location_centers, dtype=np.float64).reshape(-1, 2)
+        tables = {kind: table for table, kind in self.table_kinds.items()}
+        for kind in kinds:
+            table = tables[kind]
+            rows = self.event_rows(table, counts, locations)
+            if not len(rows):
+                continue
+            
+            # Both coordinates are computed before either column is written.
+            center = centers[self.location_order.positions_of(table.column("Location")[rows]) - 1].T
+            target = center if anchor is None else centers[anchor - 1]
+            x, y = self.map_positions(table.column("x")[rows].astype(np.float64),
+                                      table.column("y")[rows].astype(np.float64),
+                                      matrix,
+                                      offset,
+                                      center,
+                                      target)
+            table.set(rows, "x", x)
+            table.set(rows, "y", y)
+            if anchor is not None:
+                table.set(rows, "Location", self.location_id(anchor))
+        self.changed()
             
     def reset(self) -> None:
         """Deletes the obstacle data."""
-        self.delays.clear()
-        self.delays.append(int(self.use_frames))
-        self.audio.drop(self.audio.index, inplace=True) 
+        # Once no events remain, count and location IDs can be numbered from 1 again, which keeps
+        # them within the range of their compact column types.
+        for table in self.tables():
+            table.clear()
+        self.counts.clear(True)
+        self.location_order.clear(True)
+        self.count_versions.clear()
+        self.location_versions.clear()
+        self.stamp("Counts")
+        self.cleared_version = self.version
+        self.counts.append(int(self.use_frames))
+        self.history.clear()
+        self.changed()
+        
+    def undo(self) -> bool:
+        """Undoes the most recent edit. Returns false if there was nothing to undo."""
+        if not self.history.undo():
+            return False
+        self.positions_changed()
+        self.changed()
+        return True
+        
+    def redo(self) -> bool:
+        """Redoes the most recently undone edit. Returns false if there was nothing to redo."""
+        if not self.history.redo():
+            return False
+        self.positions_changed()
+        self.changed()
+        return True
+        
+    def memory_usage(self) -> dict[str, dict[str, int]]:
+        """Returns the number of bytes used by each event table, split into the column arrays,
+        the indexes and the cached data frame. Index sizes are approximate.
+        """
+        return {"Explosions": self.explosion_table.memory_usage(),
+                "Walls": self.wall_table.memory_usage(),
+                "Teleports": self.teleport_table.memory_usage(),
+                "Audio": self.audio_table.memory_usage()}
         
     def serialize(self) -> dict:
         """Serializes the obstacle."""
         return {"Use frames": self.use_frames,
-                "Delays": self.delays,
-                "Explosions": self.explosions.to_dict(orient='index'),
-                "Walls": self.walls.to_dict(orient='index'),
-                "Teleports": self.teleports.to_dict(orient='index'),
-                "Audio": self.audio.to_dict(orient='index')}
+                "Delays": list(self.counts),
+                "Explosions": self.explosion_table.serialize(),
+                "Walls": self.wall_table.serialize(),
+                "Teleports": self.teleport_table.serialize(),
+                "Audio": self.audio_table.serialize()}
                            
     def load(self, data: dict) -> None:
         """Reconstructs the delays and audio from saved data."""
         delays = data["Obstacle"]["Delays"]
         audio = data["Obstacle"]["Audio"]
         
-        while len(self.delays) < len(delays):
-            self.delays.append(-1)
+        while len(self.counts) < len(delays):
+            self.counts.append(-1)
         for i, delay in enumerate(delays):
-            self.delays[i] = delays[i]
+            self.counts[i] = delays[i]
             
-        self.audio = pd.DataFrame.from_dict(audio,
-                                            columns=["Count",
-                                                     "Explosion",
-                                                     "DC Unit"],
-                                            orient='index')
\ No newline at end of file
+        self.audio_table.load(audio)
+        self.history.clear()
+        self.changed()
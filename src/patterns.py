@@ -0,0 +1,110 @@
+import numpy as np
+
+# A pattern is a set of cells of a grid with columns x rows cells, each with the step on which it
+# fires, given as a dictionary of equally long integer arrays "Step", "Column" and "Row" sorted by
+# step. Column 0 is the left of the grid and row 0 its top. Patterns are placed on an obstacle
+# with Obstacle.add_pattern, which maps steps to counts and cells to positions.
+
+def grid(columns: int, rows: int) -> tuple[np.ndarray, np.ndarray]:
+    """Returns the column and row of every cell of a grid in row-major order."""
+    row, column = np.divmod(np.arange(columns*rows, dtype=np.int64), columns)
+    return column, row
+
+def cells(steps: np.ndarray, column: np.ndarray, row: np.ndarray) -> dict[str, np.ndarray]:
+    """Returns the pattern firing the input cells on the input steps, ordered by step."""
+    order = np.argsort(steps, kind="stable")
+    return {"Step": np.asarray(steps, dtype=np.int64)[order],
+            "Column": np.asarray(column, dtype=np.int64)[order],
+            "Row": np.asarray(row, dtype=np.int64)[order]}
+
+def sweep(columns: int, rows: int, direction: str="Right", width: int=1) -> dict[str, np.ndarray]:
+    """Returns a line of cells sweeping across the grid, width cells at a time.
+
+    direction is one of "Right", "Left", "Down" and "Up", or a diagonal such as "Down right".
+    """
+    column, row = grid(columns, rows)
+    moves = {"Right": column,
+             "Left": columns - 1 - column,
+             "Down": row,
+             "Up": rows - 1 - row}
+    steps = sum(moves[word.capitalize()] for word in direction.split())
+    return cells(steps // width, column, row)
+
+def spiral(columns: int,
+           rows: int,
+           clockwise: bool=True,
+           inward: bool=True,
+           width: int=1) -> dict[str, np.ndarray]:
+    """Returns a spiral through every cell of the grid, starting at a top corner and moving width
+    cells each step. The spiral is reversed if inward is false.
+    """
+    column, row = grid(columns, rows)
+    if not clockwise:
+        column = columns - 1 - column
+
+    # Each cell lies on a ring, numbered from the border inwards. A ring is walked clockwise from
+    # its top left corner, and follows all of the cells of the rings outside it.
+    ring = np.minimum.reduce([column, row, columns - 1 - column, rows - 1 - row])
+    right, bottom = columns - 1 - ring, rows - 1 - ring
+    ring_width, ring_height = right - ring + 1, bottom - ring + 1
+    along = np.select([row == ring,
+                       column == right,
+                       row == bottom],
+                      [column - ring,
+                       ring_width - 1 + row - ring,
+                       ring_width + ring_height - 2 + right - column],
+                      2*ring_width + ring_height - 3 + bottom - row)
+    order = columns*rows - (columns - 2*ring)*(rows - 2*ring) + along
+    if not inward:
+        order = columns*rows - 1 - order
+    if not clockwise:
+        column = columns - 1 - column
+    return cells(order // width, column, row)
+
+def checkerboard(columns: int, rows: int, steps: int=2, size: int=1) -> dict[str, np.ndarray]:
+    """Returns a checkerboard of size x size squares cycling through the input number of steps,
+    so that neighbouring squares fire on consecutive steps.
+    """
+    column, row = grid(columns, rows)
+    return cells((column // size + row // size) % steps, column, row)
+
+def rings(columns: int,
+          rows: int,
+          center: tuple=None,
+          shape: str="Square",
+          inward: bool=False) -> dict[str, np.ndarray]:
+    """Returns rings expanding from a center cell, one ring each step. The center defaults to the
+    middle of the grid, and the rings are squares or, if shape is "Circle", circles. The rings
+    contract towards the center instead if inward is true.
+    """
+    column, row = grid(columns, rows)
+    if center is None:
+        center = ((columns - 1) / 2, (rows - 1) / 2)
+    dx, dy = np.abs(column - center[0]), np.abs(row - center[1])
+    if shape == "Circle":
+        distance = np.rint(np.hypot(dx, dy))
+    else:
+        distance = np.floor(np.maximum(dx, dy))
+    steps = distance.astype(np.int64)
+    if inward:
+        steps = steps.max() - steps
+    return cells(steps, column, row)
+
+def random_fill(columns: int,
+                rows: int,
+                steps: int,
+                density: float=0.5,
+                seed: int=0) -> dict[str, np.ndarray]:
+    """Returns a random selection of cells on each step, each cell being chosen with probability
+    density. The same seed always gives the same pattern.
+    """
+    chosen = np.random.default_rng(seed).random((steps, rows, columns)) < density
+    step, row, column = np.nonzero(chosen)
+    return cells(step, column, row)
+
+# The patterns by name, for menus.
+patterns = {"Sweep": sweep,
+            "Spiral": spiral,
+            "Checkerboard": checkerboard,
+            "Rings": rings,
+            "Random": random_fill}
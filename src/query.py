@@ -0,0 +1,118 @@
+from collections import namedtuple
+import numpy as np
+from src.event_store import EventTable, GroupIndex
+
+class EventQuery:
+    """A lazily evaluated selection of the events in one table of an obstacle, created with
+    Obstacle.events and narrowed with where, as in:
+        ob.events("Explosions").where(count=range(5, 10), location=3)
+
+    Nothing is read until the query is iterated or its rows are requested. Counts and locations
+    are given and returned as positions, as in the obstacle's data frames. A predicate on a column
+    with a group index, such as the count or the location, selects its rows through the index, and
+    the remaining predicates are evaluated on those rows only.
+
+    Iterating yields named tuples whose fields are the column names in lower case, with spaces
+    and slashes replaced by underscores, such as event.count, event.add_remove and event.x.
+    """
+    # The named tuple type of the events of each table, created on first use.
+    event_types = {}
+
+    def __init__(self, ob, table: EventTable, predicates: tuple=()):
+        self.ob = ob
+        self.table = table
+        self.predicates = predicates
+
+    @staticmethod
+    def field(name: str) -> str:
+        """Returns the field name of a column in the named tuples yielded by a query."""
+        return name.lower().replace(" ", "_").replace("/", "_")
+
+    def column_name(self, field: str) -> str:
+        """Returns the column name of a field name, or raises a KeyError."""
+        for name in self.table.names:
+            if field in (name, self.field(name)):
+                return name
+        raise KeyError(field)
+
+    def where(self, predicates: dict=None, **fields) -> "EventQuery":
+        """Returns a query selecting the events of this query which also satisfy the predicates.
+
+        Predicates are given as a dictionary keyed by column name or as keyword arguments named by
+        field. A value of the form range, list, tuple or set matches any of its elements, a
+        callable is called with an array of column values and returns a boolean mask, and any other
+        value must be equal to the column value.
+        """
+        predicates = dict(predicates or {})
+        predicates.update(fields)
+        added = tuple((self.column_name(name), value) for name, value in predicates.items())
+        return EventQuery(self.ob, self.table, self.predicates + added)
+
+    def encode(self, name: str, values: list) -> np.ndarray:
+        """Translates values of a column as seen by callers to stored values."""
+        if name == "Count":
+            return np.array([self.ob.counts.id(value) for value in values], dtype=np.int64)
+        if name.startswith("Location"):
+            return np.array([self.ob.location_order.id(value) for value in values], dtype=np.int64)
+        return np.array(values, dtype=self.table.columns[name].dtype)
+
+    def rows(self) -> np.ndarray:
+        """Returns the sorted ids of the rows selected by the query."""
+        table = self.table
+        rows = None
+        filters = []
+        for name, value in self.predicates:
+            if callable(value):
+                filters.append((name, value))
+                continue
+            values = value if isinstance(value, (range, list, tuple, set, frozenset)) else [value]
+            stored = self.encode(name, list(values))
+
+            # The first predicate on an indexed column selects the candidate rows.
+            if rows is None and isinstance(table.indexes.get(name), GroupIndex):
+                groups = [table.lookup(name, (key,)) for key in np.unique(stored).tolist()]
+                rows = np.sort(np.concatenate([np.zeros(0, dtype=np.int64)] + groups))
+            else:
+                filters.append((name, stored))
+        if rows is None:
+            rows = table.rows()
+        for name, test in filters:
+            if not len(rows):
+                break
+            if callable(test):
+                rows = rows[np.asarray(test(table.decoded(name, rows)), dtype=bool)]
+            else:
+                rows = rows[np.isin(table.columns[name][rows], test)]
+        return rows
+
+    def __len__(self) -> int:
+        """Returns the number of events selected by the query."""
+        return len(self.rows())
+
+    def column(self, name: str) -> np.ndarray:
+        """Returns the values of a column for the selected events."""
+        name = self.column_name(name)
+        return self.table.decoded(name, self.rows())
+
+    @classmethod
+    def tuple_type(cls, names: list[str]) -> type:
+        """Returns the named tuple type of events with the input columns."""
+        event_type = cls.event_types.get(tuple(names))
+        if event_type is None:
+            event_type = namedtuple("Event", [cls.field(name) for name in names])
+            cls.event_types[tuple(names)] = event_type
+        return event_type
+
+    def event_type(self) -> type:
+        """Returns the named tuple type of the events of the table."""
+        return self.tuple_type(self.table.names)
+
+    def __iter__(self):
+        """Yields the selected events as named tuples of Python values in row order."""
+        rows = self.rows()
+        columns = [self.table.decoded(name, rows).tolist() for name in self.table.names]
+        return map(self.event_type()._make, zip(*columns))
+
+    def frame(self) -> "pandas.DataFrame":
+        """Returns the selected events as a data frame in the layout of the obstacle's frames."""
+        return self.table.frame_of(self.rows())
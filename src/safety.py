@@ -0,0 +1,224 @@
+import math
+import numpy as np
+
+# Single bit shifts of 64-bit words.
+one = np.uint64(1)
+last_bit = np.uint64(63)
+
+def pack(grid: np.ndarray) -> np.ndarray:
+    """Returns a boolean grid of rows x columns cells, or a stack of them, as a bitset of 64-bit
+    words, where bit c % 64 of word c // 64 of a row holds column c.
+    """
+    packed = np.packbits(grid, axis=-1, bitorder="little")
+    padding = -packed.shape[-1] % 8
+    if padding:
+        packed = np.concatenate([packed, np.zeros(packed.shape[:-1] + (padding,), np.uint8)], -1)
+    return np.ascontiguousarray(packed).view("<u8")
+
+def spread(cells: np.ndarray, free: np.ndarray, diagonal: bool=True) -> np.ndarray:
+    """Returns the free cells of a bitset which are at most one step away from its cells."""
+    horizontal = cells.copy()
+    horizontal |= cells << one
+    horizontal[:, 1:] |= cells[:, :-1] >> last_bit
+    horizontal |= cells >> one
+    horizontal[:, :-1] |= cells[:, 1:] << last_bit
+    vertical = horizontal if diagonal else cells
+    reached = horizontal.copy()
+    reached[1:] |= vertical[:-1]
+    reached[:-1] |= vertical[1:]
+    return reached & free
+
+class SafetyMap:
+    """A simulation of a runner crossing an obstacle, used to check that it can be completed.
+
+    The area around the locations is divided into square cells. Each count fires on the frame
+    given by the obstacle's timing, and an explosion kills the runner in any cell overlapping the
+    area of its location centered at the explosion, as in the generated triggers. Between counts
+    the runner moves at speed pixels per frame, one cell at a time, and may not enter cells
+    holding a wall. Teleports are ignored.
+
+    The cells reachable at each count are searched breadth first as bitsets of 64-bit words, one
+    row of the grid per row of the bitset, so a step advances every reachable cell at once.
+    """
+
+    def __init__(self,
+                 ob,
+                 location_rects: list[tuple],
+                 cell_size: float=32,
+                 speed: float=4,
+                 region: tuple=None,
+                 diagonal: bool=True):
+        """location_rects holds the scene coordinates of the top-left corner of each location, in
+        order of number, and its width and height in cells of 32 pixels, as returned by
+        Canvas.location_rect. region is the area searched as (x, y, width, height) in pixels, which
+        defaults to the locations with a margin of one cell.
+        """
+        self.ob = ob
+        self.cell_size = cell_size
+        self.speed = speed
+        self.diagonal = diagonal
+        self.rects = np.asarray(location_rects, dtype=np.float64).reshape(-1, 4)
+        if region is None:
+            left, top = self.rects[:, :2].min(0) - cell_size
+            right, bottom = (self.rects[:, :2] + 32*self.rects[:, 2:]).max(0) + cell_size
+            region = (left, top, right - left, bottom - top)
+        self.origin = region[:2]
+        self.columns = math.ceil(region[2] / cell_size)
+        self.rows = math.ceil(region[3] / cell_size)
+        self.num_counts = len(ob.delays)
+        self.inside = pack(np.ones((self.rows, self.columns), dtype=bool))
+        self.kills = self.rasterize_explosions()
+        self.walls = self.rasterize_walls()
+
+    def cell_at(self, x: float, y: float) -> tuple[int, int]:
+        """Returns the (column, row) of the cell containing a point in scene coordinates."""
+        return (int((x - self.origin[0]) // self.cell_size),
+                int((y - self.origin[1]) // self.cell_size))
+
+    def cell_ranges(self, left, top, right, bottom) -> tuple:
+        """Returns the first and past-the-end columns and rows of the cells overlapping arrays of
+        rectangles in scene coordinates, clipped to the grid.
+        """
+        x, y, size = self.origin[0], self.origin[1], self.cell_size
+        return (np.clip(np.floor((left - x) / size), 0, self.columns).astype(np.int64),
+                np.clip(np.ceil((right - x) / size), 0, self.columns).astype(np.int64),
+                np.clip(np.floor((top - y) / size), 0, self.rows).astype(np.int64),
+                np.clip(np.ceil((bottom - y) / size), 0, self.rows).astype(np.int64))
+
+    def rasterize_explosions(self) -> np.ndarray:
+        """Returns the bitsets of the cells in which the explosions of each count kill."""
+        kills = np.zeros((self.num_counts,) + self.inside.shape, dtype=np.uint64)
+        table = self.ob.explosion_table
+        rows = table.rows()
+        if not len(rows) or not len(self.rects):
+            return kills
+        counts = table.decoded("Count", rows)
+        rects = self.rects[table.decoded("Location", rows) - 1]
+        center_x = rects[:, 0] + table.column("x")[rows]
+        center_y = rects[:, 1] + table.column("y")[rows]
+        half_width, half_height = 16*rects[:, 2], 16*rects[:, 3]
+        areas = np.column_stack([counts, *self.cell_ranges(center_x - half_width,
+                                                           center_y - half_height,
+                                                           center_x + half_width,
+                                                           center_y + half_height)])
+        areas = np.unique(areas[(areas[:, 1] < areas[:, 2]) & (areas[:, 3] < areas[:, 4])], axis=0)
+        if not len(areas):
+            return kills
+
+        # The areas of each count are drawn with a summed difference grid.
+        starts = np.flatnonzero(np.r_[True, areas[1:, 0] != areas[:-1, 0]])
+        for block in np.split(areas, starts[1:]):
+            count, first_column, end_column, first_row, end_row = block.T
+            grid = np.zeros((self.rows + 1, self.columns + 1), dtype=np.int32)
+            np.add.at(grid, (first_row, first_column), 1)
+            np.add.at(grid, (first_row, end_column), -1)
+            np.add.at(grid, (end_row, first_column), -1)
+            np.add.at(grid, (end_row, end_column), 1)
+            grid = grid.cumsum(0).cumsum(1)[:-1, :-1] > 0
+            kills[count[0] - 1] = pack(grid)
+        return kills
+
+    def rasterize_walls(self) -> np.ndarray:
+        """Returns the bitsets of the cells holding a wall during the delay after each count."""
+        walls = np.zeros((self.num_counts,) + self.inside.shape, dtype=np.uint64)
+        table = self.ob.wall_table
+        rows = table.rows()
+        if not len(rows) or not len(self.rects):
+            return walls
+        counts = table.decoded("Count", rows)
+        locations = table.decoded("Location", rows)
+        rects = self.rects[locations - 1]
+        column = ((rects[:, 0] + table.column("x")[rows] - self.origin[0]) // self.cell_size)
+        row = ((rects[:, 1] + table.column("y")[rows] - self.origin[1]) // self.cell_size)
+        placed = table.column("Add/Remove")[rows] == 2
+
+        # The last event of each slot at or before a count decides whether the slot holds a wall.
+        # Obstacles repeat, so the events of the previous cycle come first. On the same count, a
+        # removal follows a placement.
+        slot_keys = np.column_stack([locations, table.column("x")[rows], table.column("y")[rows]])
+        slots, slot = np.unique(slot_keys, axis=0, return_inverse=True)
+        slot = slot.reshape(-1)
+        order = np.lexsort([~placed, counts, slot])
+        state = np.full((len(slots), 2*self.num_counts), -1, dtype=np.int64)
+        for cycle in range(2):
+            state[slot[order], cycle*self.num_counts + counts[order] - 1] = order
+        latest = np.where(state >= 0, np.arange(2*self.num_counts), 0)
+        latest = np.maximum.accumulate(latest, axis=1)[:, self.num_counts:]
+        event = np.take_along_axis(state, latest, axis=1)
+        present_slot, present_count = np.nonzero(placed[event])
+
+        # Walls outside the grid don't block anything.
+        cell_column = column[event[present_slot, present_count]].astype(np.int64)
+        cell_row = row[event[present_slot, present_count]].astype(np.int64)
+        inside = ((cell_column >= 0) & (cell_column < self.columns)
+                  & (cell_row >= 0) & (cell_row < self.rows))
+        cell_column, cell_row = cell_column[inside], cell_row[inside]
+        bits = one << (cell_column % 64).astype(np.uint64)
+        np.bitwise_or.at(walls, (present_count[inside], cell_row, cell_column // 64), bits)
+        return walls
+
+    def on_grid(self, cell: tuple[int, int]) -> bool:
+        """Checks if a (column, row) pair is a cell of the grid."""
+        return 0 <= cell[0] < self.columns and 0 <= cell[1] < self.rows
+
+    def contains(self, cells: np.ndarray, cell: tuple[int, int]) -> bool:
+        """Checks if a bitset holds the cell at (column, row)."""
+        column, row = cell
+        return bool((int(cells[row, column // 64]) >> (column % 64)) & 1)
+
+    def solve(self,
+              start: tuple[int, int],
+              end: tuple[int, int],
+              count: int=1,
+              max_frames: int=None) -> dict:
+        """Searches for a safe path between two cells, given as (column, row).
+
+        The runner stands on the start cell when the count at the input position fires, and must
+        survive it. The search follows the repeating obstacle for up to max_frames frames, which
+        defaults to two cycles plus the time needed to walk through every cell of the grid, and
+        stops early once it repeats itself. Returns a dictionary with the keys "Safe", "Frame" and
+        "Count", where "Frame" is the earliest number of frames after the runner starts at which
+        the end cell is reached and "Count" is the count which fired last at that point, both None
+        if the end cell can't be reached.
+        """
+        result = {"Safe": False, "Frame": None, "Count": None}
+        if not all(self.on_grid(cell) for cell in [start, end]):
+            return result
+        timing = self.ob.timing
+        if max_frames is None:
+            walk = math.ceil(self.rows*self.columns*self.cell_size / self.speed)
+            max_frames = 2*timing.cycle_length() + walk
+        cells = np.zeros_like(self.inside)
+        cells[start[1], start[0] // 64] = one << np.uint64(start[0] % 64)
+        cells &= ~self.kills[count - 1]
+        first_frame = timing.start(count)
+        if self.contains(cells, end):
+            return {"Safe": True, "Frame": 0, "Count": count}
+
+        # Each time the first count fires, the search is in a state given by the reachable cells and
+        # the progress towards the next step. A state seen before means the search repeats itself
+        # without reaching the end, which is detected by comparing with the state after 2^k cycles.
+        saved, cycle, power = None, 0, 1
+        position, frame = count, first_frame
+        while frame - first_frame < max_frames:
+            if position == count:
+                state = (frame*self.speed % self.cell_size, cells)
+                if saved is not None and saved[0] == state[0] and np.array_equal(saved[1], cells):
+                    break
+                cycle += 1
+                if cycle == power:
+                    saved, power = (state[0], cells.copy()), 2*power
+            end_frame = frame + timing.duration(position)
+            free = self.inside & ~self.walls[position - 1]
+            first_step = math.floor(frame*self.speed / self.cell_size) + 1
+            for step in range(first_step, math.floor(end_frame*self.speed / self.cell_size) + 1):
+                cells = spread(cells, free, self.diagonal)
+                if self.contains(cells, end):
+                    arrival = max(math.ceil(step*self.cell_size / self.speed), frame)
+                    return {"Safe": True, "Frame": arrival - first_frame, "Count": position}
+            position = position % self.num_counts + 1
+            frame = end_frame
+            cells &= ~self.kills[position - 1]
+            if not cells.any():
+                break
+        return result
@@ -1,13 +1,57 @@
-import pandas as pd
+import csv
 from src import read_write
 
-event_data = pd.read_csv(read_write.get_path("Event Data")).set_index("ID")
-event_data["Subtype"].fillna(value="Crashes SC", inplace=True)
+def parse(value: str):
+    """Returns the value of a cell of the event data, where numbers are read as integers and blank
+    cells as None.
+    """
+    if value == "":
+        return None
+    return int(value) if value.lstrip("-").isdigit() else value
+
+# The event data is read into a dictionary of events keyed by ID, in file order. Each event is a
+# dictionary of its columns.
+with open(read_write.get_path("Event Data"), 'r', newline='') as file:
+    reader = csv.DictReader(file)
+    events = {}
+    for row in reader:
+        event = {name: parse(value) for name, value in row.items()}
+        if event["Subtype"] is None:
+            event["Subtype"] = "Crashes SC"
+        events[event["ID"]] = event
+    event_columns = [name for name in reader.fieldnames if name != "ID"]
 # def change(subtype):
     # return "No crash" if subtype == "Does not crash SC" else subtype
-# event_data["Subtype"] = event_data["Subtype"].apply(lambda x: change(x))
 
-name_to_ID = {v: k for k, v in event_data["Name"].to_dict().items()}
+name_to_ID = {event["Name"]: ID for ID, event in events.items()}
+
+def events_with(column: str) -> dict[int, dict]:
+    """Returns the events which have a value in the input column, such as an image, keyed by ID."""
+    return {ID: event for ID, event in events.items() if event[column] is not None}
+
+def where(selection: dict[int, dict], column: str, value) -> dict[int, dict]:
+    """Returns the events of a selection whose value in the input column equals the input value."""
+    return {ID: event for ID, event in selection.items() if event[column] == value}
+
+def unique(selection: dict[int, dict], column: str) -> list:
+    """Returns the distinct values of a column in a selection of events in order of appearance."""
+    return list(dict.fromkeys(event[column] for event in selection.values()))
+
+def sort_by(selection: dict[int, dict], column: str) -> list[dict]:
+    """Returns the events of a selection sorted by the values of the input column."""
+    return sorted(selection.values(), key=lambda event: event[column])
+
+def __getattr__(name: str):
+    """Returns the event data as a pandas data frame indexed by ID, which is built on first access
+    for interoperation with pandas. pandas is not needed otherwise.
+    """
+    if name != "event_data":
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    import pandas as pd
+    event_data = pd.DataFrame.from_dict(events, orient="index", columns=event_columns)
+    event_data.index.name = "ID"
+    globals()["event_data"] = event_data
+    return event_data
 
 file = open(read_write.get_path("Unit List"), 'r')
 unit_list = [line.rstrip() for line in file.readlines()]
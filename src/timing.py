@@ -0,0 +1,120 @@
+import numpy as np
+from src.event_store import CountOrder
+
+class CountTiming:
+    """The timing of the counts of an obstacle in game frames, kept as prefix sums of the delays.
+
+    Delays are frames when the obstacle uses frames and waits in milliseconds otherwise, where a
+    wait of 42*(n - 1) lasts n frames. Count k fires on frame start(k), counting from 0 at the
+    first count, and obstacles repeat every cycle_length() frames.
+
+    The timing observes the count order. The frames of the delays are kept in a Fenwick tree over
+    positions, so a delay edit and each query by count or frame take O(log n) time. Inserting or
+    deleting a count shifts every later position, so it deliberately marks the tree stale and the
+    next query rebuilds it in one vectorized O(n) pass, which also keeps batched inserts, such as
+    pasted count ranges, to one rebuild.
+    """
+
+    def __init__(self, counts: CountOrder, use_frames: bool):
+        self.counts = counts
+        self.use_frames = use_frames
+
+        # durations[k - 1] is the number of frames of the delay following count k, and tree[k]
+        # is the sum of durations over the k & -k positions ending at position k.
+        self.durations = []
+        self.tree = [0]
+        self.total = 0
+        self.stale = True
+        counts.add_observer(self.count_changed)
+
+    def frames(self, delay: int) -> int:
+        """Returns the number of frames a delay lasts."""
+        return max(int(delay), 1) if self.use_frames else 1 + max(int(delay), 0) // 42
+
+    def set_timing_type(self, use_frames: bool) -> None:
+        """Sets the unit delays are read in to frames if use_frames is true or waits otherwise."""
+        if use_frames != self.use_frames:
+            self.use_frames = use_frames
+            self.stale = True
+
+    def invalidate(self) -> None:
+        """Marks the prefix sums stale after the count order was replaced without notification."""
+        self.stale = True
+
+    def count_changed(self, ID: int, kind: str) -> None:
+        """Updates the prefix sums after a count was inserted, deleted or had its delay changed."""
+        if kind != "Delay" or self.stale:
+            self.stale = True
+            return
+        position = self.counts.position(ID)
+        delta = self.frames(self.counts.delays[ID]) - self.durations[position - 1]
+        if not delta:
+            return
+        self.durations[position - 1] += delta
+        self.total += delta
+        while position < len(self.tree):
+            self.tree[position] += delta
+            position += position & -position
+
+    def rebuild(self) -> None:
+        """Recomputes the prefix sums from the delays if they are stale."""
+        if not self.stale:
+            return
+        ids = self.counts.ids
+        delays = np.fromiter(map(self.counts.delays.__getitem__, ids), np.int64, len(ids))
+        if self.use_frames:
+            durations = np.maximum(delays, 1)
+        else:
+            durations = 1 + np.maximum(delays, 0) // 42
+
+        # Each node of the tree is the difference of two prefix sums.
+        ends = np.r_[0, np.cumsum(durations)]
+        positions = np.arange(len(ids) + 1)
+        self.tree = (ends - ends[positions - (positions & -positions)]).tolist()
+        self.durations = durations.tolist()
+        self.total = int(ends[-1])
+        self.stale = False
+
+    def cycle_length(self) -> int:
+        """Returns the number of frames the obstacle takes before it repeats."""
+        self.rebuild()
+        return self.total
+
+    def start(self, count: int) -> int:
+        """Returns the frame on which the count at the input position fires."""
+        self.rebuild()
+        frame = 0
+        position = count - 1
+        while position > 0:
+            frame += self.tree[position]
+            position -= position & -position
+        return frame
+
+    def duration(self, count: int) -> int:
+        """Returns the number of frames between the count at the input position and the next."""
+        self.rebuild()
+        return self.durations[count - 1]
+
+    def count_at(self, frame: int) -> int:
+        """Returns the position of the count which is active on the input frame. Frames past the
+        end of the cycle wrap around, since obstacles repeat.
+        """
+        length = self.cycle_length()
+        if not length:
+            return 0
+
+        # Descends the tree to the last count whose delay ends at or before the frame.
+        remaining = frame % length
+        position = 0
+        step = 1 << (len(self.durations).bit_length() - 1)
+        while step:
+            if position + step < len(self.tree) and self.tree[position + step] <= remaining:
+                position += step
+                remaining -= self.tree[position]
+            step >>= 1
+        return position + 1
+
+    def starts(self) -> np.ndarray:
+        """Returns the frame on which each count fires, ordered by position."""
+        self.rebuild()
+        return np.r_[0, np.cumsum(self.durations, dtype=np.int64)][:len(self.durations)]
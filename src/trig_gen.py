@@ -1,6 +1,14 @@
 from collections import deque
-import pandas as pd
+from concurrent.futures import Future, ProcessPoolExecutor
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+from typing import Iterator, TextIO
+import numpy as np
 from src import sc_data
+from src.query import EventQuery
 
 def deaths(player: str, unit: str, quantifier: str, num: int) -> str:
     """Returns a death count condition."""
@@ -120,11 +128,11 @@ def move_loc(ID: int, position_delta: list[int]):
     
 def is_unit(explosion_ID):
     """Checks if explosion_ID corresponds to a unit or a sprite."""
-    return sc_data.event_data.loc[explosion_ID]['Type'] == 'Unit'
+    return sc_data.events[explosion_ID]['Type'] == 'Unit'
     
 def get_unit(explosion_ID):
     """Gets the unit name corresponding to explosion_ID."""
-    return sc_data.event_data.loc[explosion_ID]['Name']
+    return sc_data.events[explosion_ID]['Name']
     
 def get_player(num: int) -> str:
     """Converts a number to a string describing a player in a Starcraft trigger."""
@@ -139,10 +147,10 @@ def count_triggers(use_frames: bool,
                    location_names: list[int],
                    location_IDs: list[int],
                    location_centers: list[int],
-                   explosions: pd.DataFrame,
-                   walls: pd.DataFrame,
-                   teleports: pd.DataFrame,
-                   audio_mapping: pd.DataFrame,
+                   explosions: list[tuple],
+                   walls: list[tuple],
+                   teleports: list[tuple],
+                   audio_mapping: list[tuple],
                    num_counts: int,
                    count_num: int,
                    ob_num: int,
@@ -152,7 +160,11 @@ def count_triggers(use_frames: bool,
                    bounding_unit: str,
                    force_name: str,
                    comment_options: dict) -> str:
-    """Generates the triggers to create a count of an obstacle."""
+    """Generates the triggers to create a count of an obstacle.
+    
+    The events of the count are given as the named tuples yielded by Obstacle.events, in row
+    order.
+    """
     add_comments = comment_options['Add comments']
     DC_player = death_count_options['Player']
     ob_tracker_unit = death_count_options['Ob']
@@ -163,12 +175,9 @@ def count_triggers(use_frames: bool,
     
     # Generate audio mapping trigger if an audio mapping has been applied to this count.
     if use_frames:
-        # Add a new column indicating how many frames before the explosion the trigger should fire.
-        frames = pd.DataFrame(columns=['Frames'], data=audio_mapping.apply(
-            lambda row: int(sc_data.event_data.loc[row['Explosion']]['Audio']),
-            axis=1
-        ))
-        audio = pd.concat([audio_mapping, frames], axis=1)
+        # Find how many frames before each explosion its audio trigger should fire.
+        audio = [(int(sc_data.events[event.explosion]['Audio']), event)
+                 for event in audio_mapping]
 
         # The audio trigger should fire when the death counter for the count tracking unit is equal
         # to the current count, unless the previous delay was 1 frame and the audio needs to play 1
@@ -176,10 +185,9 @@ def count_triggers(use_frames: bool,
         # is equal to the previous count.
         prev_count = (count_num - 2) % num_counts + 1
         audio_actions = [[], []]
-        for frames in audio['Frames'].unique():
-            for index, row in audio[audio['Frames'] == frames].iterrows():
-                explosion_ID = row.loc['Explosion']
-                DC_unit_index = row.loc['DC Unit']
+        for frames in dict.fromkeys(frames for frames, event in audio):
+            for event in [event for event_frames, event in audio if event_frames == frames]:
+                DC_unit_index = event.dc_unit
                 DC_unit = sc_data.unit_list[DC_unit_index]
                 audio_actions[frames - 1].append(set_deaths(force_name,
                                                             DC_unit,
@@ -226,26 +234,24 @@ def count_triggers(use_frames: bool,
     sprite_used = False
     prev_explosion_ID = -1
     # Iterate through all locations with explosion events which occur during the input count.
-    for loc in sorted(explosions['Location'].unique().astype(int)):
-        explosions_loc = explosions[explosions['Location'] == loc].sort_values(['y', 'x'])
+    for loc in sorted({event.location for event in explosions}):
+        explosions_loc = sorted((event for event in explosions if event.location == loc),
+                                key=lambda event: (event.y, event.x))
         loc_name = location_names[loc - 1]
         ID = location_IDs[loc - 1]
         center_x, center_y = location_centers[loc - 1]
         prev_x, prev_y = center_x, center_y
-        positions = {
-            (event.loc['x'], event.loc['y']) for index, event in explosions_loc.iterrows()
-        }
+        positions = {(event.x, event.y) for event in explosions_loc}
         
         # Iterate through all positions at which an explosion occurs at the given location.
         for (x, y) in positions:
-            explosions_loc_pos = explosions_loc[(explosions_loc['x'] == x)
-                                                & (explosions_loc['y'] == y)]
+            explosions_loc_pos = [event for event in explosions_loc
+                                  if event.x == x and event.y == y]
             
             # Iterate through all explosions occuring at the given location and position.
-            for index, event in explosions_loc_pos.iterrows():
-                player = get_player(event.loc['Player'])
-                explosion_ID = event.loc['Explosion']
-                x, y = event.loc['x'], event.loc['y']
+            for event in explosions_loc_pos:
+                player = get_player(event.player)
+                explosion_ID = event.explosion
                 
                 # Move the location to the position of the explosion.
                 actions.extend(move_loc(ID, [x - prev_x, y - prev_y]))
@@ -276,19 +282,20 @@ def count_triggers(use_frames: bool,
         actions.extend(move_loc(ID, [center_x - prev_x, center_y - prev_y]))
                 
     # Iterate through all locations with wall events which occur during the input count.
-    for loc in sorted(walls['Location'].unique().astype(int)):
-        walls_loc = walls[walls['Location'] == loc].sort_values(['x', 'y'])
+    for loc in sorted({event.location for event in walls}):
+        walls_loc = sorted((event for event in walls if event.location == loc),
+                           key=lambda event: (event.x, event.y))
         loc_name = location_names[loc - 1]
         ID = location_IDs[loc - 1]
         center_x, center_y = location_centers[loc - 1]
         prev_x, prev_y = center_x, center_y
         
         # Iterate through all wall events occuring at the given location.
-        for index, event in walls_loc.iterrows():
-            player = get_player(event.loc['Player'])
-            unit = get_unit(event.loc['Unit'])
-            add_remove = event.loc['Add/Remove']
-            x, y = event.loc['x'], event.loc['y']
+        for event in walls_loc:
+            player = get_player(event.player)
+            unit = get_unit(event.unit)
+            add_remove = event.add_remove
+            x, y = event.x, event.y
             
             # Move the location to the position of the explosion.
             position_delta = [x - prev_x, y - prev_y]
@@ -308,14 +315,17 @@ def count_triggers(use_frames: bool,
         actions.extend(move_loc(ID, [center_x - prev_x, center_y - prev_y]))
 
     # Iterate through all teleport events which occur during the input count.
-    for index, event in teleports.sort_values('Location from').iterrows():
-        player_from = get_player(event.loc['Player from'])
-        image_from = event.loc['Image from']
-        loc_from = event.loc['Location from']
+    # The events are ordered as by pandas' default sort, which isn't stable.
+    order = np.argsort(np.array([event.location_from for event in teleports], dtype=np.int64),
+                       kind='quicksort')
+    for event in [teleports[i] for i in order]:
+        player_from = get_player(event.player_from)
+        image_from = event.image_from
+        loc_from = event.location_from
         loc_from_name = location_names[loc_from - 1]
-        player_to = get_player(event.loc['Player to'])
-        image_to = event.loc['Image to']
-        loc_to = event.loc['Location to']
+        player_to = get_player(event.player_to)
+        image_to = event.image_to
+        loc_to = event.location_to
         loc_to_name = location_names[loc_to - 1]
         data_from = [player_from, image_from, loc_from_name]
         data_to = [player_to, image_to, loc_to_name]
@@ -389,6 +399,267 @@ def count_triggers(use_frames: bool,
                                    actions_trigger))
     return '\n\n'.join(triggers)
                   
+# The kinds of events passed to count_triggers, in order.
+event_kinds = ["Explosions", "Walls", "Teleports", "Audio"]
+
+def event_columns(ob) -> tuple[dict, dict]:
+    """Returns the events of an obstacle sorted by count and the bounds of each count.
+
+    The events are dictionaries of column arrays keyed by kind of event, with counts and locations
+    as positions. The events of a kind on count k are rows bounds[kind][k - 1] through
+    bounds[kind][k] - 1, in row order as yielded by Obstacle.events.
+    """
+    columns, bounds = {}, {}
+    for kind in event_kinds:
+        table = ob.events(kind).table
+        rows = table.rows()
+        positions = table.decoded("Count", rows)
+        order = np.argsort(positions, kind="stable")
+        columns[kind] = {name: table.decoded(name, rows)[order] for name in table.names}
+        bounds[kind] = np.searchsorted(positions[order], np.arange(1, len(ob.delays) + 2))
+    return columns, bounds
+
+def event_block(columns: dict, bounds: dict, counts: list[int]) -> tuple[dict, dict]:
+    """Returns the events and bounds of the counts at the input positions, as for event_columns
+    with the counts numbered from 1 in the input order.
+    """
+    block_columns, block_bounds = {}, {}
+    counts = np.asarray(counts, dtype=np.int64)
+    for kind in event_kinds:
+        starts, ends = bounds[kind][counts - 1], bounds[kind][counts]
+        rows = np.concatenate([np.zeros(0, dtype=np.int64)]
+                              + [np.arange(start, end) for start, end in zip(starts, ends)])
+        block_columns[kind] = {name: values[rows] for name, values in columns[kind].items()}
+        block_bounds[kind] = np.r_[0, np.cumsum(ends - starts)]
+    return block_columns, block_bounds
+
+def event_tuples(columns: dict[str, np.ndarray]) -> list[tuple]:
+    """Returns events given as column arrays as the named tuples yielded by Obstacle.events."""
+    event_type = EventQuery.tuple_type(list(columns))
+    return list(map(event_type._make, zip(*[values.tolist() for values in columns.values()])))
+
+def block_triggers(shared: dict, counts: list[int], columns: dict, bounds: dict) -> Iterator[str]:
+    """Yields the triggers of the counts at the input positions from their events as returned by
+    event_block and the arguments of count_triggers shared by all counts.
+    """
+    for i, count_num in enumerate(counts):
+        explosions, walls, teleports, audio_mapping = (
+            event_tuples({name: values[bounds[kind][i]:bounds[kind][i + 1]]
+                          for name, values in columns[kind].items()})
+            for kind in event_kinds
+        )
+        yield count_triggers(shared["Use frames"],
+                             shared["Delays"],
+                             shared["Location names"],
+                             shared["Location IDs"],
+                             shared["Location centers"],
+                             explosions,
+                             walls,
+                             teleports,
+                             audio_mapping,
+                             len(shared["Delays"]),
+                             count_num,
+                             shared["Obstacle number"],
+                             shared["Death count options"],
+                             shared["Trigger player"],
+                             shared["Kill/remove"],
+                             shared["Bounding unit"],
+                             shared["Force name"],
+                             shared["Comment options"])
+
+# The shared arguments of a worker process generating triggers in parallel.
+worker_shared = None
+
+def start_worker(shared: dict) -> None:
+    """Stores the shared arguments in a new worker process."""
+    global worker_shared
+    worker_shared = shared
+
+def worker_triggers(counts: list[int], columns: dict, bounds: dict) -> list[str]:
+    """Generates the triggers of a block of counts in a worker process."""
+    return list(block_triggers(worker_shared, counts, columns, bounds))
+
+def generated_triggers(shared: dict,
+                       columns: dict,
+                       bounds: dict,
+                       counts: list[int],
+                       parallel: bool,
+                       workers: int) -> Iterator[str]:
+    """Yields the triggers of the counts at the input positions in order, from the events of the
+    obstacle as returned by event_columns. The arguments are as for obstacle_trigger_stream.
+    """
+    if not parallel or not counts:
+        if len(counts) < len(shared["Delays"]):
+            columns, bounds = event_block(columns, bounds, counts)
+        yield from block_triggers(shared, counts, columns, bounds)
+        return
+        
+    # A few blocks per worker are in progress at a time. The output of the oldest block is
+    # yielded before another block is submitted, so only the output of the blocks in progress is
+    # held at once. Workers are always spawned rather than forked, as on Windows and macOS, so
+    # every platform imports the caller's main module in the workers the same way.
+    workers = workers or os.cpu_count() or 1
+    block_size = max(1, min(16, len(counts) // (8*workers)))
+    blocks = (counts[i:i + block_size] for i in range(0, len(counts), block_size))
+    
+    def submit(executor: ProcessPoolExecutor, block: list[int]) -> Future:
+        """Submits a block of counts."""
+        return executor.submit(worker_triggers, block, *event_block(columns, bounds, block))
+        
+    with ProcessPoolExecutor(workers,
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=start_worker,
+                             initargs=(shared,)) as executor:
+        pending = deque(submit(executor, block) for block in itertools.islice(blocks, 2*workers))
+        while pending:
+            triggers = pending.popleft().result()
+            for block in itertools.islice(blocks, 1):
+                pending.append(submit(executor, block))
+            yield from triggers
+
+class TriggerCache:
+    """The generated triggers of counts keyed by a hash of everything they depend on, so that
+    only the counts which changed are generated again.
+
+    The key of a count covers its events, its position and delay, the delay of the previous count,
+    which the audio triggers depend on, the number of counts, the locations and the generator
+    options. Entries are kept from earlier generations, so reverting an edit or switching between
+    saves finds the old counts again, and the least recently used entries beyond limit characters
+    of text are dropped, except those of the latest generation. If a path is given, the cache is
+    read from that file and written back to it after every generation.
+    """
+    # Increased whenever the generated triggers change, which invalidates saved caches.
+    version = 1
+
+    def __init__(self, path: str=None, limit: int=2**26):
+        self.path = path
+        self.limit = limit
+
+        # The triggers of each key, from the least to the most recently used.
+        self.triggers = {}
+        if path and os.path.exists(path):
+            with open(path, 'r') as file:
+                data = json.load(file)
+            if data.get("Version") == self.version:
+                self.triggers = data["Triggers"]
+        self.size = sum(map(len, self.triggers.values()))
+
+    @staticmethod
+    def path_for(save_path: str) -> str:
+        """Returns the path of the cache kept next to a save file."""
+        return os.path.splitext(save_path)[0] + ".triggers.json"
+
+    def keys(self, shared: dict, columns: dict, bounds: dict) -> list[str]:
+        """Returns the key of each count from the events of the obstacle as returned by
+        event_columns and the arguments of count_triggers shared by all counts.
+        """
+        delays = shared["Delays"]
+        options = {key: value for key, value in shared.items() if key != "Delays"}
+        options["Counts"] = len(delays)
+        common = hashlib.blake2b(json.dumps(options, sort_keys=True).encode())
+        keys = []
+        for count_num in range(1, len(delays) + 1):
+            key = common.copy()
+            sizes = [int(bounds[kind][count_num] - bounds[kind][count_num - 1])
+                     for kind in event_kinds]
+            prev_count = (count_num - 2) % len(delays) + 1
+            key.update(json.dumps([count_num,
+                                   delays[count_num - 1],
+                                   delays[prev_count - 1],
+                                   sizes]).encode())
+            for kind in event_kinds:
+                start, end = bounds[kind][count_num - 1], bounds[kind][count_num]
+                for values in columns[kind].values():
+                    key.update(values[start:end].tobytes())
+            keys.append(key.hexdigest())
+        return keys
+
+    def get(self, key: str) -> str:
+        """Returns the triggers of a key, or None if they aren't cached, and marks them as the
+        most recently used.
+        """
+        triggers = self.triggers.pop(key, None)
+        if triggers is not None:
+            self.triggers[key] = triggers
+        return triggers
+
+    def add(self, key: str, triggers: str) -> None:
+        """Adds the triggers of a key as the most recently used."""
+        old = self.triggers.pop(key, None)
+        self.size += len(triggers) - (len(old) if old is not None else 0)
+        self.triggers[key] = triggers
+
+    def prune(self, kept: set[str]) -> None:
+        """Drops the least recently used entries until the cache fits in its limit, keeping the
+        entries of the input keys.
+        """
+        for key in list(self.triggers):
+            if self.size <= self.limit or key in kept:
+                break
+            self.size -= len(self.triggers.pop(key))
+
+    def save(self) -> None:
+        """Writes the cache to its file, if it has one."""
+        if not self.path:
+            return
+        with open(self.path, 'w') as file:
+            json.dump({"Version": self.version, "Triggers": self.triggers}, file)
+
+def obstacle_trigger_stream(locations: list,
+                            ob,
+                            ob_num: int,
+                            death_count_options: dict,
+                            trigger_player: str,
+                            kill_remove: str,
+                            bounding_unit: str,
+                            force_name: str,
+                            comment_options: dict,
+                            parallel: bool=False,
+                            workers: int=None,
+                            cache: TriggerCache=None) -> Iterator[str]:
+    """Yields the triggers to create each count of an obstacle in order, so that only one count's
+    text is held at a time.
+
+    If parallel is true, the counts are generated by a pool of worker processes, whose number
+    defaults to the number of CPUs. Blocks of consecutive counts are sent to the workers as column
+    arrays of their events, and the output is identical to serial generation. If a cache is given,
+    only the counts which changed since it was last used are generated.
+    """
+    shared = {"Use frames": ob.use_frames,
+              "Delays": list(ob.delays),
+              "Location names": [loc.name for loc in locations],
+              "Location IDs": [loc.ID for loc in locations],
+              "Location centers": [[loc.center().x(), loc.center().y()] for loc in locations],
+              "Obstacle number": ob_num,
+              "Death count options": death_count_options,
+              "Trigger player": trigger_player,
+              "Kill/remove": kill_remove,
+              "Bounding unit": bounding_unit,
+              "Force name": force_name,
+              "Comment options": comment_options}
+    columns, bounds = event_columns(ob)
+    counts = list(range(1, len(ob.delays) + 1))
+    if cache is None:
+        yield from generated_triggers(shared, columns, bounds, counts, parallel, workers)
+        return
+        
+    # Only the counts whose keys aren't cached are generated, and they are added to the cache as
+    # they are. Old entries are only dropped once the cache is over its limit, and the current
+    # counts are kept.
+    keys = cache.keys(shared, columns, bounds)
+    missing = [count for count, key in zip(counts, keys) if key not in cache.triggers]
+    generated = generated_triggers(shared, columns, bounds, missing, parallel, workers)
+    missing = set(missing)
+    for count, key in zip(counts, keys):
+        if count in missing:
+            triggers = next(generated)
+            cache.add(key, triggers)
+        else:
+            triggers = cache.get(key)
+        yield triggers
+    cache.prune(set(keys))
+    cache.save()
+                             
 def obstacle_triggers(locations: list,
                       ob,
                       ob_num: int,
@@ -397,39 +668,54 @@ def obstacle_triggers(locations: list,
                       kill_remove: str,
                       bounding_unit: str,
                       force_name: str,
-                      comment_options: dict) -> str:
-    """Generates the triggers to create an obstacle."""
-    triggers = []
-    delays = ob.delays
-    use_frames = ob.use_frames
-    num_counts = len(delays)
-    location_names = [loc.name for loc in locations]
-    location_IDs = [loc.ID for loc in locations]
-    location_centers = [[loc.center().x(), loc.center().y()] for loc in locations]
+                      comment_options: dict,
+                      parallel: bool=False,
+                      workers: int=None,
+                      cache: TriggerCache=None) -> str:
+    """Generates the triggers to create an obstacle, optionally in parallel or from a cache as
+    described in obstacle_trigger_stream.
+    """
+    return '\n\n'.join(obstacle_trigger_stream(locations,
+                                               ob,
+                                               ob_num,
+                                               death_count_options,
+                                               trigger_player,
+                                               kill_remove,
+                                               bounding_unit,
+                                               force_name,
+                                               comment_options,
+                                               parallel,
+                                               workers,
+                                               cache))
     
-    # Iterate through each count and create the corresponding triggers.
-
-    for count in range(num_counts):
-        explosions = ob.explosions[ob.explosions["Count"] == count + 1]
-        walls = ob.walls[ob.walls["Count"] == count + 1]
-        teleports = ob.teleports[ob.teleports["Count"] == count + 1]
-        audio_mapping = ob.audio[ob.audio["Count"] == count + 1]
-        triggers.append(count_triggers(use_frames,
-                                       delays,
-                                       location_names,
-                                       location_IDs,
-                                       location_centers,
-                                       explosions,
-                                       walls,
-                                       teleports,
-                                       audio_mapping,
-                                       num_counts,
-                                       count + 1,
-                                       ob_num,
-                                       death_count_options,
-                                       trigger_player,
-                                       kill_remove,
-                                       bounding_unit,
-                                       force_name,
-                                       comment_options))
-    return '\n\n'.join(triggers)
\ No newline at end of file
+def write_obstacle_triggers(file: TextIO,
+                            locations: list,
+                            ob,
+                            ob_num: int,
+                            death_count_options: dict,
+                            trigger_player: str,
+                            kill_remove: str,
+                            bounding_unit: str,
+                            force_name: str,
+                            comment_options: dict,
+                            parallel: bool=False,
+                            workers: int=None) -> None:
+    """Writes the triggers to create an obstacle to a text file one count at a time, as they are
+    generated. The text is the same as returned by obstacle_triggers. No cache is used, since it
+    would hold the text of every count, so only the largest count's text is held at once.
+    """
+    counts = obstacle_trigger_stream(locations,
+                                     ob,
+                                     ob_num,
+                                     death_count_options,
+                                     trigger_player,
+                                     kill_remove,
+                                     bounding_unit,
+                                     force_name,
+                                     comment_options,
+                                     parallel,
+                                     workers)
+    for i, triggers in enumerate(counts):
+        if i:
+            file.write('\n\n')
+        file.write(triggers)
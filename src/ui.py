@@ -125,13 +125,18 @@ class MainUIframe(QFrame):
     set_loc_numbering = pyqtSignal(int)
     delete_loc = pyqtSignal(int)
     delete_locs = pyqtSignal(bool)
+    update_locs = pyqtSignal()
     
     switch_event = pyqtSignal(str)
     switch_placement = pyqtSignal(str)
     set_timing_type = pyqtSignal(bool)
     change_count = pyqtSignal(int)
+    set_delay = pyqtSignal(int, int)
     delete_count = pyqtSignal(int)
     insert_count = pyqtSignal(int)
+    count_deleted = pyqtSignal(int)
+    count_inserted = pyqtSignal(int)
+    count_range = pyqtSignal(int, int)
     
     open_explosion_menu = pyqtSignal(bool)
     explosions_selected = pyqtSignal(list)
@@ -216,6 +221,10 @@ class MainUIframe(QFrame):
         obstacle_UI.change_count.connect(self.change_count)
         obstacle_UI.delete_count.connect(self.delete_count)
         obstacle_UI.insert_count.connect(self.insert_count)
+        obstacle_UI.set_delay.connect(self.set_delay)
+        self.count_deleted.connect(obstacle_UI.count_deleted)
+        self.count_inserted.connect(obstacle_UI.count_inserted)
+        self.count_range.connect(obstacle_UI.count_range)
         
         obstacle_UI.open_explosion_menu.connect(self.open_explosion_menu)
         obstacle_UI.explosion_palette_selection.connect(self.explosion_palette_selection)
@@ -238,6 +247,7 @@ class MainUIframe(QFrame):
         location_UI.set_loc_prefix.connect(obstacle_UI.update_locs)
         location_UI.set_loc_numbering.connect(obstacle_UI.update_locs)
         self.delete_loc.connect(obstacle_UI.delete_loc)
+        self.update_locs.connect(obstacle_UI.update_locs)
         self.delete_teleport.connect(obstacle_UI.delete_teleport)
 
         self.reset.connect(location_UI.reset)
@@ -100,7 +100,7 @@ class AudioMappingDialog(QDialog):
     def add_explosion(self, ID: int) -> None:
         """Adds an explosion and an associated death count menu to the mapping."""
         # If the ID does not correspond to an audioless explosion, do nothing.
-        if sc_data.event_data.loc[ID]["Audio"] == float('NaN'):
+        if sc_data.events[ID]["Audio"] == float('NaN'):
             return
             
         # Moves the buttons down one row.
@@ -115,7 +115,7 @@ class AudioMappingDialog(QDialog):
                 layout.addWidget(widget, row + 1, col)
                 
         # Adds the explosion label and the death count menu.
-        explosion_name = QLabel(sc_data.event_data.loc[ID]["Name"])
+        explosion_name = QLabel(sc_data.events[ID]["Name"])
         death_count_menu = SCMenu(sc_data.unit_list, 260)
         audio_settings = read_write.read_setting("Audio DC unit")
         # Sets a default death count for unit death sprite explosions, else sets a blank default.
@@ -141,15 +141,20 @@ class AudioMappingDialog(QDialog):
     def delete_explosion(self, ID: int) -> None:
         """Removes an explosion and its associated death count menu from the mapping."""
         layout = self.layout()
-        explosion_name = sc_data.event_data.loc[ID]["Name"]
+        explosion_name = sc_data.events[ID]["Name"]
         
-        # Find and remove the explosion label and death count menu.
-        for row in range(1, self.mapping_size + 1):
+        # Find and remove the rows of the explosion. Since the remaining rows move up, the row
+        # index only advances past rows which are kept.
+        row = 1
+        while row <= self.mapping_size:
             widget = layout.itemAtPosition(row, 0).widget()
             if widget.text() != explosion_name:
+                row += 1
                 continue
-            layout.removeWidget(widget)
-            layout.removeWidget(layout.itemAtPosition(row, 1).widget())
+            for col in range(3):
+                widget = layout.itemAtPosition(row, col).widget()
+                layout.removeWidget(widget)
+                widget.deleteLater()
             
             # Move the remaining rows up.
             for other_row in range(row + 1, self.mapping_size + 3):
@@ -18,7 +18,8 @@ from src import read_write
 
 class ExplosionMenuDialog(QDialog):
     """Contains an organized collection of explosion menus."""
-    data = sc_data.event_data[sc_data.event_data["Explosion Image"].notna()]
+    data = sc_data.events_with("Explosion Image")
+    names = {event["Name"] for event in data.values()}
     
     explosions_selected = pyqtSignal(list)
     closed = pyqtSignal(bool)
@@ -35,24 +36,24 @@ class ExplosionMenuDialog(QDialog):
         # We organize the list of explosion options into various lists sorted by whether the
         # explosion is a unit or a sprite, the type of unit, whether or not the sprite crashes
         # Starcraft, etc. This is mostly to keep the menu size manageable.
-        row = self.num_rows(sorted(self.data["Type"].unique())[0]) + 1
-        total_rows = len(self.data["Type"].unique())
+        row = self.num_rows(sorted(sc_data.unique(self.data, "Type"))[0]) + 1
+        total_rows = len(sc_data.unique(self.data, "Type"))
         image_path = read_write.get_path("Explosion")
         
-        for i, main_type in enumerate(sorted(self.data["Type"].unique())):
+        for i, main_type in enumerate(sorted(sc_data.unique(self.data, "Type"))):
             layout.addWidget(QLabel("{}: ".format(main_type)),
                              row*i,
                              0)
-            data_fixed_type = self.data[self.data["Type"] == main_type]
-            subtypes = sorted(data_fixed_type["Subtype"].unique())
+            data_fixed_type = sc_data.where(self.data, "Type", main_type)
+            subtypes = sorted(sc_data.unique(data_fixed_type, "Subtype"))
             total_rows += self.num_rows(main_type)
             
             for j, subtype in enumerate(subtypes):
                 layout.addWidget(QLabel("{}:".format(subtype)),
                                  row*i,
                                  2*j + 1)
-                data_fixed_subtype = data_fixed_type[data_fixed_type["Subtype"] == subtype]
-                subsubtypes = sorted(data_fixed_subtype["Subsubtype"].unique())
+                data_fixed_subtype = sc_data.where(data_fixed_type, "Subtype", subtype)
+                subsubtypes = sorted(sc_data.unique(data_fixed_subtype, "Subsubtype"))
                 
                 for k, subsubtype in enumerate(subsubtypes):
                     empty_rows = (self.num_rows(main_type)
@@ -60,11 +61,11 @@ class ExplosionMenuDialog(QDialog):
                     layout.addWidget(QLabel("{}:".format(subsubtype)),
                                      row*i + k + 1 + empty_rows,
                                      2*j + 1)
-                    data_fixed_subsubtype = data_fixed_subtype[
-                        data_fixed_subtype["Subsubtype"] == subsubtype
-                        ].sort_values("Name")
-                    items = data_fixed_subsubtype["Name"].tolist()
-                    explosion_IDs = data_fixed_subsubtype["Explosion Image"].tolist()
+                    data_fixed_subsubtype = sc_data.sort_by(
+                        sc_data.where(data_fixed_subtype, "Subsubtype", subsubtype),
+                        "Name")
+                    items = [event["Name"] for event in data_fixed_subsubtype]
+                    explosion_IDs = [event["Explosion Image"] for event in data_fixed_subsubtype]
                     # Create the explosion icons.
                     icons = []
                     for explosion_ID in explosion_IDs:
@@ -100,18 +101,19 @@ class ExplosionMenuDialog(QDialog):
         and subtype.
         """
         # Used to organize the layout.
-        data_fixed_type = self.data[(self.data["Type"] == main_type)
-                                    & (self.data["Subtype"] == subtype)]
-        return len(data_fixed_type["Subsubtype"].unique())
+        data_fixed_type = sc_data.where(sc_data.where(self.data, "Type", main_type),
+                                        "Subtype",
+                                        subtype)
+        return len(sc_data.unique(data_fixed_type, "Subsubtype"))
         
     def num_rows(self, main_type: str) -> None:
         """Returns the maximum number of unique subsubtypes among all subtypes appearing in rows of
         the data with the input type.
         """
         # Used to organize the layout.
-        data_fixed_type = self.data[self.data["Type"] == main_type]
+        data_fixed_type = sc_data.where(self.data, "Type", main_type)
         rows = 0
-        for subtype in data_fixed_type["Subtype"].unique():
+        for subtype in sc_data.unique(data_fixed_type, "Subtype"):
             rows = max(rows, self.num_subsubtypes(main_type, subtype))
         return rows
         
@@ -122,13 +124,13 @@ class ExplosionMenuDialog(QDialog):
             if type(widget) != EventMenu:
                 continue
             explosion = widget.currentText()
-            if explosion in self.data["Name"].values:
+            if explosion in self.names:
                 explosions.append(explosion)
         self.explosions_selected.emit(explosions)
                 
 class ExplosionPalette(QListWidget):
     """An editable list of explosions to place in an obstacle."""
-    data = sc_data.event_data[sc_data.event_data["Explosion Image"].notna()]
+    data = sc_data.events_with("Explosion Image")
 
     explosion_palette_selection = pyqtSignal(list)
     
@@ -144,11 +146,11 @@ class ExplosionPalette(QListWidget):
         # Cache explosion icons.
         self.icons = {}
         icons_path = read_write.get_path("Explosion")
-        for ID in self.data.index:
-            explosion_image = self.data.loc[ID]["Explosion Image"]
+        for event in self.data.values():
+            explosion_image = event["Explosion Image"]
             image_path = os.path.join(icons_path, str(int(explosion_image)))
             image_path = os.path.join(image_path, "static.png")
-            self.icons[self.data.loc[ID]["Name"]] = QIcon(image_path)
+            self.icons[event["Name"]] = QIcon(image_path)
         
     def get_items(self) -> list[str]:
         """Gets the items in the palette."""
@@ -4,7 +4,7 @@ from PyQt6.QtWidgets import (QMainWindow,
                              QVBoxLayout,
                              QFrame,
                              QScrollArea)
-from PyQt6.QtGui import QKeySequence
+from PyQt6.QtGui import QActionGroup, QKeySequence
 from PyQt6.QtCore import pyqtSignal
 from .ui_location import LocationLimitPopup
 from .ui_location_layer import LocationLayerDialog
@@ -18,6 +18,7 @@ from .graphics import Location
 from .view import Canvas, Display
 from .obstacle import Obstacle
 from src import read_write
+from src import coverage
 
 class MainWindow(QMainWindow):
     """The main application window."""
@@ -37,6 +38,7 @@ class MainWindow(QMainWindow):
     hide_audio_mapping_dialog = pyqtSignal()
 
     popup = pyqtSignal(bool)
+    file_path_changed = pyqtSignal(object)
     
     reset = pyqtSignal()
     get_save_data = pyqtSignal(dict)
@@ -113,6 +115,26 @@ class MainWindow(QMainWindow):
         self.hide_explosion_menu.connect(explosion_menu_dialog.hide)
         self.hide_explosion_menu.connect(explosion_menu_action.setChecked)
         
+        edit_menu = menu.addMenu("&Edit")
+        self.undo_action = edit_menu.addAction("Undo", QKeySequence("Ctrl+Z"))
+        self.undo_action.triggered.connect(canvas.undo)
+        self.redo_action = edit_menu.addAction("Redo", QKeySequence("Ctrl+Y"))
+        self.redo_action.triggered.connect(canvas.redo)
+        edit_menu.aboutToShow.connect(self.update_edit_actions)
+        
+        # At most one coverage heat map is shown at a time.
+        view_menu = menu.addMenu("&View")
+        heatmap_menu = view_menu.addMenu("Coverage heat map")
+        heatmap_actions = QActionGroup(self)
+        heatmap_actions.setExclusionPolicy(QActionGroup.ExclusionPolicy.ExclusiveOptional)
+        for metric in coverage.metrics:
+            heatmap_action = heatmap_menu.addAction(metric)
+            heatmap_action.setCheckable(True)
+            heatmap_actions.addAction(heatmap_action)
+        heatmap_actions.triggered.connect(
+            lambda action: canvas.show_heatmap(action.text() if action.isChecked() else None)
+        )
+        
         settings_menu = menu.addMenu("&Settings")
         
         help_menu = menu.addMenu("&Help")
@@ -154,6 +176,8 @@ class MainWindow(QMainWindow):
         main_UI.set_loc_prefix.connect(location_layer_dialog.update_locs)
         canvas.add_loc.connect(location_layer_dialog.add_loc)
         canvas.delete_loc.connect(location_layer_dialog.delete_loc)
+        canvas.refresh_locs.connect(location_layer_dialog.update_locs)
+        canvas.refresh_locs.connect(main_UI.update_locs)
         self.loc_layers_movable.connect(location_layer_dialog.loc_layers_movable)
         self.popup.connect(location_layer_dialog.setEnabled)
         location_layer_dialog.closed.connect(self.show_loc_layers)
@@ -167,6 +191,10 @@ class MainWindow(QMainWindow):
         main_UI.set_timing_type.connect(self.ob.set_timing_type)
         main_UI.delete_count.connect(canvas.delete_count)
         main_UI.insert_count.connect(canvas.insert_count)
+        main_UI.set_delay.connect(canvas.set_delay)
+        canvas.count_deleted.connect(main_UI.count_deleted)
+        canvas.count_inserted.connect(main_UI.count_inserted)
+        canvas.count_range.connect(main_UI.count_range)
         
         main_UI.explosion_palette_selection.connect(canvas.set_explosion_selection)
         main_UI.explosion_player.connect(canvas.set_explosion_player)
@@ -207,6 +235,7 @@ class MainWindow(QMainWindow):
         self.load.connect(location_layer_dialog.load)
         self.load.connect(main_UI.load)
         self.load.connect(trigger_generator_window.load)
+        self.file_path_changed.connect(trigger_generator_window.set_file_path)
 
     def mode_signal(self, mode: str) -> None:
         """Sends signals when the editor mode is changed."""
@@ -257,10 +286,17 @@ class MainWindow(QMainWindow):
             self.hide_brush_editor.emit()
             self.hide_audio_mapping_dialog.emit()
 
+    def update_edit_actions(self) -> None:
+        """Shows the names of the edits to undo and redo in the Edit menu."""
+        undo_name, redo_name = self.ob.history.undo_name(), self.ob.history.redo_name()
+        self.undo_action.setText("Undo {}".format(undo_name.lower()) if undo_name else "Undo")
+        self.redo_action.setText("Redo {}".format(redo_name.lower()) if redo_name else "Redo")
+
     def new_file(self) -> None:
         """Erases all edited data and creates a new, blank file."""
         self.reset.emit()
         self.current_file_path = None
+        self.file_path_changed.emit(None)
         self.setWindowTitle("Obstacle Studio")
     
     def save_file(self) -> None:
@@ -290,6 +326,7 @@ class MainWindow(QMainWindow):
         file.close()
         self.setWindowTitle("Obstacle Studio - {}".format(path))
         self.current_file_path = path
+        self.file_path_changed.emit(path)
         
     def open_file(self) -> None:
         """Opens a dialog to load a saved file."""
@@ -306,4 +343,5 @@ class MainWindow(QMainWindow):
         self.load.emit(data)
         file.close()
         self.setWindowTitle("Obstacle Studio - {}".format(path))
-        self.current_file_path = path
\ No newline at end of file
+        self.current_file_path = path
+        self.file_path_changed.emit(path)
\ No newline at end of file
@@ -190,6 +190,7 @@ class CountNumberBox(QLCDNumber):
         
 class DelayBox(QSpinBox):
     """A spinbox for editing obstacle delays."""
+    set_delay = pyqtSignal(int, int)
 
     def __init__(self, delays: list[int]):
         super().__init__()
@@ -207,11 +208,12 @@ class DelayBox(QSpinBox):
             self.setSingleStep(42)
             
         self.editingFinished.connect(self.round_value)
-        self.valueChanged.connect(self.set_delay)
+        self.valueChanged.connect(self.emit_delay)
         
-    def set_delay(self, delay: int) -> None:
-        """Updates the list of delays when the current delay is changed."""
-        self.delays[self.count - 1] = delay
+    def emit_delay(self, delay: int) -> None:
+        """Sends a signal to update the list of delays when the current delay is changed."""
+        # The delay is set by the canvas, which records the change for undo.
+        self.set_delay.emit(self.count, delay)
         
     def change_count(self, count: int) -> None:
         """Displays the delay following the input count and updates the list of delays."""
@@ -220,19 +222,6 @@ class DelayBox(QSpinBox):
             self.delays.append(self.value())
         self.setValue(self.delays[count - 1])
         
-    def delete_count(self, count: int) -> None:
-        """Deletes the input count."""
-        new_count = count if count < len(self.delays) else max(1, count - 1)
-        if len(self.delays) > 1:
-            self.delays.pop(count - 1)
-        self.setValue(self.delays[new_count - 1])
-        self.count = count
-        
-    def insert_count(self, count: int) -> None:
-        """Inserts a count at the input position."""
-        delay = self.delays[count - 1]
-        self.delays.insert(count - 1, delay)
-        
     def set_timing_type(self, use_frames: bool) -> None:
         """Sets the timing type to frames if use_frames is true and waits otherwise."""
         self.use_frames = use_frames
@@ -273,9 +262,7 @@ class DelayFrame(QFrame):
     """Contains widgets to edit the delays in an obstacle."""
     use_frames = pyqtSignal(bool)
     change_count = pyqtSignal(int)
-    delete_count = pyqtSignal(int)
-    insert_count = pyqtSignal(int)
-    
+    set_delay = pyqtSignal(int, int)
     reset = pyqtSignal()
     load = pyqtSignal(dict)
     
@@ -305,8 +292,7 @@ class DelayFrame(QFrame):
         frames_button.toggled.connect(self.save_timing_type)
         self.use_frames.connect(delay_box.set_timing_type)
         self.change_count.connect(delay_box.change_count)
-        self.delete_count.connect(delay_box.delete_count)
-        self.insert_count.connect(delay_box.insert_count)
+        delay_box.set_delay.connect(self.set_delay)
         
         self.reset.connect(delay_box.reset)
         self.load.connect(delay_box.load)
@@ -340,6 +326,7 @@ class CountControlFrame(QFrame):
     
     set_timing_type = pyqtSignal(bool)
     change_count = pyqtSignal(int)
+    set_delay = pyqtSignal(int, int)
     delete_count = pyqtSignal(int)
     insert_count = pyqtSignal(int)
     
@@ -408,6 +395,7 @@ class CountControlFrame(QFrame):
         self.set_shortcuts.connect(stop_button.set_shortcut)
         
         delay_frame.use_frames.connect(self.set_timing_type)
+        delay_frame.set_delay.connect(self.set_delay)
         first_count_button.clicked.connect(self.to_first_count)
         prev_count_button.clicked.connect(self.to_prev_count)
         next_count_button.clicked.connect(self.to_next_count)
@@ -416,8 +404,6 @@ class CountControlFrame(QFrame):
         insert_count_button.clicked.connect(self.insert_new_count)
         self.change_count.connect(count_number_box.display)
         self.change_count.connect(delay_frame.change_count)
-        self.delete_count.connect(delay_frame.delete_count)
-        self.insert_count.connect(delay_frame.insert_count)
 
         self.reset.connect(delay_frame.reset)
         self.reset.connect(count_number_box.reset)
@@ -448,15 +434,16 @@ class CountControlFrame(QFrame):
     def delete_current_count(self) -> None:
         """Deletes the current count."""
         self.delete_count.emit(self.count)
-        if self.count == self.last_count:
-            self.count = max(1, self.count - 1)
-        self.last_count = max(1, self.last_count - 1)
-        self.change_count.emit(self.count)
         
     def insert_new_count(self) -> None:
         """Inserts a new count at the current position."""
         self.insert_count.emit(self.count)
-        self.last_count += 1
+        
+    def set_counts(self, count: int, last_count: int) -> None:
+        """Sets the current and last counts after counts are deleted, inserted or restored."""
+        self.count = count
+        self.last_count = last_count
+        self.change_count.emit(count)
         
     def reset_counts(self) -> None:
         """Sets the first and last counts to 1 when a new file is created."""
@@ -483,6 +470,9 @@ class ObstacleUIframe(QFrame):
     set_timing_type = pyqtSignal(bool)
     delete_count = pyqtSignal(int)
     insert_count = pyqtSignal(int)
+    count_deleted = pyqtSignal(int)
+    count_inserted = pyqtSignal(int)
+    count_range = pyqtSignal(int, int)
     
     open_explosion_menu = pyqtSignal(bool)
     explosions_selected = pyqtSignal(list)
@@ -536,7 +526,9 @@ class ObstacleUIframe(QFrame):
         self.set_shortcuts.connect(placement_frame.set_shortcuts)
         
         count_control_frame.change_count.connect(self.change_count)
+        count_control_frame.set_delay.connect(self.set_delay)
         count_control_frame.set_timing_type.connect(self.set_timing_type)
+        self.count_range.connect(count_control_frame.set_counts)
         count_control_frame.delete_count.connect(self.delete_count)
         count_control_frame.insert_count.connect(self.insert_count)
         
@@ -567,8 +559,8 @@ class ObstacleUIframe(QFrame):
         teleport_UI.teleport_cell.connect(self.teleport_cell)
         self.add_teleport.connect(teleport_UI.add_teleport)
         self.change_count.connect(teleport_UI.change_count)
-        self.delete_count.connect(teleport_UI.delete_count)
-        self.insert_count.connect(teleport_UI.insert_count)
+        self.count_deleted.connect(teleport_UI.delete_count)
+        self.count_inserted.connect(teleport_UI.insert_count)
         self.update_locs.connect(teleport_UI.update_locs)
         self.delete_loc.connect(teleport_UI.delete_loc)
         self.delete_teleport.connect(teleport_UI.delete_teleport)
@@ -15,7 +15,7 @@ from src import read_write
 
 class TeleportMenuFrame(QFrame):
     """Contains an organized collection of wall menus."""
-    data = sc_data.event_data[sc_data.event_data["Teleport Image"].notna()]
+    data = sc_data.events_with("Teleport Image")
     
     teleport_marker = pyqtSignal(str)
     
@@ -27,18 +27,19 @@ class TeleportMenuFrame(QFrame):
         # We organize the list of teleport sprite options into various lists sorted by
         # the type of wall unit, whether or not the unit is creatable with triggers, etc.
         # This is mostly to keep the menu size manageable.
-        units = self.data[self.data["Type"] == "Unit"]
-        sprites = self.data[self.data["Type"] == "Sprite"]
+        units = sc_data.where(self.data, "Type", "Unit")
+        sprites = sc_data.where(self.data, "Type", "Sprite")
         image_path = read_write.get_path("Teleport")
         layout.addWidget(QLabel("Markers:"), 0, 0, alignment=Qt.AlignmentFlag.AlignTop)
         row = 1
         
-        if not sprites.empty:
+        if sprites:
             layout.addWidget(QLabel("Sprites: "), row, 0)
-            for subtype in sorted(sprites["Subtype"].unique()):
-                data_fixed_subtype = sprites[sprites["Subtype"] == subtype].sort_values("Name")
-                items = data_fixed_subtype["Name"].tolist()
-                teleport_IDs = data_fixed_subtype["Teleport Image"].tolist()
+            for subtype in sorted(sc_data.unique(sprites, "Subtype")):
+                data_fixed_subtype = sc_data.sort_by(sc_data.where(sprites, "Subtype", subtype),
+                                                     "Name")
+                items = [event["Name"] for event in data_fixed_subtype]
+                teleport_IDs = [event["Teleport Image"] for event in data_fixed_subtype]
                 # Create the teleport icons.
                 icons = []
                 for teleport_ID in teleport_IDs:
@@ -53,11 +54,11 @@ class TeleportMenuFrame(QFrame):
                 layout.addWidget(menu, row + 1, 1)
                 row += 1
                 
-        if not units.empty:
+        if units:
             layout.addWidget(QLabel("Hallucinations: "), row + 1, 0)
-            data = units.sort_values("Name")
-            items = data["Name"].tolist()
-            teleport_IDs = data["Teleport Image"].tolist()
+            data = sc_data.sort_by(units, "Name")
+            items = [event["Name"] for event in data]
+            teleport_IDs = [event["Teleport Image"] for event in data]
             # Create the teleport icons.
             icons = []
             for teleport_ID in teleport_IDs:
@@ -111,9 +112,8 @@ class TeleportTable(QTableWidget):
         
         # Cache teleport icons
         teleport_image_path = read_write.get_path("Teleport")
-        teleport_IDs = sc_data.event_data[
-            sc_data.event_data["Teleport Image"].notna()
-        ]["Teleport Image"].tolist()
+        teleport_IDs = [event["Teleport Image"]
+                        for event in sc_data.events_with("Teleport Image").values()]
         self.teleport_icons = {}
         for teleport_ID in teleport_IDs:
             path = os.path.join(teleport_image_path, str(int(teleport_ID)))
@@ -125,9 +125,12 @@ class TeleportTable(QTableWidget):
     def add_teleport(self, player: int, marker: str, loc: Location, cell: list[int]) -> None:
         """Adds a teleport to the table in the input cell."""
         ID = sc_data.name_to_ID[marker]
-        teleport_ID = sc_data.event_data.loc[ID]["Teleport Image"]
+        teleport_ID = sc_data.events[ID]["Teleport Image"]
         icon = self.teleport_icons[teleport_ID]
         item = TeleportTableItem(player, ID, icon, loc)
+        # Teleports copied from another count may need more rows than the table has.
+        if cell[0] >= self.rowCount():
+            self.setRowCount(cell[0] + 1)
         self.setItem(cell[0], cell[1], item)
         self.update_locs.connect(item.update)
         
@@ -139,6 +142,14 @@ class TeleportTable(QTableWidget):
                 if item and item.loc.num == loc:
                     self.takeItem(i, j)
                     
+    def delete_removed_teleports(self) -> None:
+        """Deletes teleports whose location has been removed from the canvas."""
+        for i in range(1, self.rowCount()):
+            for j in range(2):
+                item = self.item(i, j)
+                if item and item.loc.scene() is None:
+                    self.takeItem(i, j)
+                    
     def reset(self) -> None:
         """Resets the table."""
         i = self.rowCount() - 1
@@ -165,7 +176,7 @@ class TeleportTable(QTableWidget):
                 if table_data[i][j] == 0:
                     continue
                 player = table_data[i][j]["player"]
-                marker = sc_data.event_data.loc[table_data[i][j]["img"]]["Name"]
+                marker = sc_data.events[table_data[i][j]["img"]]["Name"]
                 loc = self.locations[table_data[i][j]["loc"] - 1]
                 self.add_teleport(player, marker, loc, [i + 1, j])
         
@@ -216,9 +227,11 @@ class TeleportTableStack(QStackedWidget):
         
     def delete_loc(self, loc: int) -> None:
         """Updates the teleport tables after deleting a location."""
+        # The later locations have already been renumbered, so the teleports to delete are found by
+        # their location no longer being on the canvas.
         for i in range(self.count()):
             table = self.get_table(i)
-            table.delete_teleport(loc)
+            table.delete_removed_teleports()
         self.update_locs.emit()
         
     def change_count(self, count: int) -> None:
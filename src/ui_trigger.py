@@ -13,11 +13,12 @@ from PyQt6.QtWidgets import (QWidget,
                              QLineEdit,
                              QDialog)
 from PyQt6.QtCore import Qt, pyqtSignal
-from .ui_shared import PlayerMenu, SCMenu
+from .ui_shared import FileDialog, PlayerMenu, SCMenu
 from .graphics import Location
 from .obstacle import Obstacle
 from src import sc_data
 from src import trig_gen
+from src.trig_gen import TriggerCache
 from src import read_write
 
 class PlayerMenuKeyed(PlayerMenu):
@@ -133,6 +134,11 @@ class TriggerGeneratorWindow(QDialog):
         path = read_write.get_path("Settings")
         with open(path, 'r') as file:
             self.options = json.load(file)
+            
+        # The triggers of each count are cached, so only edited counts are generated again. The
+        # cache is optionally saved next to the save file.
+        self.cache = TriggerCache()
+        self.file_path = None
         
         text_box = QTextEdit()
         ui_frame = QFrame()
@@ -226,6 +232,10 @@ class TriggerGeneratorWindow(QDialog):
         # Button for generating triggers.
         generate_button = QPushButton("Generate")
         replace_button = QPushButton("Replace")
+        export_button = QPushButton("Export")
+        save_cache_checkbox = CheckBoxKeyed("Save trigger cache", "Save cache")
+        save_cache_checkbox.setToolTip("Keep the generated triggers in a file next to the save "
+                                       "file, so unchanged counts aren't generated again.")
 
         ui_layout = QGridLayout()
         ui_layout.addWidget(QLabel("Player options:"), 0, 0)
@@ -271,6 +281,8 @@ class TriggerGeneratorWindow(QDialog):
         ui_layout.addWidget(QLabel("Trigger generation:"), 0, 9)
         ui_layout.addWidget(generate_button, 1, 9)
         ui_layout.addWidget(replace_button, 2, 9)
+        ui_layout.addWidget(export_button, 3, 9)
+        ui_layout.addWidget(save_cache_checkbox, 4, 9)
         ui_frame.setLayout(ui_layout)
         
         layout = QVBoxLayout()
@@ -295,6 +307,9 @@ class TriggerGeneratorWindow(QDialog):
         ob_number_box.valueChanged.connect(self.set_ob_number)
         remove_unit_button.set_option.connect(self.change_option)
         generate_button.clicked.connect(self.generate_triggers)
+        export_button.clicked.connect(self.export_triggers)
+        save_cache_checkbox.set_option.connect(self.change_option)
+        save_cache_checkbox.set_option.connect(lambda key, state: self.set_file_path(self.file_path))
         
         self.reset.connect(ob_number_box.reset)
         self.save.connect(ob_number_box.save)
@@ -304,12 +319,23 @@ class TriggerGeneratorWindow(QDialog):
         """Sets self.options[key] = value when an option is changed."""
         self.options[key] = value
         
+    def set_file_path(self, path: str) -> None:
+        """Sets the path of the open save file, next to which the trigger cache is kept if the
+        option is set. path is None for an unsaved file.
+        """
+        self.file_path = path
+        cache_path = None
+        if path and self.options["Save trigger cache"]:
+            cache_path = TriggerCache.path_for(path)
+        if cache_path != self.cache.path:
+            self.cache = TriggerCache(cache_path)
+        
     def set_ob_number(self, num: int) -> None:
         """Sets the obstacle number when the value in the obstacle number box is changed."""
         self.ob_number = num
         
-    def generate_triggers(self) -> None:
-        """Prints the triggers to generate the obstacle in the text box."""
+    def trigger_arguments(self) -> tuple:
+        """Returns the arguments of trig_gen.obstacle_triggers for the current options."""
         death_count_options = {
             "Player": self.options["DC player"],
             "Ob": self.options["Obstacle DC unit"],
@@ -324,10 +350,7 @@ class TriggerGeneratorWindow(QDialog):
             "Delineator": self.options["Delineator"],
             "Audio text": self.options["Audio text"]
         }
-
-        self.print_triggers.emit(
-            trig_gen.obstacle_triggers(
-                self.locations,
+        return (self.locations,
                 self.ob,
                 self.ob_number,
                 death_count_options,
@@ -335,6 +358,22 @@ class TriggerGeneratorWindow(QDialog):
                 self.options["Death type"],
                 self.options["Player unit"],
                 self.options["Force name"],
-                comment_options
-            )
-        )
\ No newline at end of file
+                comment_options)
+
+    def generate_triggers(self) -> None:
+        """Prints the triggers to generate the obstacle in the text box."""
+        triggers = trig_gen.obstacle_triggers(*self.trigger_arguments(), cache=self.cache)
+        self.print_triggers.emit(triggers)
+        
+    def export_triggers(self) -> None:
+        """Writes the triggers to generate the obstacle to a text file chosen by the user. The
+        triggers are written one count at a time, so large obstacles aren't held in memory.
+        """
+        path, _ = FileDialog.getSaveFileName(self,
+                                             "Export triggers",
+                                             read_write.get_path("Save"),
+                                             "Text files (*.txt)")
+        if not path:
+            return
+        with open(path, 'w') as file:
+            trig_gen.write_obstacle_triggers(file, *self.trigger_arguments())
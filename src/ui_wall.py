@@ -13,7 +13,7 @@ from src import sc_data
 
 class WallMenuFrame(QFrame):
     """Contains an organized collection of wall menus."""
-    data = sc_data.event_data[sc_data.event_data["Wall Image"].notna()]
+    data = sc_data.events_with("Wall Image")
     
     wall_unit = pyqtSignal(str)
     
@@ -27,20 +27,20 @@ class WallMenuFrame(QFrame):
         # We organize the list of wall unit options into various lists sorted by the type of wall
         # unit, whether or not the unit is creatable with triggers, etc. This is mostly to keep the
         # menu size manageable.
-        rows = self.num_subtypes(sorted(self.data["Creatable"].unique())[0]) + 1
+        rows = self.num_subtypes(sorted(sc_data.unique(self.data, "Creatable"))[0]) + 1
         image_path = read_write.get_path("Wall")
         
-        for i, creatable in enumerate(sorted(self.data["Creatable"].unique())):
-            data_fixed_type = self.data[self.data["Creatable"] == creatable]
+        for i, creatable in enumerate(sorted(sc_data.unique(self.data, "Creatable"))):
+            data_fixed_type = sc_data.where(self.data, "Creatable", creatable)
             label = "Creatable: " if creatable else "Noncreatable: "
             layout.addWidget(QLabel(label), rows*i + 1, 0)
-            for j, subtype in enumerate(sorted(data_fixed_type["Subtype"].unique())):
-                data_fixed_subtype = data_fixed_type[
-                    data_fixed_type["Subtype"] == subtype
-                    ].sort_values("Name")
+            for j, subtype in enumerate(sorted(sc_data.unique(data_fixed_type, "Subtype"))):
+                data_fixed_subtype = sc_data.sort_by(
+                    sc_data.where(data_fixed_type, "Subtype", subtype),
+                    "Name")
                     
-                items = data_fixed_subtype["Name"].tolist()
-                wall_IDs = data_fixed_subtype["Wall Image"].tolist()
+                items = [event["Name"] for event in data_fixed_subtype]
+                wall_IDs = [event["Wall Image"] for event in data_fixed_subtype]
                 # Create the wall icons.
                 icons = []
                 for wall_ID in wall_IDs:
@@ -61,8 +61,8 @@ class WallMenuFrame(QFrame):
         creatability.
         """
         # Used to organize the layout.
-        data_fixed_type = self.data[(self.data["Creatable"] == creatable)]
-        return len(data_fixed_type["Subtype"].unique())
+        data_fixed_type = sc_data.where(self.data, "Creatable", creatable)
+        return len(sc_data.unique(data_fixed_type, "Subtype"))
     
     def set_selection(self, unit: str) -> None:
         """Sets the wall unit to the selected option and clears the other menus."""
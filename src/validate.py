@@ -0,0 +1,173 @@
+"""Checks obstacles for inconsistent events.
+
+The checks work on the event columns in the layout of the obstacle's data frames, where counts and
+locations are positions, so they can be run on an open obstacle or directly on a save file. Run
+from the repository root with:
+    python -m src.validate Save/Obs/obstacle.json
+"""
+import argparse
+import json
+import sys
+import numpy as np
+from src.obstacle import Obstacle
+
+# The columns of each kind of event, in the order of the save file.
+schemas = {"Explosions": Obstacle.explosion_schema,
+           "Walls": Obstacle.wall_schema,
+           "Teleports": Obstacle.teleport_schema,
+           "Audio": Obstacle.audio_schema}
+
+def obstacle_columns(ob: Obstacle) -> dict[str, dict]:
+    """Returns the event columns of an obstacle keyed by kind and column name."""
+    tables = {"Explosions": ob.explosion_table,
+              "Walls": ob.wall_table,
+              "Teleports": ob.teleport_table,
+              "Audio": ob.audio_table}
+    columns = {}
+    for kind, table in tables.items():
+        rows = table.rows()
+        columns[kind] = {name: table.decoded(name, rows) for name in table.names}
+    return columns
+
+def save_columns(data: dict) -> dict[str, dict]:
+    """Returns the event columns of a saved obstacle keyed by kind and column name."""
+    columns = {}
+    for kind, schema in schemas.items():
+        records = list(data["Obstacle"][kind].values())
+        columns[kind] = {name: np.array([record[name] for record in records], dtype=np.float64)
+                         for name in schema}
+    return columns
+
+def violations(check: str, kind: str, rows: np.ndarray, counts, locations) -> tuple:
+    """Returns the violations of a check by the input rows of a kind of event as a tuple of the
+    check, the kind and arrays of the rows and the counts and locations at which they occur.
+    """
+    return (check,
+            kind,
+            np.asarray(rows, dtype=np.int64),
+            np.asarray(counts).astype(np.int64),
+            np.asarray(locations).astype(np.int64))
+
+def check_ranges(columns: dict, num_counts: int, num_locations: int) -> list[tuple]:
+    """Returns the events occuring on counts or at locations which don't exist. Deleted locations
+    appear at position 0.
+    """
+    found = []
+    for kind, table in columns.items():
+        counts = table["Count"]
+        rows = np.flatnonzero((counts < 1) | (counts > num_counts))
+        found.append(violations("Missing count", kind, rows, counts[rows], np.zeros(len(rows))))
+        for name in ["Location", "Location from", "Location to"]:
+            if name not in table:
+                continue
+            locations = table[name]
+            rows = np.flatnonzero((locations < 1) | (locations > num_locations))
+            check = "Missing location" if kind != "Teleports" else "Teleport to missing location"
+            found.append(violations(check, kind, rows, counts[rows], locations[rows]))
+    return found
+
+def check_walls(walls: dict) -> tuple:
+    """Returns the wall removals which don't follow a placement in the same slot.
+
+    The events of a slot, a (location, x, y) position, form a cyclic timeline since obstacles
+    repeat, so a removal is valid if the latest other event of its slot is a placement, possibly
+    on a later count of the previous cycle.
+    """
+    removal = walls["Add/Remove"] != 2
+    if not len(removal):
+        return violations("Wall removal without placement", "Walls", [], [], [])
+
+    # Sort the events by slot and count, with placements before removals on the same count.
+    timeline = 2*walls["Count"].astype(np.int64) + removal
+    order = np.lexsort((timeline, walls["y"], walls["x"], walls["Location"]))
+    slots = np.stack([walls[name][order] for name in ["Location", "x", "y"]])
+    starts = np.flatnonzero(np.r_[True, (slots[:, 1:] != slots[:, :-1]).any(axis=0)])
+    ends = np.r_[starts[1:], len(order)] - 1
+
+    # The event before the first event of a slot is the last event of the slot.
+    previous = np.arange(len(order)) - 1
+    previous[starts] = ends
+    
+    # A removal which is the only event of its slot is its own previous event.
+    sorted_removal = removal[order]
+    invalid = sorted_removal & sorted_removal[previous]
+    rows = np.sort(order[invalid])
+    return violations("Wall removal without placement",
+                      "Walls",
+                      rows,
+                      walls["Count"][rows],
+                      walls["Location"][rows])
+
+def check_audio(explosions: dict, audio: dict) -> tuple:
+    """Returns the audio events of explosion types which don't occur on their count."""
+    # The (count, explosion) pairs are packed into single integers for a vectorized anti-join.
+    def keys(table: dict) -> np.ndarray:
+        return (table["Count"].astype(np.int64) << 32) | table["Explosion"].astype(np.int64)
+    rows = np.flatnonzero(~np.isin(keys(audio), keys(explosions)))
+    return violations("Audio without explosion",
+                      "Audio",
+                      rows,
+                      audio["Count"][rows],
+                      np.zeros(len(rows)))
+
+def validate(columns: dict, num_counts: int, num_locations: int) -> list[dict]:
+    """Checks event columns, as returned by obstacle_columns or save_columns, and returns the
+    violations found ordered by count and location.
+
+    Each violation holds the "Check" which failed, the "Kind" and "Row" of the offending event
+    and the "Count" and "Location" at which it occurs, where 0 means none.
+    """
+    found = check_ranges(columns, num_counts, num_locations)
+    found.append(check_walls(columns["Walls"]))
+    found.append(check_audio(columns["Explosions"], columns["Audio"]))
+    
+    # The violations are sorted as arrays and only then converted to dictionaries.
+    checks = np.repeat(np.arange(len(found)), [len(rows) for check, kind, rows, *_ in found])
+    rows, counts, locations = (np.concatenate([violation[i] for violation in found])
+                               for i in range(2, 5))
+    order = np.lexsort((locations, counts))
+    return [{"Check": found[i][0], "Kind": found[i][1], "Row": row, "Count": count, "Location": loc}
+            for i, row, count, loc in zip(checks[order].tolist(),
+                                          rows[order].tolist(),
+                                          counts[order].tolist(),
+                                          locations[order].tolist())]
+
+def validate_obstacle(ob: Obstacle, num_locations: int=None) -> list[dict]:
+    """Checks an obstacle. num_locations is the number of locations on the canvas, which defaults
+    to the number of locations known to the obstacle.
+    """
+    if num_locations is None:
+        num_locations = len(ob.location_order)
+    return validate(obstacle_columns(ob), len(ob.counts), num_locations)
+
+def validate_save(data: dict) -> list[dict]:
+    """Checks an obstacle loaded from a save file."""
+    return validate(save_columns(data), len(data["Obstacle"]["Delays"]), len(data["Locations"]))
+
+def describe(violation: dict) -> str:
+    """Returns a line describing a violation."""
+    return "Count {}, location {}: {} ({} row {})".format(violation["Count"],
+                                                          violation["Location"],
+                                                          violation["Check"].lower(),
+                                                          violation["Kind"],
+                                                          violation["Row"])
+
+def main(argv: list[str]=None) -> int:
+    """Checks the save files given on the command line and returns 1 if any check failed."""
+    parser = argparse.ArgumentParser(prog="python -m src.validate",
+                                     description="Checks saved obstacles for inconsistent events.")
+    parser.add_argument("paths", nargs="+", help="saved obstacle JSON files")
+    args = parser.parse_args(argv)
+    status = 0
+    for path in args.paths:
+        with open(path, 'r') as file:
+            data = json.load(file)
+        found = validate_save(data)
+        print("{}: {} violation{}".format(path, len(found), "" if len(found) == 1 else "s"))
+        for violation in found:
+            print("    " + describe(violation))
+        status = status or int(bool(found))
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
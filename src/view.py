@@ -1,5 +1,4 @@
 import os
-import pandas as pd
 from PyQt6.QtWidgets import (QGraphicsView,
                              QGraphicsScene,
                              QGraphicsSceneMouseEvent,
@@ -15,9 +14,12 @@ from .graphics import (Grid,
                       BrushHighlight,
                       TerrainTile,
                       Location,
-                      EventImage)
+                      EventImage,
+                      Heatmap)
 from src import sc_data
 from src import read_write
+from src.coverage import cell_coverage, heat_colors
+from src.safety import SafetyMap
 
 class Canvas(QGraphicsScene):
     """A scene on which graphical items such as terrain, locations, explosions, etc. are placed."""
@@ -29,6 +31,7 @@ class Canvas(QGraphicsScene):
     wall_Z = 4
     explosion_teleport_Z = 5
     brush_Z = 6
+    heatmap_Z = 7
 
     add_loc = pyqtSignal(Location)
     delete_loc = pyqtSignal(int)
@@ -39,6 +42,11 @@ class Canvas(QGraphicsScene):
     
     add_tele = pyqtSignal(int, int, str, Location, list)
     delete_tele = pyqtSignal(int, int)
+    
+    count_deleted = pyqtSignal(int)
+    count_inserted = pyqtSignal(int)
+    count_range = pyqtSignal(int, int)
+    refresh_locs = pyqtSignal()
 
     def __init__(self, x, y, w, z, ob):
         super().__init__(x, y, w, z)
@@ -94,6 +102,22 @@ class Canvas(QGraphicsScene):
         self.mobile_location = None
         self.ob = ob
         self.current_count = 1
+        
+        # Edits made with the mouse are recorded from the press to the release of a button. The
+        # scene rectangles of the locations are stored at the press, so that moving or resizing
+        # them is recorded once instead of at every step of the drag.
+        self.history = ob.history
+        self.stroke = False
+        self.loc_rects = {}
+        
+        # The coverage heat map is drawn from a cached image, which is redrawn when it's shown after
+        # the obstacle or the locations changed.
+        self.heatmap = None
+        self.heatmap_key = None
+        
+        # The audio mapping lists the explosion types present in the obstacle, so it's updated
+        # whenever the first explosion of a type is added or the last one is deleted.
+        self.ob.add_explosion_observer(self.explosion_type_changed)
         self.selected_explosions = []
         
         self.wall_unit = None
@@ -109,8 +133,8 @@ class Canvas(QGraphicsScene):
         # Cache explosion images.
         explosion_image_path = read_write.get_path("Explosion")
         self.static_explosion_images = {}
-        for ID in sc_data.event_data[sc_data.event_data["Explosion Image"].notna()].index:
-            explosion_ID = int(sc_data.event_data.loc[ID]["Explosion Image"])
+        for ID, event in sc_data.events_with("Explosion Image").items():
+            explosion_ID = event["Explosion Image"]
             path = os.path.join(explosion_image_path, str(explosion_ID))
             path = os.path.join(path, "static.png")
             self.static_explosion_images[ID] = QPixmap(path)
@@ -118,8 +142,8 @@ class Canvas(QGraphicsScene):
         # Cache wall images.
         wall_image_path = read_write.get_path("Wall")
         self.static_wall_images = {}
-        for ID in sc_data.event_data[sc_data.event_data["Wall Image"].notna()].index:
-            wall_ID = int(sc_data.event_data.loc[ID]["Wall Image"])
+        for ID, event in sc_data.events_with("Wall Image").items():
+            wall_ID = event["Wall Image"]
             path = os.path.join(wall_image_path, str(wall_ID))
             path = os.path.join(path, "static.png")
             self.static_wall_images[ID] = QPixmap(path)
@@ -127,8 +151,8 @@ class Canvas(QGraphicsScene):
         # Cache teleport images.
         teleport_image_path = read_write.get_path("Teleport")
         self.static_teleport_images = {}
-        for ID in sc_data.event_data[sc_data.event_data["Teleport Image"].notna()].index:
-            teleport_ID = int(sc_data.event_data.loc[ID]["Teleport Image"])
+        for ID, event in sc_data.events_with("Teleport Image").items():
+            teleport_ID = event["Teleport Image"]
             path = os.path.join(teleport_image_path, str(teleport_ID))
             path = os.path.join(path, "static.png")
             self.static_teleport_images[ID] = QPixmap(path)
@@ -294,34 +318,49 @@ class Canvas(QGraphicsScene):
             for j in range(height):
                 old_tile = self.terrain[i0 + i][j0 + j]
                 
-                # If a previously placed tile is the same, we ignore it, otherwise we delete it.
+                # If a previously placed tile is the same, we ignore it, otherwise we replace it.
                 if old_tile and old_tile.num == tile_num:
                     continue
-                if old_tile and old_tile.num != tile_num:
-                    self.removeItem(old_tile)
-
-                # Places the tile on the canvas and stores it in the terrain map.
-                tile = TerrainTile(tile_num, self.terrain_images[tile_num])
-                self.terrain[i0 + i][j0 + j] = tile
-                self.addItem(tile)
-                tile.setPos(x + 32*i, y + 32*j)
-                tile.setZValue(self.terrain_Z)
+                self.set_tile(i0 + i, j0 + j, tile_num)
 
     def remove_terrain(self, x: int, y: int, width: int, height: int) -> None:
         """Removes all terrain in a (width x height)-sized block with top-left corner at (x, y)."""
         i0, j0 = x // 32, y // 32
         for i in range(width):
             for j in range(height):
-                item = self.terrain[i0 + i][j0 + j]
-                if item:
-                    self.removeItem(item)
-                    self.terrain[i0 + i][j0 + j] = None
+                if self.terrain[i0 + i][j0 + j]:
+                    self.set_tile(i0 + i, j0 + j, None)
                     
     def remove_all_terrain(self) -> None:
         """Removes all terrain on the scene."""
-        for i in range(self.width):
-            for j in range(self.height):
-                self.remove_terrain(32*i, 32*j, 1, 1)
+        with self.history.edit("Remove all terrain"):
+            for i in range(self.width):
+                for j in range(self.height):
+                    self.remove_terrain(32*i, 32*j, 1, 1)
+                
+    def set_tile(self, i: int, j: int, tile_num: int) -> None:
+        """Places the terrain tile tile_num in cell (i, j) of the terrain map, replacing any tile
+        there. If tile_num is None, the cell is cleared.
+        """
+        old_tile = self.terrain[i][j]
+        old_num = old_tile.num if old_tile else None
+        
+        # A cell painted repeatedly during a stroke is recorded once.
+        self.history.record((self.set_tile, i, j, old_num),
+                            (self.set_tile, i, j, tile_num),
+                            ("Terrain", i, j))
+        if old_tile:
+            self.removeItem(old_tile)
+            self.terrain[i][j] = None
+        if tile_num is None:
+            return
+
+        # Places the tile on the canvas and stores it in the terrain map.
+        tile = TerrainTile(tile_num, self.terrain_images[tile_num])
+        self.terrain[i][j] = tile
+        self.addItem(tile)
+        tile.setPos(32*i, 32*j)
+        tile.setZValue(self.terrain_Z)
                 
     def set_location_visibility(self, visible: bool) -> None:
         """Sets the visibilty of locations to the input boolean."""
@@ -344,16 +383,12 @@ class Canvas(QGraphicsScene):
             self.max_locs.emit()
             return
 
-        loc = Location(width, height, num + 1, num + 1)
-        self.locations.append(loc)
-        self.update_locs()
-        self.addItem(loc)
+        loc = Location(width, height, self.ob.add_location(), self.ob.location_order)
         loc.setPos(x, y)
         loc.setZValue(self.location_Z)
         
         # When loading a save file, it's more convenient to reconstruct the layers separately.
-        if add_to_layer:
-            self.add_loc.emit(loc)
+        self.insert_location(num, loc, add_to_layer)
         
     def delete_location(self, loc: Location) -> None:
         """Deletes the input location."""
@@ -361,29 +396,104 @@ class Canvas(QGraphicsScene):
         if not loc:
             return
             
-        num = loc.num
-        deleted_loc = self.locations.pop(num - 1)
-        
-        # Decrement the number of each location placed after the deleted location.
-        for i in range(num - 1, len(self.locations)):
-            loc = self.locations[i]
-            loc.num -= 1
-            loc.ID -= 1
+        # Location numbers are positions in the obstacle's location order, so deleting the location
+        # from the obstacle renumbers the later locations.
+        with self.history.edit("Delete location"):
+            num = loc.num
+            self.remove_location(loc)
+            self.ob.delete_location(num)
         self.update_locs()
-        self.removeItem(deleted_loc)
-        
-        self.ob.delete_location(num)
-        self.delete_loc.emit(num)
+        self.refresh_locs.emit()
         
     def delete_all_locations(self) -> None:
         """Deletes all currently placed locations."""
-        while self.locations:
-            self.delete_location(self.locations[-1])
+        with self.history.edit("Delete all locations"):
+            while self.locations:
+                self.delete_location(self.locations[-1])
+                
+    def insert_location(self, i: int, loc: Location, add_to_layer: bool=True) -> None:
+        """Adds a location item to the scene at index i of the list of locations. The location's
+        handle must already be in the obstacle's location order.
+        """
+        self.history.record((self.remove_location, loc), (self.insert_location, i, loc))
+        self.locations.insert(i, loc)
+        self.update_locs()
+        self.addItem(loc)
+        if add_to_layer:
+            self.add_loc.emit(loc)
+            
+        # A restored location brings back its teleports, which are added to the teleport tables.
+        for child in loc.childItems():
+            if child.event_type == "Teleport":
+                self.add_teleport_to_table(child)
+                
+    def remove_location(self, loc: Location) -> None:
+        """Removes a location item from the scene, keeping the event images placed on it."""
+        num = loc.num
+        self.history.record((self.insert_location, num - 1, loc), (self.remove_location, loc))
+        self.locations.pop(num - 1)
+        self.removeItem(loc)
+        self.delete_loc.emit(num)
+        
+    def location_rect(self, loc: Location) -> tuple:
+        """Returns the scene coordinates of the top-left corner of a location and its dimensions."""
+        pos = loc.scenePos()
+        return pos.x(), pos.y(), loc.width, loc.height
+        
+    def safety_map(self, cell_size: float=32, speed: float=4, region: tuple=None) -> SafetyMap:
+        """Returns a simulation of a runner crossing the obstacle over the locations of the scene.
+        The arguments are as for SafetyMap.
+        """
+        rects = [self.location_rect(loc) for loc in self.locations]
+        return SafetyMap(self.ob, rects, cell_size, speed, region)
+        
+    def show_heatmap(self, metric: str=None, cell_size: float=32) -> None:
+        """Shows a heat map of one of coverage.metrics over the locations, or hides the heat map if
+        metric is None. Cells hit often, or with short gaps between hits, are hottest.
+        """
+        if metric is None:
+            if self.heatmap:
+                self.heatmap.setVisible(False)
+            return
+        rects = [self.location_rect(loc) for loc in self.locations]
+        key = (metric, cell_size, self.ob.version, tuple(rects))
+        if key != self.heatmap_key:
+            self.remove_heatmap()
+            self.heatmap_key = key
+            if rects:
+                grid = SafetyMap(self.ob, rects, cell_size)
+                colors = heat_colors(cell_coverage(grid)[metric], metric != "Hits")
+                self.heatmap = Heatmap(colors, grid.origin[0], grid.origin[1], cell_size)
+                self.heatmap.setZValue(self.heatmap_Z)
+                self.addItem(self.heatmap)
+        if self.heatmap:
+            self.heatmap.setVisible(True)
+            
+    def remove_heatmap(self) -> None:
+        """Removes the heat map and its cached image from the scene."""
+        if self.heatmap:
+            self.removeItem(self.heatmap)
+        self.heatmap = None
+        self.heatmap_key = None
+        
+    def set_location_rect(self,
+                          loc: Location,
+                          x: float,
+                          y: float,
+                          width: float,
+                          height: float) -> None:
+        """Moves the top-left corner of a location to the scene coordinates (x, y) and resizes it
+        to width x height.
+        """
+        old_center = loc.center()
+        parent = loc.parentItem()
+        loc.setPos(parent.mapFromScene(QPointF(x, y)) if parent else QPointF(x, y))
+        self.ob.shift_events(loc.num, loc.resize(old_center, x, y, width, height))
             
     def update_locs(self) -> None:
-        """Updates the location names and IDs."""
+        """Redraws the location names and IDs."""
         for loc in self.locations:
-            loc.update_data(len(self.locations))
+            loc.update_data()
             
     def find_location_under_cursor(self, x: int, y: int) -> Location:
         """Highlights and returns the top-most location which contains the point (x, y)."""
@@ -466,8 +576,11 @@ class Canvas(QGraphicsScene):
             new_y = y if y < corner_y else corner_y
             new_height = max(grid_size / 32, abs(y - corner_y) / 32)
         loc.setPos(new_x, new_y)
-        self.ob.shift_events(loc.num,
-                             loc.resize(loc.center(), new_x, new_y, new_width, new_height))
+        
+        # The resize is recorded once when the mouse is released.
+        with self.history.paused():
+            self.ob.shift_events(loc.num,
+                                 loc.resize(loc.center(), new_x, new_y, new_width, new_height))
         
     def adjust_moving_layer_group(self, loc: Location, motion: bool):
         """If motion is true, adds the location of the input number to the moving layer group.
@@ -507,40 +620,38 @@ class Canvas(QGraphicsScene):
             
     def set_obstacle_visibility(self, visible: bool) -> None:
         """Sets the visibility of obstacle events to the input boolean."""
+        count_id = self.ob.counts.id(self.current_count)
         for loc in self.locations:
             for child in loc.childItems():
-                child.setVisible(visible and child.count == self.current_count)
+                child.setVisible(visible and child.count_id == count_id)
 
     def show_count(self, count: int) -> None:
         """Shows all obstacle events occuring on the input count."""
         # Show explosions and teleports.
+        count_id = self.ob.counts.id(count)
         for loc in self.locations:
             for child in loc.childItems():
                 if child.event_type == "Wall":
                     continue
-                child.setVisible(child.count == count)
+                child.setVisible(child.count_id == count_id)
                 
         # Show walls.
-        num_counts = len(self.ob.delays)
         positions = set()
-        for i in range(num_counts):
-            prev_count = (count - i - 1) % num_counts + 1
-            walls = self.ob.walls[self.ob.walls["Count"] == prev_count]
-            for index, event in walls.iterrows():
-                loc = self.locations[int(event.loc["Location"]) - 1]
-                pos = QPointF(event.loc["x"], event.loc["y"])
-                place_count = self.ob.find_wall(prev_count, loc.num, pos)
-                scene_pos = loc.mapToScene(pos)
-                x, y = scene_pos.x(), scene_pos.y()
-                if (x, y) in positions:
+        for loc_num, x, y, add_remove, place_count in self.ob.wall_states(count):
+            loc = self.locations[loc_num - 1]
+            pos = QPointF(x, y)
+            scene_pos = loc.mapToScene(pos)
+            x, y = scene_pos.x(), scene_pos.y()
+            if (x, y) in positions:
+                continue
+            place_id = self.ob.counts.id(place_count)
+            for child in loc.childItems():
+                if (child.count_id != place_id
+                    or child.event_type != "Wall"
+                    or child.pos() != pos):
                     continue
-                for child in loc.childItems():
-                    if (child.count != place_count
-                        or child.event_type != "Wall"
-                        or child.pos() != pos):
-                        continue
-                    positions.add((x, y))
-                    child.setVisible(bool(event.loc["Add/Remove"] == 2))    
+                positions.add((x, y))
+                child.setVisible(add_remove == 2)
 
     def set_count(self, count: int) -> None:
         """Sets the current count to count."""
@@ -549,32 +660,165 @@ class Canvas(QGraphicsScene):
         
     def delete_count(self, count: int) -> None:
         """Deletes the input count."""
-        # Delete and shift the counts of images.
-        for loc in self.locations:
-            for child in loc.childItems():
-                if child.count > count:
-                    child.count = child.count - 1
-                    continue
-                if child.count != count:
-                    continue
-                child.setParentItem(None)
-                self.removeItem(child)
-                
-        new_count = count if count < len(self.ob.delays) else max(1, count - 1)
-        self.ob.delete_count(count)
-        self.set_count(new_count)
+        with self.history.edit("Delete count"):
+            # Delete the images on the count. Images on later counts keep their count IDs.
+            count_id = self.ob.counts.id(count)
+            for loc in self.locations:
+                for child in loc.childItems():
+                    if child.count_id == count_id:
+                        self.detach_image(child)
+                    
+            # The last remaining count is emptied instead of deleted.
+            num_counts = len(self.ob.delays)
+            self.ob.delete_count(count)
+            if len(self.ob.delays) < num_counts:
+                self.notify_count_deleted(count)
+        self.set_count(min(count, len(self.ob.delays)))
+        self.count_range.emit(self.current_count, len(self.ob.delays))
         
     def insert_count(self, count: int) -> None:
         """Inserts a new count at the input position."""
-        # Shift the counts of items.
+        with self.history.edit("Insert count"):
+            self.ob.insert_count(count)
+            self.notify_count_inserted(count)
+        self.set_count(count)
+        self.count_range.emit(self.current_count, len(self.ob.delays))
+        
+    def paste_counts(self,
+                     first: int,
+                     last: int,
+                     position: int,
+                     repeats: int=1,
+                     offset: tuple=(0, 0)) -> None:
+        """Inserts copies of counts first through last before the count at the input position.
+        The arguments are as for Obstacle.paste_counts.
+        """
+        source = [self.ob.counts.id(count) for count in range(first, last + 1)]
+        images = {ID: [] for ID in source}
         for loc in self.locations:
             for child in loc.childItems():
-                if child.count >= count:
-                    child.count = child.count + 1
+                if child.count_id in images:
+                    images[child.count_id].append(child)
+        with self.history.edit("Paste counts"):
+            IDs = self.ob.paste_counts(first, last, position, repeats, offset)
+            for count in range(position, position + len(IDs)):
+                self.notify_count_inserted(count)
+                
+            # The images of the copied counts are cloned onto the new counts. Teleports stay at
+            # the centers of their locations.
+            for i, ID in enumerate(IDs):
+                k = i // len(source)
+                for image in images[source[i % len(source)]]:
+                    copy = EventImage(image.event_type,
+                                      ID,
+                                      image.ID,
+                                      image.pixmap(),
+                                      list(image.teleport_cell),
+                                      image.teleport_player)
+                    self.attach_image(copy, image.parentItem())
+                    pos = image.pos()
+                    if image.event_type != "Teleport":
+                        pos += QPointF(k*offset[0], k*offset[1])
+                    copy.setPos(pos)
+                    copy.setZValue(image.zValue())
+        self.set_count(self.current_count)
+        self.count_range.emit(self.current_count, len(self.ob.delays))
+        
+    def notify_count_deleted(self, count: int) -> None:
+        """Sends a signal that the count at the input position was deleted."""
+        self.history.record((self.notify_count_inserted, count), (self.notify_count_deleted, count))
+        self.count_deleted.emit(count)
+        
+    def notify_count_inserted(self, count: int) -> None:
+        """Sends a signal that a count was inserted at the input position."""
+        self.history.record((self.notify_count_deleted, count), (self.notify_count_inserted, count))
+        self.count_inserted.emit(count)
+        
+    def set_delay(self, count: int, delay: int) -> None:
+        """Sets the delay following the input count."""
+        if self.ob.delays[count - 1] == delay:
+            return
+        
+        # Consecutive changes to one delay, such as scrolling the delay box, are undone together.
+        with self.history.edit("Change delay", ("Delay", self.ob.counts.id(count))):
+            self.ob.delays[count - 1] = delay
+            
+    def attach_image(self, image: EventImage, loc: Location, add_to_table: bool=True) -> None:
+        """Places an event image on a location. Teleports are also added to the teleport tables
+        unless add_to_table is false.
+        """
+        self.history.record((self.detach_image, image), (self.attach_image, image, loc))
+        image.setParentItem(loc)
+        if image.event_type == "Teleport" and add_to_table:
+            self.add_teleport_to_table(image)
+            
+    def detach_image(self, image: EventImage) -> None:
+        """Removes an event image from its location and the scene. Teleports are also removed from
+        the teleport tables.
+        """
+        loc = image.parentItem()
+        self.history.record((self.attach_image, image, loc), (self.detach_image, image))
+        if image.event_type == "Teleport":
+            self.delete_tele.emit(self.ob.counts.position(image.count_id), loc.num)
+        image.setParentItem(None)
+        self.removeItem(image)
+        
+    def move_images(self, moves: list[tuple]) -> None:
+        """Moves event images given as (image, location, position) triples to the input positions
+        on the input locations.
+        """
+        undo = [(image, image.parentItem(), image.pos()) for image, loc, pos in moves]
+        self.history.record((self.move_images, undo), (self.move_images, moves))
+        for image, loc, pos in moves:
+            if image.parentItem() is not loc:
+                image.setParentItem(loc)
+            image.setPos(pos)
+            
+    def transform_events(self,
+                         matrix: tuple=((1, 0), (0, 1)),
+                         offset: tuple=(0, 0),
+                         counts: list[int]=None,
+                         locations: list[int]=None,
+                         kinds: list[str]=("Explosions", "Walls"),
+                         anchor: int=None) -> None:
+        """Applies an affine map to the positions of the selected events and moves their images.
+        The arguments are as for Obstacle.transform_events.
+        """
+        event_types = {"Explosions": "Explosion", "Walls": "Wall"}
+        event_types = {event_types[kind] for kind in kinds}
+        count_ids = None if counts is None else {self.ob.counts.id(count) for count in counts}
+        locs = self.locations if locations is None else [self.locations[loc - 1]
+                                                         for loc in locations]
+        centers = [(loc.center().x(), loc.center().y()) for loc in self.locations]
+        
+        # Only the images of the selected locations are visited, and only the moved images are
+        # updated.
+        moves = []
+        for loc in locs:
+            target = loc if anchor is None else self.locations[anchor - 1]
+            center, target_center = centers[loc.num - 1], centers[target.num - 1]
+            for child in loc.childItems():
+                if (child.event_type not in event_types
+                    or count_ids is not None and child.count_id not in count_ids):
                     continue
-                    
-        self.ob.insert_count(count)
-        self.show_count(count)
+                x, y = self.ob.map_positions(child.x(),
+                                             child.y(),
+                                             matrix,
+                                             offset,
+                                             center,
+                                             target_center)
+                moves.append((child, target, QPointF(x, y)))
+        with self.history.edit("Transform events"):
+            self.ob.transform_events(matrix, offset, counts, locations, kinds, anchor, centers)
+            self.move_images(moves)
+        
+    def add_teleport_to_table(self, image: EventImage) -> None:
+        """Sends a signal to add a teleport image to the table of its count."""
+        self.add_tele.emit(self.ob.counts.position(image.count_id),
+                           image.teleport_player,
+                           sc_data.events[image.ID]["Name"],
+                           image.parentItem(),
+                           image.teleport_cell)
         
     def set_explosion_player(self, player: int) -> None:
         """Sets the player owning the placed explosions to index."""
@@ -610,36 +854,67 @@ class Canvas(QGraphicsScene):
                 continue
 
             # Add the image and explosion event.
-            explosion_image = EventImage("Explosion", count, ID, pixmap)
-            explosion_image.setParentItem(loc)
+            explosion_image = EventImage("Explosion", self.ob.count_id(count), ID, pixmap)
+            self.attach_image(explosion_image, loc)
             explosion_image.setPos(pos)
             explosion_image.setZValue(self.explosion_teleport_Z)
-            # If the explosion type did not previously exist the ob, send a signal to add the
-            # explosion to the audio mapping.
-            if not self.ob.find_explosion(ID):
-                self.add_explosion.emit(ID)
             self.ob.add_explosion(count, player, ID, loc.num, pos.x(), pos.y())
 
+    def place_pattern(self,
+                      pattern: dict,
+                      first: int,
+                      last: int,
+                      player: int,
+                      explosions: list[str],
+                      loc: Location,
+                      origin: tuple=(16, 16),
+                      cell_size: float=32) -> None:
+        """Places the explosions of a pattern from src.patterns on the scene and adds them to the
+        obstacle. The arguments are as for Obstacle.add_pattern.
+        """
+        IDs = [int(sc_data.name_to_ID[explosion]) for explosion in explosions]
+        num_counts = len(self.ob.delays)
+        with self.history.edit("Place pattern"):
+            rows = self.ob.add_pattern(pattern, first, last, player, IDs, loc.num, origin, cell_size)
+            for count in range(num_counts + 1, len(self.ob.delays) + 1):
+                self.notify_count_inserted(count)
+
+            # The images of the new explosions are created in one pass over the added rows.
+            table = self.ob.explosion_table
+            events = zip(table.column("Count")[rows].tolist(),
+                         table.column("Explosion")[rows].tolist(),
+                         table.column("x")[rows].tolist(),
+                         table.column("y")[rows].tolist())
+            for count_id, ID, x, y in events:
+                image = EventImage("Explosion", count_id, ID, self.static_explosion_images[ID])
+                self.attach_image(image, loc)
+                image.setPos(QPointF(x, y))
+                image.setZValue(self.explosion_teleport_Z)
+        self.set_count(self.current_count)
+        self.count_range.emit(self.current_count, len(self.ob.delays))
+
     def delete_explosions(self, count: int, loc: Location, pos: QPointF) -> bool:
         """Deletes explosions on loc at pos on count and returns a boolean representing whether or
         not any explosions to delete were found.
         """
         flag = False
         # Iterate through obstacle events at the location.
+        count_id = self.ob.counts.id(count)
         for child in loc.childItems():
-            if child.count != count or child.pos() != pos or child.event_type != "Explosion":
+            if child.count_id != count_id or child.pos() != pos or child.event_type != "Explosion":
                 continue
             flag = True
-            ID = child.ID
-            self.ob.delete_explosion(count, ID, loc.num, pos.x(), pos.y())
-            child.setParentItem(None)
-            self.removeItem(child)
-            # If the explosion type no longer exists in the ob, send a signal to remove the
-            # explosion from the audio mapping.
-            if not self.ob.find_explosion(ID):
-                self.del_explosion.emit(ID)
+            self.ob.delete_explosion(count, child.ID, loc.num, pos.x(), pos.y())
+            self.detach_image(child)
         return flag
             
+    def explosion_type_changed(self, ID: int, present: bool) -> None:
+        """Sends a signal to add an explosion type to the audio mapping or remove it."""
+        if present:
+            self.add_explosion.emit(ID)
+        else:
+            self.del_explosion.emit(ID)
+            
     def set_wall_player(self, player: int) -> None:
         """Sets the player owning the placed walls to player."""
         self.wall_player = player
@@ -672,8 +947,8 @@ class Canvas(QGraphicsScene):
         # Place wall image.
         ID = sc_data.name_to_ID[wall]
         pixmap = self.static_wall_images[ID]
-        wall_image = EventImage("Wall", count, ID, pixmap)
-        wall_image.setParentItem(loc)
+        wall_image = EventImage("Wall", self.ob.count_id(count), ID, pixmap)
+        self.attach_image(wall_image, loc)
         wall_image.setPos(pos)
         wall_image.setZValue(self.wall_Z)
         self.ob.place_wall(count, player, ID, loc.num, pos.x(), pos.y())
@@ -686,8 +961,9 @@ class Canvas(QGraphicsScene):
             return
         
         # Find previously placed wall and add a wall removal event.
+        prev_id = self.ob.counts.id(prev_count)
         for child in loc.childItems():
-            if child.count != prev_count or child.pos() != pos or child.event_type != "Wall":
+            if child.count_id != prev_id or child.pos() != pos or child.event_type != "Wall":
                 continue
             ID = child.ID
             add_remove = 0 if removal_type == "Remove Unit" else 1
@@ -704,11 +980,11 @@ class Canvas(QGraphicsScene):
             return False
 
         # Find and delete the wall placement (and possibly removal) events and the image.
+        prev_id = self.ob.counts.id(prev_count)
         for child in loc.childItems():
-            if child.count != prev_count or child.pos() != pos or child.event_type != "Wall":
+            if child.count_id != prev_id or child.pos() != pos or child.event_type != "Wall":
                 continue
-            child.setParentItem(None)
-            self.removeItem(child)
+            self.detach_image(child)
             self.ob.delete_wall(prev_count, loc.num, pos.x(), pos.y())
             return True
         return False
@@ -743,35 +1019,34 @@ class Canvas(QGraphicsScene):
             return
 
         # If a teleport has already been placed on this count at this location, do nothing.
+        count_id = self.ob.count_id(count)
         for child in loc.childItems():
-            if child.event_type == "Teleport" and child.count == count:
+            if child.event_type == "Teleport" and child.count_id == count_id:
                 return
                 
         # If the cell is occupied, do nothing.
         for other_loc in self.locations:
             for child in other_loc.childItems():
-                if add_to_table and child.teleport_cell == cell and child.count == count:
+                if add_to_table and child.teleport_cell == cell and child.count_id == count_id:
                     return
 
         # Place teleport image.
         ID = sc_data.name_to_ID[marker]
         pixmap = self.static_teleport_images[ID]
-        teleport_image = EventImage("Teleport", count, ID, pixmap, cell, player)
-        teleport_image.setParentItem(loc)
+        teleport_image = EventImage("Teleport", count_id, ID, pixmap, cell, player)
         teleport_image.setPos(loc.center())
         teleport_image.setZValue(self.explosion_teleport_Z)
         
         # It is more convenient to reconstruct the teleport tables independently when loading a
         # save file.
-        if add_to_table:
-            self.add_tele.emit(count, player, marker, loc, cell)
+        self.attach_image(teleport_image, loc, add_to_table)
         
         # If a start and end teleport are now connected, add a teleport event.
         for loc_end in self.locations:
             if loc_end == loc:
                 continue
             for child in loc_end.childItems():
-                if child.count != count or child.teleport_cell[0] != cell[0]:
+                if child.count_id != count_id or child.teleport_cell[0] != cell[0]:
                     continue
                 if cell[0] == 0:
                     self.ob.add_teleport(count,
@@ -793,12 +1068,11 @@ class Canvas(QGraphicsScene):
                 
     def delete_teleport(self, count: int, loc: Location) -> None:
         """Deletes a teleport."""
+        count_id = self.ob.counts.id(count)
         for child in loc.childItems():
-            if child.count == count and child.event_type == "Teleport":
-                child.setParentItem(None)
-                self.removeItem(child)
+            if child.count_id == count_id and child.event_type == "Teleport":
+                self.detach_image(child)
                 self.ob.delete_teleport(count, loc.num)
-                self.delete_tele.emit(count, loc.num)
                 return
         
     def mouseMoveEvent(self, event) -> None:
@@ -886,6 +1160,15 @@ class Canvas(QGraphicsScene):
                                              width_loc,
                                              height_loc)
         
+        # Everything done until the mouse is released is undone as a single edit. A stroke whose
+        # release was never received, for instance because a popup opened, is closed here.
+        if self.stroke:
+            self.history.end()
+        self.history.begin(self.edit_mode)
+        self.stroke = True
+        if self.edit_mode == "Location" and self.loc_tool == "Adjust":
+            self.loc_rects = {loc: self.location_rect(loc) for loc in self.locations}
+        
         if event.buttons() == Qt.MouseButton.LeftButton:
             # Place terrain.
             if self.edit_mode == "Terrain":
@@ -970,38 +1253,41 @@ class Canvas(QGraphicsScene):
                                               loc.height)
                             self.set_brush_visibility()
                     else:
-                        # Place explosions on loc at all positions in the brush.
-                        if self.event_type == "Explosion":
-                            for rect in self.current_brush.childItems():
-                                scene_pos = rect.mapToScene(rect.boundingRect().center())
-                                rel_pos = self.mobile_location.mapFromScene(scene_pos)
-                                self.place_explosions(self.current_count,
-                                                      self.explosion_player,
-                                                      self.selected_explosions,
-                                                      self.mobile_location,
-                                                      rel_pos)
-                        elif self.event_type == "Wall":
-                            # Place walls at all positions in the brush.
-                            if self.wall_place_remove == "Place":
+                        # The events placed by a brush are added in a single batch.
+                        with self.ob.batch():
+                            # Place explosions on loc at all positions in the brush.
+                            if self.event_type == "Explosion":
                                 for rect in self.current_brush.childItems():
                                     scene_pos = rect.mapToScene(rect.boundingRect().center())
                                     rel_pos = self.mobile_location.mapFromScene(scene_pos)
-                                    self.place_wall(self.current_count,
-                                                    self.wall_player,
-                                                    self.wall_unit,
-                                                    self.mobile_location,
-                                                    rel_pos)
+                                    self.place_explosions(self.current_count,
+                                                          self.explosion_player,
+                                                          self.selected_explosions,
+                                                          self.mobile_location,
+                                                          rel_pos)
+                            elif self.event_type == "Wall":
+                                # Place walls at all positions in the brush.
+                                if self.wall_place_remove == "Place":
+                                    for rect in self.current_brush.childItems():
+                                        scene_pos = rect.mapToScene(rect.boundingRect().center())
+                                        rel_pos = self.mobile_location.mapFromScene(scene_pos)
+                                        self.place_wall(self.current_count,
+                                                        self.wall_player,
+                                                        self.wall_unit,
+                                                        self.mobile_location,
+                                                        rel_pos)
                                 
-                            # Remove walls at all positions in the brush.
-                            else:
-                                for rect in self.current_brush.childItems():
-                                    scene_pos = rect.mapToScene(rect.boundingRect().center())
-                                    rel_pos = self.mobile_location.mapFromScene(scene_pos)
-                                    self.remove_wall(self.current_count,
-                                                     self.wall_removal_type,
-                                                     self.mobile_location,
-                                                     rel_pos)
-                                    self.show_count(self.current_count)
+                                # Remove walls at all positions in the brush.
+                                else:
+                                    for rect in self.current_brush.childItems():
+                                        scene_pos = rect.mapToScene(rect.boundingRect().center())
+                                        rel_pos = self.mobile_location.mapFromScene(scene_pos)
+                                        self.remove_wall(self.current_count,
+                                                         self.wall_removal_type,
+                                                         self.mobile_location,
+                                                         rel_pos)
+                        if self.event_type == "Wall" and self.wall_place_remove == "Remove":
+                            self.show_count(self.current_count)
 
         elif event.buttons() == Qt.MouseButton.RightButton:
             # Remove terrain.
@@ -1030,21 +1316,23 @@ class Canvas(QGraphicsScene):
                             self.delete_teleport(self.current_count, loc)
                 elif self.mobile_location:
                     flag = False
-                    # Delete explosions on loc at all positions in the brush.
-                    if self.event_type == "Explosion":
-                        for rect in self.current_brush.childItems():
-                            scene_pos = rect.mapToScene(rect.boundingRect().center())
-                            rel_pos = self.mobile_location.mapFromScene(scene_pos)
-                            flag |= self.delete_explosions(self.current_count,
-                                                           self.mobile_location,
-                                                           rel_pos)
-                    elif self.event_type == "Wall":
-                        for rect in self.current_brush.childItems():
-                            scene_pos = rect.mapToScene(rect.boundingRect().center())
-                            rel_pos = self.mobile_location.mapFromScene(scene_pos)
-                            flag |= self.delete_wall(self.current_count,
-                                                     self.mobile_location,
-                                                     rel_pos)
+                    # The events deleted by a brush are removed in a single batch.
+                    with self.ob.batch():
+                        # Delete explosions on loc at all positions in the brush.
+                        if self.event_type == "Explosion":
+                            for rect in self.current_brush.childItems():
+                                scene_pos = rect.mapToScene(rect.boundingRect().center())
+                                rel_pos = self.mobile_location.mapFromScene(scene_pos)
+                                flag |= self.delete_explosions(self.current_count,
+                                                               self.mobile_location,
+                                                               rel_pos)
+                        elif self.event_type == "Wall":
+                            for rect in self.current_brush.childItems():
+                                scene_pos = rect.mapToScene(rect.boundingRect().center())
+                                rel_pos = self.mobile_location.mapFromScene(scene_pos)
+                                flag |= self.delete_wall(self.current_count,
+                                                         self.mobile_location,
+                                                         rel_pos)
                     # If nothing to delete was found, unselects the mobile location.
                     if not flag:
                         self.mobile_location.set_color(Location.interior_color)
@@ -1075,13 +1363,53 @@ class Canvas(QGraphicsScene):
                         self.location_adjusment_cursor(self.loc_adjustment_type(x, y, loc))
                     else:
                         self.views()[0].set_cursor("open")
+                        
+        # Record the locations moved or resized during the stroke and close the stroke's edit.
+        for loc, rect in self.loc_rects.items():
+            new_rect = self.location_rect(loc)
+            if loc.scene() is self and new_rect != rect:
+                self.history.record((self.set_location_rect, loc) + rect,
+                                    (self.set_location_rect, loc) + new_rect)
+        self.loc_rects = {}
+        if self.stroke:
+            self.stroke = False
+            self.history.end()
                 
         QGraphicsScene.mouseReleaseEvent(self, event)
         
+    def undo(self) -> None:
+        """Undoes the most recent edit."""
+        self.replay(self.ob.undo)
+        
+    def redo(self) -> None:
+        """Redoes the most recently undone edit."""
+        self.replay(self.ob.redo)
+        
+    def replay(self, step) -> None:
+        """Undoes or redoes an edit by calling step, then updates the items and widgets which
+        depend on the edited data.
+        """
+        if not step():
+            return
+        
+        # Location numbers may have changed.
+        self.update_locs()
+        self.refresh_locs.emit()
+            
+        # The current count may no longer exist, and restored images must be shown or hidden.
+        count = min(self.current_count, len(self.ob.delays))
+        if self.edit_mode == "Obstacle":
+            self.set_count(count)
+        else:
+            self.current_count = count
+            self.set_obstacle_visibility(False)
+        self.count_range.emit(count, len(self.ob.delays))
+        
     def reset(self) -> None:
         """Erases all canvas data."""
         self.remove_all_terrain()
         self.delete_all_locations()
+        self.remove_heatmap()
         self.current_count = 1
         
         # Reset the edit mode for appearance purposes.
@@ -1129,66 +1457,50 @@ class Canvas(QGraphicsScene):
         
         # Reconstruct the obstacle.
         obstacle = data["Obstacle"]
-        explosions = pd.DataFrame.from_dict(obstacle["Explosions"],
-                                            columns=["Count",
-                                                     "Player",
-                                                     "Explosion",
-                                                     "Location",
-                                                     "x",
-                                                     "y"],
-                                            orient='index')
-        walls = pd.DataFrame.from_dict(obstacle["Walls"], 
-                                       columns=["Count",
-                                                "Player",
-                                                "Unit",
-                                                "Add/Remove",
-                                                "Location",
-                                                "x",
-                                                "y"],
-                                       orient='index')
-
-        for i, event in explosions.iterrows():
-            count = event.loc["Count"]
-            player = event.loc["Player"]
-            explosion = [sc_data.event_data.loc[event.loc["Explosion"]]["Name"]]
-            loc = self.locations[int(event.loc["Location"]) - 1]
-            pos = QPointF(event.loc["x"], event.loc["y"])
-            self.place_explosions(count, player, explosion, loc, pos)
-        for i, event in walls.iterrows():
-            count = event.loc["Count"]
-            player = event.loc["Player"]
-            unit_name = sc_data.event_data.loc[event.loc["Unit"]]["Name"]
-            add_remove = event.loc["Add/Remove"]
-            loc = self.locations[int(event.loc["Location"]) - 1]
-            pos = QPointF(event.loc["x"], event.loc["y"])
-            if add_remove == 2:
-                self.place_wall(count, player, unit_name, loc, pos)
-            else:
-                kill_remove = "Kill Unit" if add_remove else "Remove Unit"
-                self.remove_wall(count, kill_remove, loc, pos)
-        for count in data["Teleport tables"]:
-            table_data = data["Teleport tables"][count]
-            for i, row in enumerate(table_data):
-                if row[0]:
-                    player_from = row[0]["player"]
-                    marker_from = sc_data.event_data.loc[row[0]["img"]]["Name"]
-                    loc_from = self.locations[row[0]["loc"] - 1]
-                    self.place_teleport(int(count) + 1,
-                                        player_from,
-                                        marker_from,
-                                        loc_from,
-                                        [i + 1, 0],
-                                        False)
-                if row[1]:
-                    player_to = row[1]["player"]
-                    marker_to = sc_data.event_data.loc[row[1]["img"]]["Name"]
-                    loc_to = self.locations[row[1]["loc"] - 1]
-                    self.place_teleport(int(count) + 1,
-                                        player_to,
-                                        marker_to,
-                                        loc_to,
-                                        [i + 1, 1],
-                                        False)
+        # The saved events are replayed in a single batch.
+        with self.ob.batch():
+            for event in obstacle["Explosions"].values():
+                count = event["Count"]
+                player = event["Player"]
+                explosion = [sc_data.events[event["Explosion"]]["Name"]]
+                loc = self.locations[int(event["Location"]) - 1]
+                pos = QPointF(event["x"], event["y"])
+                self.place_explosions(count, player, explosion, loc, pos)
+            for event in obstacle["Walls"].values():
+                count = event["Count"]
+                player = event["Player"]
+                unit_name = sc_data.events[event["Unit"]]["Name"]
+                add_remove = event["Add/Remove"]
+                loc = self.locations[int(event["Location"]) - 1]
+                pos = QPointF(event["x"], event["y"])
+                if add_remove == 2:
+                    self.place_wall(count, player, unit_name, loc, pos)
+                else:
+                    kill_remove = "Kill Unit" if add_remove else "Remove Unit"
+                    self.remove_wall(count, kill_remove, loc, pos)
+            for count in data["Teleport tables"]:
+                table_data = data["Teleport tables"][count]
+                for i, row in enumerate(table_data):
+                    if row[0]:
+                        player_from = row[0]["player"]
+                        marker_from = sc_data.events[row[0]["img"]]["Name"]
+                        loc_from = self.locations[row[0]["loc"] - 1]
+                        self.place_teleport(int(count) + 1,
+                                            player_from,
+                                            marker_from,
+                                            loc_from,
+                                            [i + 1, 0],
+                                            False)
+                    if row[1]:
+                        player_to = row[1]["player"]
+                        marker_to = sc_data.events[row[1]["img"]]["Name"]
+                        loc_to = self.locations[row[1]["loc"] - 1]
+                        self.place_teleport(int(count) + 1,
+                                            player_to,
+                                            marker_to,
+                                            loc_to,
+                                            [i + 1, 1],
+                                            False)
 
         # Reset the edit mode for appearance purposes.
         self.mobile_location = None
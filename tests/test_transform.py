@@ -0,0 +1,51 @@
+import pytest
+from src.obstacle import Obstacle
+
+# A 3x3 location, whose center is (48, 48) relative to its top-left corner.
+center = [(48, 48)]
+grid = {(16 + 32*i, 16 + 32*j) for i in range(3) for j in range(3)}
+
+def grid_obstacle() -> Obstacle:
+    """Returns an obstacle with an explosion on each cell of a 3x3 location."""
+    ob = Obstacle()
+    for x, y in sorted(grid):
+        ob.add_explosion(1, 0, 1, 1, x, y)
+    return ob
+
+def positions(ob: Obstacle) -> list[tuple]:
+    """Returns the positions of the explosions of an obstacle in row order."""
+    rows = ob.explosion_table.rows()
+    return list(zip(ob.explosion_table.column("x")[rows].tolist(),
+                    ob.explosion_table.column("y")[rows].tolist()))
+
+@pytest.mark.parametrize("matrix", [((-1, 0), (0, 1)),
+                                    ((1, 0), (0, -1)),
+                                    ((0, -1), (1, 0)),
+                                    ((0, 1), (-1, 0)),
+                                    ((-1, 0), (0, -1))])
+def test_transform_keeps_grid(matrix):
+    ob = grid_obstacle()
+    ob.transform_events(matrix, location_centers=center)
+    assert set(positions(ob)) == grid
+
+def test_mirror_about_center():
+    ob = grid_obstacle()
+    before = positions(ob)
+    ob.transform_events(((-1, 0), (0, 1)), location_centers=center)
+    assert positions(ob) == [(96 - x, y) for x, y in before]
+
+def test_rotate_four_times():
+    ob = grid_obstacle()
+    before = positions(ob)
+    ob.transform_events(((0, -1), (1, 0)), location_centers=center)
+    assert positions(ob) != before
+    for _ in range(3):
+        ob.transform_events(((0, -1), (1, 0)), location_centers=center)
+    assert positions(ob) == before
+
+def test_translation_without_centers():
+    ob = grid_obstacle()
+    ob.transform_events(offset=(32, 0))
+    assert set(positions(ob)) == {(x + 32, y) for x, y in grid}
+    with pytest.raises(ValueError):
+        ob.transform_events(((-1, 0), (0, 1)))